@@ -0,0 +1,120 @@
+"""
+Seeded, vectorized versions of the generators in dataaa/gen.py and
+dataaa/for.py, parameterized by size so benchmarks can run from 10k up to
+10M rows. Same seed + size always gives the same frame.
+"""
+import numpy as np
+import pandas as pd
+
+
+# ---------------- transactions (dataaa/gen.py) ----------------
+
+# category -> (type, description, amount low, amount high)
+CATEGORIES = {
+    "Salary": ("income", "Monthly Salary Credit", 60000, 90000),
+    "Freelance": ("income", "Freelance Project Payment", 200, 8000),
+    "Rent": ("expense", "House Rent", 15000, 25000),
+    "Groceries": ("expense", "Supermarket Purchase", 200, 8000),
+    "Dining": ("expense", "Restaurant Payment", 200, 8000),
+    "Fuel": ("expense", "Fuel Station", 200, 8000),
+    "Shopping": ("expense", "Online Shopping", 200, 8000),
+    "Electricity": ("expense", "Electricity Bill", 200, 8000),
+    "Internet": ("expense", "Broadband Bill", 200, 8000),
+    "Insurance": ("expense", "Insurance Premium", 200, 8000),
+    "Medical": ("expense", "Medical Expense", 200, 8000),
+    "Travel": ("expense", "Travel Booking", 200, 8000),
+    "Mutual Fund": ("expense", "SIP Investment", 3000, 15000),
+    "Stocks": ("expense", "Equity Purchase", 3000, 15000),
+}
+ACCOUNTS = np.array(["HDFC Savings", "ICICI Savings"])
+PAYMENT_METHODS = np.array(["UPI", "Card", "NetBanking"])
+
+
+def transactions_frame(rows: int = 20_000, seed: int = 42, days: int = 900,
+                       start_date: str = "2022-01-01") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    names = np.array(list(CATEGORIES))
+    types = np.array([v[0] for v in CATEGORIES.values()])
+    descriptions = np.array([v[1] for v in CATEGORIES.values()])
+    low = np.array([v[2] for v in CATEGORIES.values()])
+    high = np.array([v[3] for v in CATEGORIES.values()])
+
+    cat = rng.integers(0, len(names), rows)
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, days + 1, rows), unit="D")
+
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "description": descriptions[cat],
+        "category": names[cat],
+        "amount": rng.integers(low[cat], high[cat] + 1),
+        "type": types[cat],
+        "account": ACCOUNTS[rng.integers(0, len(ACCOUNTS), rows)],
+        "payment_method": PAYMENT_METHODS[rng.integers(0, len(PAYMENT_METHODS), rows)],
+    })
+
+
+# ---------------- daily multi-asset returns (dataaa/for.py) ----------------
+
+BASE_ASSETS = ["US_Stocks", "Intl_Stocks", "Bonds", "Gold", "Crypto", "Real_Estate", "Cash"]
+BASE_ANNUAL_RETURNS = np.array([0.10, 0.07, 0.04, 0.05, 0.18, 0.07, 0.02])
+BASE_ANNUAL_VOL = np.array([0.18, 0.20, 0.06, 0.12, 0.40, 0.15, 0.01])
+BASE_CORRELATION = np.array([
+    [1.0, 0.75, 0.20, 0.25, 0.60, 0.70, 0.05],
+    [0.75, 1.0, 0.20, 0.25, 0.55, 0.65, 0.05],
+    [0.20, 0.20, 1.0, 0.10, 0.05, 0.20, 0.10],
+    [0.25, 0.25, 0.10, 1.0, 0.20, 0.30, 0.10],
+    [0.60, 0.55, 0.05, 0.20, 1.0, 0.50, 0.05],
+    [0.70, 0.65, 0.20, 0.30, 0.50, 1.0, 0.05],
+    [0.05, 0.05, 0.10, 0.10, 0.05, 0.05, 1.0],
+])
+
+
+def asset_universe(n_assets: int, seed: int = 42):
+    """
+    Names, annual returns, annual vols and correlation for n assets. The
+    first seven match dataaa/for.py; extra assets load on a common market
+    factor so the correlation matrix stays positive definite.
+    """
+    if n_assets <= len(BASE_ASSETS):
+        k = n_assets
+        return (BASE_ASSETS[:k], BASE_ANNUAL_RETURNS[:k], BASE_ANNUAL_VOL[:k],
+                BASE_CORRELATION[:k, :k])
+
+    rng = np.random.default_rng(seed)
+    extra = n_assets - len(BASE_ASSETS)
+    names = BASE_ASSETS + [f"Asset_{i:03d}" for i in range(extra)]
+    returns = np.concatenate([BASE_ANNUAL_RETURNS, rng.uniform(0.0, 0.15, extra)])
+    vols = np.concatenate([BASE_ANNUAL_VOL, rng.uniform(0.05, 0.45, extra)])
+
+    loadings = rng.uniform(0.2, 0.8, extra)
+    corr = np.eye(n_assets)
+    corr[:7, :7] = BASE_CORRELATION
+    corr[7:, 7:] = np.outer(loadings, loadings)
+    np.fill_diagonal(corr, 1.0)
+    # extra assets correlate with the base block through US_Stocks' row
+    corr[7:, :7] = np.outer(loadings, BASE_CORRELATION[0]) * 0.8
+    corr[:7, 7:] = corr[7:, :7].T
+    # nudge to the nearest PD matrix if the blocks don't fit together
+    w, v = np.linalg.eigh(corr)
+    if w.min() <= 1e-8:
+        w = np.clip(w, 1e-6, None)
+        corr = v @ np.diag(w) @ v.T
+        d = np.sqrt(np.diag(corr))
+        corr = corr / np.outer(d, d)
+    return names, returns, vols, corr
+
+
+def returns_frame(rows: int = 20_000, n_assets: int = 7, seed: int = 42,
+                  start_date: str = "2005-01-01", date_format: str | None = None) -> pd.DataFrame:
+    names, annual_returns, annual_vol, corr = asset_universe(n_assets, seed)
+    mean = annual_returns / 252
+    vol = annual_vol / np.sqrt(252)
+
+    rng = np.random.default_rng(seed)
+    chol = np.linalg.cholesky(corr)
+    data = mean + (rng.standard_normal((rows, n_assets)) @ chol.T) * vol
+
+    df = pd.DataFrame(data, columns=names)
+    dates = pd.date_range(start=start_date, periods=rows, freq="D")
+    df.insert(0, "date", dates.strftime(date_format) if date_format else dates)
+    return df
@@ -0,0 +1,100 @@
+"""
+Startup import-time benchmark for the API process.
+
+Runs `python -X importtime -c "import src.app.main"` in fresh interpreters,
+reports the slowest modules and fails when total import time exceeds the
+budget, or when a module regresses against a saved baseline.
+
+    python benchmarks/import_time.py --budget-ms 800
+    python benchmarks/import_time.py --save baseline.json
+    python benchmarks/import_time.py --baseline baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TARGET = "src.app.main"
+
+
+def measure_once(target: str = TARGET) -> dict[str, int]:
+    """Cumulative import time (µs) per module for one cold interpreter."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {target} failed:\n{proc.stderr[-2000:]}")
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def measure(runs: int = 5, target: str = TARGET) -> dict[str, float]:
+    """Median cumulative import time (ms) per module over several runs."""
+    samples = [measure_once(target) for _ in range(runs)]
+    names = set().union(*samples)
+    return {
+        name: statistics.median(s.get(name, 0) for s in samples) / 1000.0
+        for name in names
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative growth per module vs. baseline")
+    parser.add_argument("--min-ms", type=float, default=20.0,
+                        help="ignore baseline regressions on modules faster than this")
+    parser.add_argument("--save", type=Path)
+    args = parser.parse_args(argv)
+
+    timings = measure(args.runs)
+    total = timings.get(TARGET, 0.0)
+
+    print(f"{TARGET}: {total:.1f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(timings.items(), key=lambda kv: kv[1], reverse=True)[1:args.top + 1]:
+        print(f"  {ms:9.1f} ms  {name}")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"total import time {total:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        for name, ms in timings.items():
+            before = baseline.get(name)
+            if before is None:
+                if ms >= args.min_ms:
+                    failures.append(f"new import {name}: {ms:.1f} ms")
+            elif ms >= args.min_ms and ms > before * (1 + args.tolerance):
+                failures.append(f"{name}: {before:.1f} ms -> {ms:.1f} ms")
+
+    if args.save:
+        args.save.write_text(json.dumps(timings, indent=2, sort_keys=True))
+        print(f"saved timings to {args.save}")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
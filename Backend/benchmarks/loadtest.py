@@ -0,0 +1,229 @@
+"""
+Async load generator replaying a dashboard-like traffic mix.
+
+Runs in-process against the ASGI app (throwaway SQLite, fake LLM) or
+against a running server, sweeps a list of concurrent-user counts and
+reports throughput plus p50/p95/p99 latency per route for each step.
+
+    python benchmarks/loadtest.py --users 1,10,50 --duration 20
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --users 25 --mix dashboard=5,montecarlo=1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+
+from benchmarks.datagen import transactions_frame  # noqa: E402
+
+
+DEFAULT_MIX = {"login": 1, "dashboard": 6, "upload": 1, "montecarlo": 2, "askai": 1}
+DASHBOARD_ROUTES = (
+    "/api/analytics/categories",
+    "/api/analytics/cashflow",
+    "/api/analytics/volatility",
+    "/api/analytics/networth",
+    "/api/score",
+)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, method, route, **kwargs):
+        start = time.perf_counter()
+        try:
+            res = await client.request(method, route, **kwargs)
+            failed = res.status_code >= 400
+        except httpx.HTTPError:
+            res, failed = None, True
+        self.latencies[route].append(time.perf_counter() - start)
+        if failed:
+            self.errors[route] += 1
+        return res
+
+
+# ---------------- scenarios ----------------
+
+async def login(client, rec, ctx):
+    res = await rec.call(client, "POST", "/api/auth/login",
+                         json={"email": ctx["email"], "password": ctx["password"]})
+    if res is not None and res.status_code == 200:
+        ctx["headers"] = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+async def dashboard(client, rec, ctx):
+    await asyncio.gather(*(rec.call(client, "GET", r, headers=ctx["headers"]) for r in DASHBOARD_ROUTES))
+
+
+async def upload(client, rec, ctx):
+    files = {"file": (f"loadtest-{random.randrange(1 << 30)}.csv", ctx["upload_csv"], "text/csv")}
+    await rec.call(client, "POST", "/api/upload", files=files, headers=ctx["headers"])
+
+
+async def montecarlo(client, rec, ctx):
+    payload = {"initial": 100_000, "monthly": 1_000, "mean": 0.07, "std": 0.15,
+               "years": 30, "paths": ctx["mc_paths"], "goal_target": 1_000_000}
+    await rec.call(client, "POST", "/api/monte-carlo", json=payload)
+
+
+async def askai(client, rec, ctx):
+    await rec.call(client, "POST", "/api/ask-ai", json={"question": "How is my portfolio doing?"})
+
+
+SCENARIOS = {
+    "login": login,
+    "dashboard": dashboard,
+    "upload": upload,
+    "montecarlo": montecarlo,
+    "askai": askai,
+}
+
+
+async def virtual_user(client, rec, ctx, mix, deadline, think):
+    ctx = dict(ctx)
+    await login(client, rec, ctx)
+    names, weights = zip(*mix.items())
+    while time.perf_counter() < deadline:
+        await SCENARIOS[random.choices(names, weights)[0]](client, rec, ctx)
+        if think:
+            await asyncio.sleep(random.expovariate(1.0 / think))
+
+
+async def run_step(make_client, users, duration, mix, ctx, think):
+    rec = Recorder()
+    deadline = time.perf_counter() + duration
+    async with make_client() as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(client, rec, ctx, mix, deadline, think) for _ in range(users)))
+        elapsed = time.perf_counter() - start
+    return rec, elapsed
+
+
+def summarize(rec: Recorder, elapsed: float):
+    rows = {}
+    for route, samples in sorted(rec.latencies.items()):
+        q = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+        rows[route] = {
+            "count": len(samples),
+            "errors": rec.errors[route],
+            "rps": len(samples) / elapsed,
+            "p50_ms": q[49] * 1000,
+            "p95_ms": q[94] * 1000,
+            "p99_ms": q[98] * 1000,
+        }
+    return rows
+
+
+def print_step(users, elapsed, rows):
+    total = sum(r["count"] for r in rows.values())
+    print(f"\n== {users} users, {elapsed:.1f}s, {total / elapsed:.1f} req/s")
+    print(f"{'route':32s} {'count':>7s} {'err':>5s} {'rps':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+    for route, r in rows.items():
+        print(f"{route:32s} {r['count']:7d} {r['errors']:5d} {r['rps']:8.1f} "
+              f"{r['p50_ms']:8.1f}ms {r['p95_ms']:8.1f}ms {r['p99_ms']:8.1f}ms")
+
+
+# ---------------- in-process app ----------------
+
+class FakeCompletions:
+    def create(self, **kwargs):
+        # stand-in for LLM latency; blocks the event loop just like the real sync client
+        time.sleep(0.05)
+        message = type("Message", (), {"content": "Your portfolio looks balanced."})
+        choice = type("Choice", (), {"message": message})
+        return type("Completion", (), {"choices": [choice]})
+
+
+class FakeGroq:
+    chat = type("Chat", (), {"completions": FakeCompletions()})
+
+
+def in_process_client_factory():
+    work_dir = Path(tempfile.mkdtemp(prefix="microhard-load-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'load.db'}"
+    os.environ["RAW_DATA_DIR"] = str(work_dir / "raw")
+
+    from src.app import main
+    from src.app.database import init_db
+
+    init_db()
+    main.get_groq_client = lambda: FakeGroq()
+    transport = httpx.ASGITransport(app=main.app)
+    return lambda: httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120)
+
+
+def parse_mix(text: str | None):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r}; choose from {sorted(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="target a running server instead of the in-process app")
+    parser.add_argument("--users", default="1,10,25", help="comma-separated concurrency steps")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per step")
+    parser.add_argument("--mix", help="scenario weights, e.g. dashboard=6,montecarlo=2,askai=1")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between scenarios (s)")
+    parser.add_argument("--mc-paths", type=int, default=5_000)
+    parser.add_argument("--upload-rows", type=int, default=2_000)
+    parser.add_argument("--email", default=os.environ.get("DEFAULT_USER_EMAIL", "demo@microhard.local"))
+    parser.add_argument("--password", default=os.environ.get("DEFAULT_USER_PASSWORD", "demo123"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="write per-step results as JSON")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    mix = parse_mix(args.mix)
+    if args.url and "askai" in mix:
+        print("note: against a live server ask-ai calls the real LLM; drop it from --mix to avoid that")
+
+    if args.url:
+        def make_client():
+            return httpx.AsyncClient(base_url=args.url, timeout=120)
+    else:
+        make_client = in_process_client_factory()
+
+    ctx = {
+        "email": args.email,
+        "password": args.password,
+        "headers": {},
+        "mc_paths": args.mc_paths,
+        "upload_csv": transactions_frame(args.upload_rows, seed=args.seed).to_csv(index=False).encode(),
+    }
+
+    report = []
+    for users in (int(u) for u in args.users.split(",")):
+        rec, elapsed = asyncio.run(run_step(make_client, users, args.duration, mix, ctx, args.think))
+        rows = summarize(rec, elapsed)
+        print_step(users, elapsed, rows)
+        report.append({"users": users, "elapsed_s": elapsed, "routes": rows})
+
+    if args.output:
+        args.output.write_text(json.dumps({"mix": mix, "steps": report}, indent=2))
+        print(f"\nresults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
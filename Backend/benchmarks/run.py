@@ -0,0 +1,258 @@
+"""
+Reproducible performance benchmarks for the backend hot paths.
+
+Times ingestion, the analytics endpoints, the financial score, Monte Carlo
+(paths x years grid), the optimizer (n assets) and forecasting on seeded
+synthetic data, and writes the results as JSON so runs can be compared.
+
+    python benchmarks/run.py                          # quick preset
+    python benchmarks/run.py --preset full --only ingest
+    python benchmarks/run.py --baseline results/old.json --tolerance 0.2
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+WORK_DIR = Path(tempfile.mkdtemp(prefix="microhard-bench-"))
+
+# Point the app at a throwaway SQLite file before any src module builds the engine.
+os.environ["DATABASE_URL"] = f"sqlite:///{WORK_DIR / 'bench.db'}"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import SQLModel, Session, create_engine  # noqa: E402
+
+from benchmarks.datagen import transactions_frame, returns_frame  # noqa: E402
+from src.app.database import engine  # noqa: E402
+from src.models.transaction import Transaction  # noqa: E402
+from src.models.forecasting import forecast_many  # noqa: E402
+from src.pipelines.predict_pipeline import run_monte_carlo_pipeline  # noqa: E402
+from src.services import analytics, category_forecast  # noqa: E402
+from src.services.ingestion import normalize_and_save  # noqa: E402
+from src.services.portfolio_optimizer import optimize_portfolio  # noqa: E402
+from src.services.search import ensure_search_index  # noqa: E402
+from src.services.score import financial_confidence_score  # noqa: E402
+
+
+PRESETS = {
+    "quick": {
+        "rows": [10_000],
+        "return_rows": [20_000],
+        "mc_paths": [1_000, 10_000],
+        "mc_years": [10, 30],
+        "assets": [5, 10],
+        "forecast_series": [10, 1_000],
+    },
+    "standard": {
+        "rows": [10_000, 100_000],
+        "return_rows": [20_000, 200_000],
+        "mc_paths": [1_000, 10_000, 100_000],
+        "mc_years": [10, 30],
+        "assets": [5, 10, 15],
+        "forecast_series": [10, 1_000, 10_000],
+    },
+    "full": {
+        "rows": [10_000, 100_000, 1_000_000, 10_000_000],
+        "return_rows": [20_000, 200_000, 2_000_000],
+        "mc_paths": [1_000, 10_000, 100_000],
+        "mc_years": [10, 30, 50],
+        "assets": [5, 10, 15, 20],
+        "forecast_series": [10, 1_000, 10_000, 100_000],
+    },
+}
+
+
+def timeit(fn, repeat: int, setup=None, warmup: int = 1):
+    """Run fn `repeat` times after `warmup` untimed calls; setup is never timed."""
+    for _ in range(warmup):
+        fn(setup()) if setup else fn()
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def fresh_engine(name: str):
+    path = WORK_DIR / f"{name}.db"
+    if path.exists():
+        path.unlink()
+    eng = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(eng)
+    ensure_search_index(eng)
+    return eng
+
+
+def seed_transactions(eng, df):
+    """Bulk-load a generated frame (setup only, not what we measure)."""
+    records = df.rename(columns=str.lower).assign(
+        date=lambda d: analytics.pd.to_datetime(d["date"]).dt.date,
+        amount=lambda d: np.where(d["type"] == "expense", -d["amount"], d["amount"]).astype(float),
+    )[["date", "amount", "description", "category", "type", "account"]].to_dict("records")
+    with Session(eng) as session:
+        session.execute(insert(Transaction), records)
+        session.commit()
+
+
+# ---------------- cases ----------------
+
+# benchmarks that need a seeded transactions database
+ROW_CASES = ("ingest", "analytics.categories", "analytics.cashflow", "analytics.volatility",
+             "score", "forecast.categories", "analytics.networth")
+
+
+def cases(preset: dict, seed: int, only: str = "*"):
+    """Yield (name, params, callable, setup) for every benchmark in the preset."""
+    need_rows = any(fnmatch.fnmatch(name, only) for name in ROW_CASES)
+    for rows in preset["rows"] if need_rows else []:
+        df = transactions_frame(rows, seed=seed)
+
+        def ingest(eng, df=df):
+            with Session(eng) as session:
+                normalize_and_save(df, session)
+
+        yield "ingest", {"rows": rows}, ingest, lambda rows=rows: fresh_engine(f"ingest-{rows}")
+
+        eng = fresh_engine(f"analytics-{rows}")
+        seed_transactions(eng, df)
+
+        def on_session(fn, eng=eng):
+            def run():
+                with Session(eng) as session:
+                    fn(session)
+            return run
+
+        yield "analytics.categories", {"rows": rows}, on_session(analytics.totals_by_category), None
+        yield "analytics.cashflow", {"rows": rows}, on_session(analytics.income_expense_over_time), None
+        yield "analytics.volatility", {"rows": rows}, on_session(analytics.volatility), None
+        yield "score", {"rows": rows}, on_session(financial_confidence_score), None
+
+        def category_forecast_uncached(session):
+            category_forecast._forecast_cache.clear()
+            category_forecast.forecast_by_group(session, steps=6)
+
+        yield "forecast.categories", {"rows": rows}, on_session(category_forecast_uncached), None
+
+        for return_rows in preset["return_rows"]:
+            raw_dir = WORK_DIR / f"raw-{return_rows}"
+            if not raw_dir.exists():
+                raw_dir.mkdir()
+                returns_frame(return_rows, seed=seed, date_format="%m/%d/%Y").to_csv(
+                    raw_dir / "portfolio_returns.csv", index=False)
+
+            def networth(session, raw_dir=raw_dir):
+                analytics.net_worth_timeseries(session, raw_dir=raw_dir)
+
+            yield ("analytics.networth", {"rows": rows, "return_rows": return_rows},
+                   on_session(networth), None)
+
+    for paths in preset["mc_paths"]:
+        for years in preset["mc_years"]:
+            def mc(paths=paths, years=years):
+                run_monte_carlo_pipeline(100_000, 1_000, 0.07, 0.15, years, paths=paths, goal_target=1e6)
+            yield "monte_carlo", {"paths": paths, "years": years}, mc, None
+
+    for n in preset["assets"]:
+        rng = np.random.default_rng(seed)
+        assets = [f"Asset_{i}" for i in range(n)]
+        returns = rng.uniform(0.01, 0.12, n).tolist()
+        yield "optimize", {"assets": n}, lambda a=assets, r=returns: optimize_portfolio(a, r), None
+
+    for k in preset["forecast_series"]:
+        rng = np.random.default_rng(seed)
+        series = {f"s{i}": (rng.normal(100, 10, 36).cumsum()).tolist() for i in range(k)}
+        for model in ("linear", "holt_winters"):
+            yield ("forecast.batch", {"series": k, "points": 36, "model": model},
+                   lambda s=series, m=model: forecast_many(s, 6, model=m), None)
+
+
+# ---------------- reporting ----------------
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def case_key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float):
+    before = {case_key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = before.get(case_key(r))
+        if old and r["median_s"] > old["median_s"] * (1 + tolerance):
+            regressions.append((case_key(r), old["median_s"], r["median_s"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--only", default="*", help="glob on benchmark names, e.g. 'analytics.*'")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    SQLModel.metadata.create_all(engine)
+    np.random.seed(args.seed)
+
+    results = []
+    for name, params, fn, setup in cases(PRESETS[args.preset], args.seed, args.only):
+        if not fnmatch.fnmatch(name, args.only):
+            continue
+        timings = timeit(fn, args.repeat, setup, args.warmup)
+        result = {
+            "name": name,
+            "params": params,
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "runs": len(timings),
+        }
+        results.append(result)
+        print(f"{case_key(result):60s} {result['median_s'] * 1000:10.2f} ms")
+
+    output = args.output or BACKEND_DIR / "benchmarks" / "results" / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"env": environment(), "preset": args.preset, "results": results}, indent=2))
+    print(f"results written to {output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for key, old, new in regressions:
+            print(f"REGRESSION: {key}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import asyncio
+import math
+import threading
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager, contextmanager
+from time import perf_counter
+
+from fastapi import HTTPException
+
+from .config import config_yaml
+from .logger import logger
+from .metrics import registry
+
+ADMISSION_CONFIG = config_yaml.get("admission", {})
+ENABLED = ADMISSION_CONFIG.get("enabled", True)
+MEMORY_BUDGET = int(ADMISSION_CONFIG.get("memory_budget_mb", 1024) * 2**20)
+DEFAULT_LIMIT = ADMISSION_CONFIG.get("default_concurrency", 4)
+LIMITS = {"monte_carlo": 2, "upload": 2, "optimize": 4, **ADMISSION_CONFIG.get("concurrency", {})}
+MAX_QUEUE = ADMISSION_CONFIG.get("max_queue", 16)
+QUEUE_TIMEOUT = ADMISSION_CONFIG.get("queue_timeout", 10.0)
+# parsed DataFrame + ORM objects per byte of uploaded CSV
+UPLOAD_BYTES_FACTOR = ADMISSION_CONFIG.get("upload_bytes_factor", 12)
+
+
+# ---------------- cost estimates (bytes) ----------------
+
+def monte_carlo_cost(paths: int, years: int) -> int:
+    # shocks, log growth, discount factors, wealth and the percentile copy,
+    # each (steps, paths) float64
+    return 5 * 8 * max(paths, 1) * (max(years, 0) * 12 + 1)
+
+
+def upload_cost(size: int) -> int:
+    return UPLOAD_BYTES_FACTOR * max(size, 0)
+
+
+def optimize_cost(assets: int) -> int:
+    # covariance-sized work arrays dominate
+    return 8 * 8 * max(assets, 1) ** 2
+
+
+class _Waiter:
+    __slots__ = ("endpoint", "cost", "granted", "wake")
+
+    def __init__(self, endpoint: str, cost: int, wake):
+        self.endpoint = endpoint
+        self.cost = cost
+        self.granted = False
+        self.wake = wake
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    """
+    Per-endpoint concurrency limits plus one memory budget shared by every
+    admitted request. A request that does not fit waits (bounded queue,
+    bounded time) for running ones to finish; otherwise it is turned away
+    with 429 (queue full) or 503 (timed out), both with a Retry-After derived
+    from how long the endpoint's requests have recently taken.
+
+    Routes wait through admit_async, which parks the request on the event
+    loop: a queued request holds no threadpool thread, so waiters cannot
+    starve the sync routes or the admitted requests' own threadpool work.
+    A release hands its freed capacity straight to the oldest waiters that
+    fit.
+    """
+
+    def __init__(self, memory_budget: int, limits: dict, default_limit: int,
+                 max_queue: int, queue_timeout: float):
+        self.memory_budget = memory_budget
+        self.limits = limits
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.reserved = 0
+        self.active = defaultdict(int)
+        self.waiting = defaultdict(int)
+        self._seconds = {}      # endpoint -> EWMA of service time
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def limit(self, endpoint: str) -> int:
+        return self.limits.get(endpoint, self.default_limit)
+
+    def _fits(self, endpoint: str, cost: int) -> bool:
+        return self.active[endpoint] < self.limit(endpoint) and self.reserved + cost <= self.memory_budget
+
+    def retry_after(self, endpoint: str) -> int:
+        per_request = self._seconds.get(endpoint, 1.0)
+        return max(1, math.ceil(per_request * (self.waiting[endpoint] + 1) / self.limit(endpoint)))
+
+    def _reject(self, endpoint: str, status: int, reason: str):
+        retry = self.retry_after(endpoint)
+        logger.warning("[ADMISSION] %s rejected (%d): %s", endpoint, status, reason)
+        raise HTTPException(status_code=status, detail=reason, headers={"Retry-After": str(retry)})
+
+    def _check_budget(self, cost: int):
+        if cost > self.memory_budget:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request needs ~{cost / 2**20:.0f} MB, over the {self.memory_budget / 2**20:.0f} MB budget",
+            )
+
+    def _admit(self, endpoint: str, cost: int):
+        self.active[endpoint] += 1
+        self.reserved += cost
+
+    def _enqueue(self, endpoint: str, cost: int, wake) -> _Waiter | None:
+        """Admit at once (None) or queue a waiter; caller holds the lock."""
+        if self._fits(endpoint, cost):
+            self._admit(endpoint, cost)
+            return None
+        if self.waiting[endpoint] >= self.max_queue:
+            self._reject(endpoint, 429, "Too many queued requests")
+        waiter = _Waiter(endpoint, cost, wake)
+        self._waiters.append(waiter)
+        self.waiting[endpoint] += 1
+        return waiter
+
+    def _dequeue(self, waiter: _Waiter):
+        self._waiters.remove(waiter)
+        self.waiting[waiter.endpoint] -= 1
+
+    def _grant(self):
+        """Admit queued requests, oldest first, while they fit; caller holds the lock."""
+        for waiter in list(self._waiters):
+            if self._fits(waiter.endpoint, waiter.cost):
+                self._dequeue(waiter)
+                self._admit(waiter.endpoint, waiter.cost)
+                waiter.granted = True
+                waiter.wake()
+
+    def _timed_out(self, waiter: _Waiter):
+        with self._lock:
+            if not waiter.granted:
+                self._dequeue(waiter)
+                self._reject(waiter.endpoint, 503, "Server busy, try again shortly")
+
+    def _abandon(self, waiter: _Waiter):
+        """The waiting caller went away: give back whatever it holds."""
+        with self._lock:
+            if waiter.granted:
+                self.active[waiter.endpoint] -= 1
+                self.reserved -= waiter.cost
+                self._grant()
+            else:
+                self._dequeue(waiter)
+
+    def acquire(self, endpoint: str, cost: int) -> float:
+        """Block the calling thread until the request fits; returns its start time for release()."""
+        self._check_budget(cost)
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(endpoint, cost, event.set)
+        if waiter is not None:
+            event.wait(self.queue_timeout)
+            self._timed_out(waiter)
+        return perf_counter()
+
+    async def acquire_async(self, endpoint: str, cost: int) -> float:
+        """acquire() that waits on the event loop instead of a thread."""
+        self._check_budget(cost)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            waiter = self._enqueue(endpoint, cost, lambda: loop.call_soon_threadsafe(_resolve, future))
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(future, self.queue_timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+            self._timed_out(waiter)
+        return perf_counter()
+
+    def release(self, endpoint: str, cost: int, started: float):
+        elapsed = perf_counter() - started
+        with self._lock:
+            self.active[endpoint] -= 1
+            self.reserved -= cost
+            previous = self._seconds.get(endpoint)
+            self._seconds[endpoint] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            self._grant()
+
+    @contextmanager
+    def admit(self, endpoint: str, cost: int):
+        """For code already on a worker thread (the wait blocks that thread)."""
+        if not ENABLED:
+            yield
+            return
+        started = self.acquire(endpoint, cost)
+        try:
+            yield
+        finally:
+            self.release(endpoint, cost, started)
+
+    @asynccontextmanager
+    async def admit_async(self, endpoint: str, cost: int):
+        """For routes: the wait happens on the event loop, the work goes to the threadpool after."""
+        if not ENABLED:
+            yield
+            return
+        started = await self.acquire_async(endpoint, cost)
+        try:
+            yield
+        finally:
+            self.release(endpoint, cost, started)
+
+    def queue_depth(self) -> dict:
+        with self._lock:
+            return {k: self.waiting[k] for k in {*self.limits, *self.waiting}}
+
+    def in_flight(self) -> dict:
+        with self._lock:
+            return {k: self.active[k] for k in {*self.limits, *self.active}}
+
+
+admission = AdmissionController(MEMORY_BUDGET, LIMITS, DEFAULT_LIMIT, MAX_QUEUE, QUEUE_TIMEOUT)
+
+registry.register_gauge("admission_queue_depth", "Requests waiting for admission, by endpoint.",
+                        admission.queue_depth)
+registry.register_gauge("admission_in_flight", "Admitted requests running, by endpoint.", admission.in_flight)
+registry.register_gauge("admission_reserved_bytes", "Estimated memory held by admitted requests.",
+                        lambda: admission.reserved)
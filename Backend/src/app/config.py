@@ -1,3 +1,4 @@
+import os
 import yaml
 from pathlib import Path
 from pydantic_settings import BaseSettings
@@ -20,3 +21,10 @@ class Settings(BaseSettings):
 
 config_yaml = load_config()
 settings = Settings()
+
+# Where uploaded CSVs are stored (RAW_DATA_DIR env > config.yaml data.raw_dir > repo data/raw)
+RAW_DATA_DIR = Path(
+    os.getenv("RAW_DATA_DIR")
+    or config_yaml.get("data", {}).get("raw_dir")
+    or Path(__file__).resolve().parents[3] / "data" / "raw"
+)
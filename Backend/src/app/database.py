@@ -1,17 +1,43 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlmodel import SQLModel, create_engine, Session
 from .config import settings, config_yaml
+from .metrics import instrument_engine
 
 
 # Prefer .env → fallback to config.yaml SQLite
 DATABASE_URL = settings.DATABASE_URL or config_yaml["database"]["url"]
 
+DB_CONFIG = config_yaml.get("database", {})
+METRICS_ENABLED = config_yaml.get("metrics", {}).get("enabled", True)
+
+
+def pool_options(url: str):
+    """
+    Pool sizing from config.yaml (database.pool_size, max_overflow,
+    pool_timeout, pool_recycle). SQLite keeps SQLAlchemy's own pool choice.
+    """
+    options = {"pool_pre_ping": True, "pool_recycle": DB_CONFIG.get("pool_recycle", 300)}
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=DB_CONFIG.get("pool_size", 5),
+            max_overflow=DB_CONFIG.get("max_overflow", 10),
+            pool_timeout=DB_CONFIG.get("pool_timeout", 30),
+        )
+    return options
+
+
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
     echo=False,
+    **pool_options(DATABASE_URL),
 )
 
+if METRICS_ENABLED:
+    instrument_engine(engine)
+
 
 def init_db():
     SQLModel.metadata.create_all(engine)
@@ -20,3 +46,66 @@ def init_db():
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+# any constant shared by all workers; names the Postgres advisory lock
+MIGRATION_LOCK_KEY = 0x4D48_0001
+
+
+@contextmanager
+def migration_lock(bind=None):
+    """
+    Connection inside a transaction that holds a database-wide lock: a
+    transaction-scoped advisory lock on Postgres, the write lock
+    (BEGIN IMMEDIATE) on SQLite. Startup migrations inspect the schema only
+    after taking it, so workers starting together apply each step once.
+    """
+    with (bind or engine).connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        elif conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+# ---------------- async ----------------
+
+def async_url(url: str) -> str:
+    """
+    Same database through an asyncio driver: aiosqlite for SQLite, asyncpg
+    for Postgres (libpq's sslmode becomes asyncpg's ssl).
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for {backend}")
+
+
+@lru_cache(maxsize=1)
+def get_async_engine():
+    """Created on first use so the async driver is only imported when needed."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = DB_CONFIG.get("async_url") or async_url(DATABASE_URL)
+    async_engine = create_async_engine(url, echo=False, **pool_options(url))
+    if METRICS_ENABLED:
+        instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+async def get_async_session():
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,280 @@
+import gzip
+import json
+import struct
+import zlib
+
+import numpy as np
+from fastapi import Request, Response
+
+from .config import config_yaml
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+
+ENCODING_CONFIG = config_yaml.get("encoding", {})
+COMPRESS_MIN_BYTES = ENCODING_CONFIG.get("compress_min_bytes", 1024)
+GZIP_LEVEL = ENCODING_CONFIG.get("gzip_level", 6)
+BROTLI_QUALITY = ENCODING_CONFIG.get("brotli_quality", 4)
+
+JSON_TYPE = "application/json"
+PACKED_TYPE = "application/x-microhard-columns"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+PACKED_MAGIC = b"MHC1"
+
+# content types that are already compressed (or streamed by design)
+SKIP_COMPRESSION = ("application/gzip", "application/x-parquet", "application/vnd.apache.parquet",
+                    "image/", "text/event-stream")
+
+
+# ---------------- JSON ----------------
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """Serialize to JSON bytes; NumPy arrays are written without a Python-list detour."""
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+# ---------------- binary ----------------
+
+def encode_packed(columns: dict, float32: bool = False) -> bytes:
+    """
+    Compact columnar framing for numeric chart payloads:
+    MAGIC | uint32 header length | JSON header | 8-byte aligned raw buffers.
+    Arrays become little-endian buffers described in the header; every other
+    value is carried in header["meta"].
+    """
+    specs, buffers, meta = [], [], {}
+    offset = 0
+    for name, value in columns.items():
+        if isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+            arr = value.astype("<f4" if float32 and value.dtype.kind == "f" else value.dtype.newbyteorder("<"),
+                               copy=False)
+            data = np.ascontiguousarray(arr).tobytes()
+            specs.append({"name": name, "dtype": arr.dtype.str, "offset": offset, "length": len(arr)})
+            pad = -len(data) % 8
+            buffers.append(data + b"\0" * pad)
+            offset += len(data) + pad
+        else:
+            meta[name] = value
+
+    header = dumps({"columns": specs, "meta": meta})
+    header += b" " * (-(len(header) + 8) % 8)
+    return PACKED_MAGIC + struct.pack("<I", len(header)) + header + b"".join(buffers)
+
+
+def decode_packed(body: bytes) -> dict:
+    """Inverse of encode_packed (used by tests and Python clients)."""
+    if body[:4] != PACKED_MAGIC:
+        raise ValueError("not a packed columns payload")
+    (header_len,) = struct.unpack("<I", body[4:8])
+    header = json.loads(body[8:8 + header_len])
+    base = 8 + header_len
+    out = dict(header["meta"])
+    for spec in header["columns"]:
+        dtype = np.dtype(spec["dtype"])
+        start = base + spec["offset"]
+        out[spec["name"]] = np.frombuffer(body, dtype=dtype, count=spec["length"], offset=start)
+    return out
+
+
+def encode_arrow(columns: dict) -> bytes | None:
+    """Arrow IPC stream of the equal-length columns; None when pyarrow is unavailable."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    arrays = {k: v for k, v in columns.items() if isinstance(v, (np.ndarray, list))}
+    lengths = {len(v) for v in arrays.values()}
+    if len(lengths) > 1:
+        return None
+    meta = {k: json.dumps(v, default=_default) for k, v in columns.items() if k not in arrays}
+
+    table = pa.table({k: pa.array(v) for k, v in arrays.items()}).replace_schema_metadata(meta)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ---------------- negotiation ----------------
+
+def _accepted(request: Request):
+    """Media types from the Accept header, with their parameters, best first."""
+    accepted = []
+    for part in request.headers.get("accept", "").split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        opts = dict(p.split("=", 1) for p in params if "=" in p)
+        try:
+            q = float(opts.pop("q", 1))
+        except ValueError:
+            q = 1.0
+        accepted.append((q, media.lower(), opts))
+    accepted.sort(key=lambda item: -item[0])
+    return accepted
+
+
+def encoded_response(request: Request, payload, columns=None) -> Response:
+    """
+    Encode `payload` for the client. When the Accept header explicitly lists
+    the packed columns format or Arrow IPC, `columns` (defaults to payload;
+    may be a callable so it is only built when needed) is sent in that
+    binary form; otherwise the payload goes out as JSON. Wildcards never
+    select a binary format, so browsers keep getting JSON.
+    """
+    if columns is None:
+        columns = payload
+    if isinstance(columns, dict) or callable(columns):
+        for q, media, opts in _accepted(request):
+            if q <= 0:
+                continue
+            if media in (PACKED_TYPE, ARROW_TYPE) and callable(columns):
+                columns = columns()
+            if media == PACKED_TYPE:
+                float32 = opts.get("dtype") == "float32"
+                return Response(encode_packed(columns, float32=float32), media_type=PACKED_TYPE)
+            if media == ARROW_TYPE:
+                body = encode_arrow(columns)
+                if body is not None:
+                    return Response(body, media_type=ARROW_TYPE)
+            if media in (JSON_TYPE, "*/*"):
+                break
+    return Response(dumps(payload), media_type=JSON_TYPE)
+
+
+# ---------------- compression ----------------
+
+def _pick_encoding(scope):
+    accept = ""
+    for key, value in scope["headers"]:
+        if key == b"accept-encoding":
+            accept = value.decode("latin-1").lower()
+            break
+    tokens = {t.split(";")[0].strip() for t in accept.split(",")}
+    if brotli is not None and "br" in tokens:
+        return "br"
+    if "gzip" in tokens:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data)
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._c.finish()
+        return self._c.flush()
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli for responses above encoding.compress_min_bytes. Single-body
+    responses are compressed in one shot; streamed responses are compressed
+    chunk by chunk. Responses that already carry a Content-Encoding or an
+    already-compressed content type pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        encoding = _pick_encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (b"content-encoding" in headers
+                               or any(content_type.startswith(t) for t in SKIP_COMPRESSION))
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+
+            if start_message is not None and not more:
+                # whole response in one message
+                headers = [(k, v) for k, v in start_message.get("headers", [])
+                           if k != b"content-length"]
+                if len(body) >= self.minimum_size:
+                    body = compress_bytes(body, encoding)
+                    headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                headers.append((b"content-length", str(len(body)).encode()))
+                await send({**start_message, "headers": headers})
+                await send({"type": "http.response.body", "body": body})
+                start_message = None
+                return
+
+            if start_message is not None:
+                # streaming response: switch to chunked compression
+                compressor = _Compressor(encoding)
+                headers = [(k, v) for k, v in start_message.get("headers", [])
+                           if k != b"content-length"]
+                headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                await send({**start_message, "headers": headers})
+                start_message = None
+
+            chunk = compressor.compress(body)
+            if not more:
+                chunk += compressor.flush()
+            if chunk or not more:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
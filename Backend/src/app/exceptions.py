@@ -11,7 +11,7 @@ class AppException(Exception):
 
 
 async def app_exception_handler(request: Request, exc: AppException):
-    logger.error(f"[APP ERROR] {exc.message}")
+    logger.error("[APP ERROR] %s", exc.message)
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": exc.message},
@@ -19,7 +19,7 @@ async def app_exception_handler(request: Request, exc: AppException):
 
 
 async def generic_exception_handler(request: Request, exc: Exception):
-    logger.exception(f"[UNEXPECTED ERROR] {exc}")
+    logger.exception("[UNEXPECTED ERROR] %s", exc)
     return JSONResponse(
         status_code=500,
         content={"error": "Something went wrong. Please try again later."},
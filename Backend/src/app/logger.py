@@ -1,18 +1,191 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
 
+from .config import config_yaml
+
+LOG_CONFIG = config_yaml.get("logging", {})
+LEVEL = LOG_CONFIG.get("level", "INFO")
+FORMAT = LOG_CONFIG.get("format", "json")            # json | text
+MAX_BYTES = LOG_CONFIG.get("max_bytes", 10 * 2**20)
+BACKUP_COUNT = LOG_CONFIG.get("backup_count", 5)
+QUEUE_SIZE = LOG_CONFIG.get("queue_size", 10000)
+# longest rendering of a single message argument / extra field
+MAX_FIELD_CHARS = LOG_CONFIG.get("max_field_chars", 512)
+MAX_FIELD_ITEMS = LOG_CONFIG.get("max_field_items", 20)
+# route template -> fraction of INFO/DEBUG records kept; warnings always pass
+SAMPLE_RATES = LOG_CONFIG.get("sample_rates", {})
+
 LOG_DIR = Path(__file__).resolve().parents[2] / "logs"
-LOG_DIR.mkdir(exist_ok=True)
-
-log_file = LOG_DIR / "app.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ],
-)
+
+log_file = Path(LOG_CONFIG["file"]) if LOG_CONFIG.get("file") else LOG_DIR / "app.log"
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+# ASGI scope of the request being served; set by LogContextMiddleware
+current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _route(scope) -> str | None:
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
+
+
+def cap(value):
+    """Bounded rendering of a log argument: long sequences and strings are cut."""
+    if isinstance(value, (list, tuple)) and len(value) > MAX_FIELD_ITEMS:
+        value = f"{str(list(value[:MAX_FIELD_ITEMS]))[:-1]}, ... +{len(value) - MAX_FIELD_ITEMS} more]"
+    elif isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = value if isinstance(value, str) else str(value)
+    if len(text) > MAX_FIELD_CHARS:
+        # room for the suffix, so an already capped value passes unchanged
+        keep = max(0, MAX_FIELD_CHARS - 24)
+        text = f"{text[:keep]}... +{len(text) - keep} chars"
+    return text
+
+
+def _capped(record):
+    """Copy of the record with its %-args capped (every writer sees the original)."""
+    if record.args and isinstance(record.args, tuple):
+        record = logging.makeLogRecord(vars(record))
+        record.args = tuple(cap(a) for a in record.args)
+    return record
+
+
+class CappedFormatter(logging.Formatter):
+    """Text formatter whose %-args go through cap() first."""
+
+    def format(self, record):
+        return super().format(_capped(record))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request and extra fields."""
+
+    def format(self, record):
+        record = _capped(record)
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("method", "route"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = cap(value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Tags records with the current route and samples INFO/DEBUG per route."""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        scope = current_scope.get()
+        if scope is not None:
+            record.method = scope.get("method")
+            record.route = _route(scope)
+            if record.levelno < logging.WARNING:
+                rate = self.rates.get(record.route, 1.0)
+                if rate < 1.0 and random.random() >= rate:
+                    return False
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread. Like the stdlib QueueHandler it
+    renders what could change or pin memory before enqueueing — the message
+    with its (capped) args, extra fields and the traceback text — but leaves
+    timestamps and JSON/text layout to the writer thread. A full queue drops
+    the record rather than block the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        snapshot = logging.makeLogRecord(vars(record))
+        snapshot.msg = _capped(record).getMessage()
+        snapshot.args = None
+        if snapshot.exc_info:
+            snapshot.exc_text = snapshot.exc_text or self._exc_formatter.formatException(snapshot.exc_info)
+            snapshot.exc_info = None     # drop the traceback frames
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                setattr(snapshot, key, cap(value))
+        return snapshot
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-rotated file handler that creates the log directory and file on first write."""
+
+    def __init__(self, filename):
+        super().__init__(filename, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class LogContextMiddleware:
+    """Pure ASGI middleware exposing the request scope to log records."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
+
+formatter = JsonFormatter() if FORMAT == "json" else CappedFormatter(TEXT_FORMAT)
+_writers = [LazyRotatingFileHandler(log_file), logging.StreamHandler()]
+for _handler in _writers:
+    _handler.setFormatter(formatter)
+
+queue_handler = DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+queue_handler.addFilter(SamplingFilter(SAMPLE_RATES))
+listener = logging.handlers.QueueListener(queue_handler.queue, *_writers, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+logging.basicConfig(level=LEVEL, handlers=[queue_handler])
 
 logger = logging.getLogger("backend")
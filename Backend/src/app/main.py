@@ -1,18 +1,32 @@
 import os
+import threading
+import anyio
+from functools import lru_cache
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-from groq import Groq
+from sqlmodel import Session
 
 from .routes import router
 from .config import config_yaml
-from .logger import logger
+from .logger import logger, queue_handler, LogContextMiddleware
 from .exceptions import (
     AppException,
     app_exception_handler,
     generic_exception_handler,
 )
-from .database import init_db
+from .database import init_db, engine, migration_lock
+from ..services.portfolio_service import upgrade_portfolio_storage
+from ..services.raw_records import compact_legacy_raw_json, upgrade_upload_schema
+from ..services.search import ensure_search_index
+from ..services.anomalies import rebuild_stats
+from ..services.recurring import rebuild_recurring
+from ..services.backtesting import shutdown_pool
+from .utils import preload
+from .metrics import MetricsMiddleware, registry
+from .profiling import ProfilingMiddleware
+from .encoding import CompressionMiddleware
 
 
 # --------------------------------------------------
@@ -43,12 +57,51 @@ app.add_middleware(
 
 
 # --------------------------------------------------
-# Groq AI Client
+# gzip / brotli above encoding.compress_min_bytes
 # --------------------------------------------------
 
-groq_client = Groq(
-    api_key=os.getenv("GROQ_API_KEY")
-)
+app.add_middleware(CompressionMiddleware)
+
+
+# --------------------------------------------------
+# Server-Timing spans + opt-in stack profiler (app.debug)
+# --------------------------------------------------
+
+app.add_middleware(ProfilingMiddleware)
+
+
+# --------------------------------------------------
+# Metrics (per-route latency, sizes, errors, SQL time)
+# --------------------------------------------------
+# Added after profiling so it wraps it: Server-Timing can then include
+# the request's SQL time.
+
+METRICS_ENABLED = config_yaml.get("metrics", {}).get("enabled", True)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+
+# --------------------------------------------------
+# Request scope for log records (route tag + sampling)
+# --------------------------------------------------
+
+app.add_middleware(LogContextMiddleware)
+registry.register_gauge("log_records_dropped", "Log records dropped because the log queue was full.",
+                        lambda: queue_handler.dropped)
+
+
+# --------------------------------------------------
+# Groq AI Client (built on first use)
+# --------------------------------------------------
+
+@lru_cache(maxsize=1)
+def get_groq_client():
+    from groq import Groq
+
+    return Groq(
+        api_key=os.getenv("GROQ_API_KEY")
+    )
 
 
 class AIRequest(BaseModel):
@@ -58,7 +111,7 @@ class AIRequest(BaseModel):
 @app.post("/api/ask-ai")
 async def ask_ai(req: AIRequest):
     try:
-        completion = groq_client.chat.completions.create(
+        completion = get_groq_client().chat.completions.create(
             model="llama-3.1-8b-instant",
             messages=[
                 {
@@ -98,12 +151,76 @@ app.add_exception_handler(Exception, generic_exception_handler)
 # Startup
 # --------------------------------------------------
 
+# Heavy modules are imported lazily; app.warmup loads them in the
+# background after startup so the first real request doesn't pay for it.
+WARMUP_MODULES = ("pandas", "scipy.optimize", "groq")
+
+
+def warm_up():
+    try:
+        preload(*WARMUP_MODULES)
+        logger.info("Warm-up finished")
+    except Exception:
+        logger.exception("Warm-up failed")
+
+
+def compact_raw_rows():
+    try:
+        moved = compact_legacy_raw_json()
+        if moved:
+            logger.info("Compacted raw_json of %d transactions", moved)
+    except Exception:
+        logger.exception("raw_json compaction failed")
+
+
+def seed_anomaly_stats():
+    try:
+        with Session(engine) as session:
+            seen = rebuild_stats(session)
+        if seen:
+            logger.info("[ANOMALY] seeded amount stats from %d transactions", seen)
+    except Exception:
+        logger.exception("Seeding anomaly stats failed")
+
+
+def seed_recurring_series():
+    try:
+        # one worker seeds; the others wait and then find the marker
+        with migration_lock() as conn, Session(bind=conn) as session:
+            built = rebuild_recurring(session)
+        if built:
+            logger.info("[RECURRING] built %d payee series from history", built)
+    except Exception:
+        logger.exception("Building recurring series failed")
+
+
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    upgrade_portfolio_storage()
+    upgrade_upload_schema()
+    ensure_search_index()
+    threadpool_size = config_yaml["app"].get("threadpool_size")
+    if threadpool_size:
+        # sync routes and run_in_threadpool share this limiter (anyio default: 40)
+        anyio.to_thread.current_default_thread_limiter().total_tokens = int(threadpool_size)
+    if config_yaml.get("database", {}).get("compact_legacy_raw", True):
+        threading.Thread(target=compact_raw_rows, name="compact-raw", daemon=True).start()
+    # before serving: seeding reads history and would race uploads updating the same rows
+    if config_yaml.get("anomalies", {}).get("enabled", True):
+        await anyio.to_thread.run_sync(seed_anomaly_stats)
+    if config_yaml.get("recurring", {}).get("enabled", True):
+        await anyio.to_thread.run_sync(seed_recurring_series)
+    if config_yaml["app"].get("warmup", False):
+        threading.Thread(target=warm_up, name="warmup", daemon=True).start()
     logger.info("Backend started successfully")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    shutdown_pool()
+
+
 # --------------------------------------------------
 # Routes
 # --------------------------------------------------
@@ -118,3 +235,8 @@ app.include_router(router)
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
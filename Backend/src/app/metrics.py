@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable
+
+from sqlalchemy import event
+
+
+# Upper bounds (seconds) of the latency histogram; the last slot is +Inf.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """Per-request counters, reachable from any code running for that request."""
+
+    __slots__ = ("sql_statements", "db_seconds")
+
+    def __init__(self):
+        self.sql_statements = 0
+        self.db_seconds = 0.0
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class RouteStats:
+    __slots__ = ("buckets", "count", "total_seconds", "errors", "response_bytes",
+                 "sql_statements", "db_seconds")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.errors = 0
+        self.response_bytes = 0
+        self.sql_statements = 0
+        self.db_seconds = 0.0
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics. Counters are plain ints bumped from the event
+    loop thread only (the middleware runs there), so no locks are needed; SQL
+    timings are collected on the request's own RequestStats and folded in once
+    the response is finished.
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        self.in_flight = 0
+        self.gauges: dict[str, tuple[str, Callable]] = {}
+
+    def observe(self, method: str, route: str, seconds: float, status: int,
+                size: int, request: RequestStats):
+        key = (method, route)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+
+        stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        stats.count += 1
+        stats.total_seconds += seconds
+        stats.response_bytes += size
+        stats.sql_statements += request.sql_statements
+        stats.db_seconds += request.db_seconds
+        if status >= 500:
+            stats.errors += 1
+
+    def register_gauge(self, name: str, help_text: str, fn):
+        """Expose a callable returning a number (or {label: number}) as a gauge."""
+        self.gauges[name] = (help_text, fn)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        routes = sorted(self.routes.items())
+        for (method, route), stats in routes:
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += n
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.total_seconds:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+        counters = (
+            ("http_request_errors_total", "Responses with a 5xx status.", "errors", "{}"),
+            ("http_response_size_bytes_total", "Response body bytes sent.", "response_bytes", "{}"),
+            ("http_request_sql_statements_total", "SQL statements executed while serving requests.",
+             "sql_statements", "{}"),
+            ("http_request_db_seconds_total", "Time spent in SQL while serving requests.",
+             "db_seconds", "{:.6f}"),
+        )
+        for name, help_text, attr, fmt in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), stats in routes:
+                value = fmt.format(getattr(stats, attr))
+                lines.append(f'{name}{{method="{method}",route="{route}"}} {value}')
+
+        for name, (help_text, fn) in sorted(self.gauges.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            value = fn()
+            if isinstance(value, dict):
+                for label, v in sorted(value.items()):
+                    lines.append(f'{name}{{route="{label}"}} {v}')
+            else:
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, size and errors per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestStats()
+        token = current_request.set(request)
+        registry.in_flight += 1
+        start = perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            route = getattr(scope.get("route"), "path", "unmatched")
+            registry.observe(scope["method"], route, perf_counter() - start, status, size, request)
+            current_request.reset(token)
+
+
+# ---------------- SQLAlchemy hooks ----------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    request = current_request.get()
+    if request is None:
+        return
+    request.sql_statements += 1
+    request.db_seconds += perf_counter() - context._metrics_start
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,194 @@
+import hmac
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from time import perf_counter
+
+from .config import config_yaml
+from .logger import logger
+from .metrics import current_request
+
+
+PROFILING_CONFIG = config_yaml.get("profiling", {})
+DEBUG = bool(config_yaml["app"].get("debug", False))
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_DIR = Path(PROFILING_CONFIG.get("dir", Path(__file__).resolve().parents[2] / "profiles"))
+SAMPLE_INTERVAL = PROFILING_CONFIG.get("interval_ms", 2) / 1000.0
+PROFILED_ROUTES = set(PROFILING_CONFIG.get("routes", []))
+SERVER_TIMING = PROFILING_CONFIG.get("server_timing", True)
+# X-Profile must carry this token; without one only profiling.routes are sampled
+PROFILE_TOKEN = str(PROFILING_CONFIG.get("token") or "")
+MAX_FILES = PROFILING_CONFIG.get("max_files", 50)
+MAX_FILE_BYTES = PROFILING_CONFIG.get("max_file_bytes", 2**20)
+MAX_CONCURRENT = PROFILING_CONFIG.get("max_concurrent", 2)
+
+# Leaf frames of threads that are parked waiting for work, not doing any.
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+
+# ---------------- named timing spans ----------------
+
+current_spans: ContextVar[list | None] = ContextVar("current_spans", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block and report it in the Server-Timing header of the current request."""
+    spans = current_spans.get()
+    if spans is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, perf_counter() - start))
+
+
+def server_timing_header(spans, total: float) -> bytes:
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in spans]
+    request = current_request.get()
+    if request is not None and request.sql_statements:
+        parts.append(f'db;desc="{request.sql_statements} queries";dur={request.db_seconds * 1000:.2f}')
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode()
+
+
+# ---------------- stack sampling ----------------
+
+class StackSampler(threading.Thread):
+    """
+    Samples the Python stacks of all other threads at a fixed interval and
+    counts them in folded format ("a;b;c 42"), the input format of
+    flamegraph.pl, speedscope and inferno. Threads parked in the event loop
+    selector or waiting on the worker queue are skipped.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, path: Path, max_bytes: int = MAX_FILE_BYTES):
+        """Folded stacks, hottest first, cut off once the file reaches max_bytes."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                line = f"{stack} {count}\n"
+                written += len(line.encode())
+                if written > max_bytes:
+                    break
+                f.write(line)
+
+
+def _wants_profile(scope) -> bool:
+    if not DEBUG:
+        return False
+    if scope["path"] in PROFILED_ROUTES:
+        return True
+    if not PROFILE_TOKEN:
+        return False
+    return any(
+        k == PROFILE_HEADER and hmac.compare_digest(v, PROFILE_TOKEN.encode())
+        for k, v in scope["headers"]
+    )
+
+
+_active = threading.BoundedSemaphore(MAX_CONCURRENT)
+_sequence = itertools.count()
+
+
+def _prune(directory: Path, keep: int = MAX_FILES):
+    """Delete the oldest profiles beyond the newest `keep`."""
+    files = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[keep:]:
+        old.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Adds a Server-Timing header built from span() timings, and — when
+    app.debug is on and the request carries X-Profile: <profiling.token> or
+    hits a route listed in profiling.routes — samples stacks for the duration
+    of the request and stores them under profiles/ as a folded flamegraph
+    file. At most profiling.max_concurrent requests are sampled at once and
+    only the newest profiling.max_files profiles are kept.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans = []
+        token = current_spans.set(spans)
+        start = perf_counter()
+        sampler = None
+        profile_name = None
+        if _wants_profile(scope) and _active.acquire(blocking=False):
+            sampler = StackSampler()
+            sampler.start()
+            slug = scope["path"].strip("/").replace("/", "_") or "root"
+            profile_name = (f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence)}"
+                            f"-{scope['method'].lower()}-{slug}.folded")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if SERVER_TIMING:
+                    headers.append((b"server-timing", server_timing_header(spans, perf_counter() - start)))
+                if profile_name:
+                    headers.append((b"x-profile-file", profile_name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_spans.reset(token)
+            if sampler is not None:
+                try:
+                    sampler.stop()
+                    sampler.write(PROFILE_DIR / profile_name)
+                    _prune(PROFILE_DIR)
+                finally:
+                    _active.release()
+                logger.info("[PROFILE] %s %s -> %s (%d samples)", scope["method"], scope["path"],
+                            profile_name, sum(sampler.samples.values()))
@@ -1,31 +1,55 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from pydantic import BaseModel
-from pathlib import Path
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Literal
 from io import StringIO
-import pandas as pd
-
-from .config import config_yaml
+import datetime as dt
+from sqlmodel import select
+from starlette.concurrency import run_in_threadpool
+import numpy as np
+
+from .config import config_yaml, RAW_DATA_DIR
+from .utils import lazy_import
+from .profiling import span
+from .encoding import encoded_response
+from .admission import admission, monte_carlo_cost, upload_cost, optimize_cost
 from .logger import logger
 
 from ..pipelines.predict_pipeline import (
     run_forecast_pipeline,
+    run_batch_forecast_pipeline,
     run_monte_carlo_pipeline,
+    run_goal_seek_pipeline,
 )
 
 from ..services.portfolio_optimizer import optimize_portfolio
-from ..services.portfolio_service import save_portfolio, get_portfolios
+from ..services.portfolio_service import save_portfolio, get_portfolios, latest_portfolio
 from ..services.ingestion import normalize_and_save, detect_column_types
 from ..services.analytics import (
     totals_by_category,
     income_expense_over_time,
     volatility,
     net_worth_timeseries,
+    portfolio_risk,
+)
+from ..services.backtesting import run_backtest, REBALANCE_RULES
+from ..services.stress import run_stress_test
+from ..services.raw_records import schema_id_for, save_raw_rows, raw_record
+from ..services.search import search_transactions
+from ..services.anomalies import record_anomalies, list_anomalies
+from ..services.recurring import update_recurring, list_recurring
+from ..services.datasets import describe, read_column, invalidate
+from ..services.export import (
+    TRANSACTION_FIELDS, MEDIA_TYPES, transactions_query, export_transactions, parquet_available,
 )
-from ..services.score import financial_confidence_score
+from ..services.score import financial_confidence_score, score_history
+from ..services.category_forecast import forecast_by_group
 from ..services.auth import authenticate, create_access_token, get_current_user
 
 from ..models.transaction import Transaction
-from .database import get_session
+from .database import get_session, get_async_session
+
+pd = lazy_import("pandas")
 
 
 # ---------------- ROOT ROUTER ----------------
@@ -54,39 +78,125 @@ class ForecastRequest(BaseModel):
 @router.post("/forecast")
 def forecast_endpoint(req: ForecastRequest):
     steps = req.steps or config_yaml["forecasting"]["default_steps"]
-    logger.info(f"[FORECAST] values={req.values} steps={steps}")
+    logger.info("[FORECAST] n=%d steps=%d", len(req.values), steps)
     result = run_forecast_pipeline(req.values, steps)
     return {"forecast": result}
 
 
+MAX_FORECAST_STEPS = 120
+
+
+class BatchForecastRequest(BaseModel):
+    series: dict[str, list[float]]
+    steps: int | None = Field(None, ge=1, le=MAX_FORECAST_STEPS)
+    model: Literal["linear", "holt_winters"] = "linear"
+    interval: float = Field(0.95, gt=0, lt=1)
+    season_length: int = Field(12, ge=0)   # 0: no seasonality
+
+
+@router.post("/forecast/batch")
+def batch_forecast_endpoint(req: BatchForecastRequest):
+    steps = req.steps or config_yaml["forecasting"]["default_steps"]
+    result = run_batch_forecast_pipeline(
+        req.series,
+        steps,
+        model=req.model,
+        interval=req.interval,
+        season_length=req.season_length,
+    )
+    return {"model": req.model, "steps": steps, "interval": req.interval, "forecasts": result}
+
+
+@router.get("/forecast/categories")
+def category_forecast_endpoint(
+    steps: int | None = Query(None, ge=1, le=MAX_FORECAST_STEPS),
+    group_by: Literal["category", "account"] = "category",
+    model: Literal["linear", "holt_winters"] = "linear",
+    interval: float = Query(0.95, gt=0, lt=1),
+    session=Depends(get_session),
+    user: dict = Depends(get_current_user),
+):
+    steps = steps or config_yaml["forecasting"]["default_steps"]
+    return forecast_by_group(session, steps, group_by=group_by, model=model, interval=interval)
+
+
 # ------------- MONTE CARLO -------------------
+# hard caps; admission's memory budget still rejects large products of the two
+MAX_YEARS = 100
+MAX_PATHS = 100_000
+
+
 class MonteCarloRequest(BaseModel):
     initial: float
     monthly: float
     mean: float
     std: float
-    years: int
-    paths: int | None = None
+    years: int = Field(..., ge=1, le=MAX_YEARS)
+    paths: int | None = Field(None, ge=1, le=MAX_PATHS)
     goal_target: float | None = None
     early_setback: bool = False
+    seed: int | None = None   # reuse common random numbers + result cache
 
 
+# Admitted routes are async so a queued request waits on the event loop,
+# not on a threadpool thread; the work itself runs in the threadpool.
 @router.post("/monte-carlo")
-def monte_carlo_endpoint(req: MonteCarloRequest):
+async def monte_carlo_endpoint(req: MonteCarloRequest, request: Request):
     used_paths = req.paths or 100
 
-    result = run_monte_carlo_pipeline(
-        req.initial,
-        req.monthly,
-        req.mean,
-        req.std,
-        req.years,
-        paths=used_paths,
-        goal_target=req.goal_target,
-        early_setback=req.early_setback,
-    )
-
-    return result
+    async with admission.admit_async("monte_carlo", monte_carlo_cost(used_paths, req.years)):
+        result = await run_in_threadpool(
+            run_monte_carlo_pipeline,
+            req.initial,
+            req.monthly,
+            req.mean,
+            req.std,
+            req.years,
+            paths=used_paths,
+            goal_target=req.goal_target,
+            early_setback=req.early_setback,
+            seed=req.seed,
+        )
+
+    # serializing thousands of paths is CPU work too
+    return await run_in_threadpool(encoded_response, request, result)
+
+
+class GoalSeekRequest(BaseModel):
+    solve_for: Literal["monthly", "initial", "years"] = "monthly"
+    goal_target: float
+    probability: float = Field(0.8, gt=0, le=1)
+    initial: float = 0.0
+    monthly: float = 0.0
+    mean: float
+    std: float
+    years: int = Field(10, ge=1, le=MAX_YEARS)
+    paths: int | None = Field(None, ge=1, le=MAX_PATHS)
+    early_setback: bool = False
+    seed: int | None = None
+    max_years: int = Field(60, ge=1, le=MAX_YEARS)
+
+
+@router.post("/monte-carlo/goal")
+async def goal_seek_endpoint(req: GoalSeekRequest):
+    paths = req.paths or 1000
+    horizon = req.max_years if req.solve_for == "years" else req.years
+    async with admission.admit_async("monte_carlo", monte_carlo_cost(paths, horizon)):
+        return await run_in_threadpool(
+            run_goal_seek_pipeline,
+            req.solve_for,
+            req.goal_target,
+            req.probability,
+            req.initial,
+            req.monthly,
+            req.mean,
+            req.std,
+            req.years,
+            paths=paths,
+            early_setback=req.early_setback,
+            seed=req.seed,
+            max_years=req.max_years,
+        )
 
 
 # ------------- OPTIMIZER ---------------------
@@ -96,9 +206,10 @@ class OptimizeRequest(BaseModel):
 
 
 @router.post("/optimize")
-def optimize_endpoint(req: OptimizeRequest, user: dict = Depends(get_current_user)):
-    logger.info(f"[OPTIMIZE] assets={req.assets}")
-    result = optimize_portfolio(req.assets, req.returns)
+async def optimize_endpoint(req: OptimizeRequest, user: dict = Depends(get_current_user)):
+    logger.info("[OPTIMIZE] assets=%s", req.assets)
+    async with admission.admit_async("optimize", optimize_cost(len(req.assets))):
+        result = await run_in_threadpool(optimize_portfolio, req.assets, req.returns)
     return {"weights": result}
 
 
@@ -116,21 +227,38 @@ class SavePortfolioRequest(BaseModel):
 
 
 @router.post("/save-portfolio")
-def save_portfolio_endpoint(req: SavePortfolioRequest, user: dict = Depends(get_current_user)):
-    weights = optimize_portfolio(req.assets, req.returns)
-    portfolio = save_portfolio(req.name, req.assets, weights)
+async def save_portfolio_endpoint(req: SavePortfolioRequest, user: dict = Depends(get_current_user)):
+    async with admission.admit_async("optimize", optimize_cost(len(req.assets))):
+        weights = await run_in_threadpool(optimize_portfolio, req.assets, req.returns)
+    portfolio = await run_in_threadpool(save_portfolio, req.name, req.assets, weights)
     return {"id": portfolio.id, "weights": weights}
 
 
 @router.get("/portfolios")
-def list_portfolios(user: dict = Depends(get_current_user)):
-    return get_portfolios()
+def list_portfolios(
+    limit: int = Query(50, ge=1, le=500),
+    before_id: int | None = None,
+    user: dict = Depends(get_current_user),
+):
+    items = get_portfolios(limit=limit, before_id=before_id)
+    return {
+        "items": items,
+        "next_before_id": items[-1]["id"] if len(items) == limit else None,
+    }
+
+
+@router.get("/portfolios/latest")
+def get_latest_portfolio(user: dict = Depends(get_current_user)):
+    portfolio = latest_portfolio()
+    if portfolio is None:
+        raise HTTPException(status_code=404, detail="No saved portfolios")
+    return portfolio
 
 
 # ------------- UPLOADS LIST ---
 @router.get("/uploads")
 def list_uploads():
-    raw_dir = Path(__file__).resolve().parents[3] / "data" / "raw"
+    raw_dir = RAW_DATA_DIR
     if not raw_dir.exists():
         return {"files": []}
     
@@ -148,17 +276,17 @@ def list_uploads():
 # ------------- GET UPLOADED FILE COLUMNS ---
 @router.get("/uploads/{filename}/columns")
 def get_file_columns(filename: str):
-    raw_dir = Path(__file__).resolve().parents[3] / "data" / "raw"
+    raw_dir = RAW_DATA_DIR
     file_path = raw_dir / filename
     
     if not file_path.exists():
         return {"error": "File not found", "columns": [], "rows": 0}
     
     try:
-        df = pd.read_csv(file_path)
+        columns, rows = describe(file_path)
         return {
-            "columns": list(df.columns),
-            "rows": len(df)
+            "columns": columns,
+            "rows": rows
         }
     except Exception as e:
         return {"error": str(e), "columns": [], "rows": 0}
@@ -166,47 +294,85 @@ def get_file_columns(filename: str):
 
 # ------------- GET TRANSACTIONS ---
 @router.get("/transactions")
-def get_transactions(session=Depends(get_session), user: dict = Depends(get_current_user)):
+async def get_transactions(
+    request: Request,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+    category: str | None = None,
+    type: str | None = None,
+    account: str | None = None,
+    session=Depends(get_async_session),
+    user: dict = Depends(get_current_user),
+):
     """Get all transactions from database"""
     try:
-        transactions = session.query(Transaction).all()
-        result = []
-        for tx in transactions:
-            result.append({
-                "id": tx.id,
-                "date": tx.date.isoformat() if tx.date else None,
-                "amount": tx.amount,
-                "description": tx.description,
-                "category": tx.category,
-                "type": tx.type,
-                "merchant": tx.merchant,
-                "account": tx.account,
-            })
-        return result
+        fields = TRANSACTION_FIELDS
+        statement = transactions_query(start, end, category, tx_type=type, account=account)
+        rows = (await session.exec(statement)).all()
+        result = [dict(zip(fields, row)) for row in rows]
+
+        def columns():
+            # columnar view for binary clients: numeric columns packed, text in meta
+            cols = {f: [row[i] for row in rows] for i, f in enumerate(fields)}
+            cols["id"] = np.array(cols["id"], dtype=np.int64)
+            cols["amount"] = np.array(cols["amount"], dtype=float)
+            cols["date"] = [d.isoformat() if d else None for d in cols["date"]]
+            return cols
+
+        return encoded_response(request, result, columns=columns)
     except Exception as e:
-        logger.error(f"Error fetching transactions: {e}")
+        logger.error("Error fetching transactions: %s", e)
         return {"error": str(e)}
 
 
+# ------------- EXPORT TRANSACTIONS ---
+@router.get("/transactions/export")
+def export_transactions_file(
+    format: Literal["csv", "parquet"] = "csv",
+    gzip: bool = False,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+    category: str | None = None,
+    type: str | None = None,
+    account: str | None = None,
+    user: dict = Depends(get_current_user),
+):
+    """Stream transactions (same filters as GET /transactions) as CSV or Parquet."""
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed")
+
+    statement = transactions_query(start, end, category, tx_type=type, account=account)
+    filename = f"transactions.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip and format == "csv":
+        filename += ".gz"
+        media_type = "application/gzip"
+    # a sync generator: Starlette pulls each batch in the threadpool
+    return StreamingResponse(
+        export_transactions(statement, fmt=format, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # ------------- GET COLUMN VALUES ---
 @router.get("/uploads/{filename}/column")
-def get_column_values(filename: str, name: str):
-    raw_dir = Path(__file__).resolve().parents[3] / "data" / "raw"
+def get_column_values(filename: str, name: str, request: Request):
+    raw_dir = RAW_DATA_DIR
     file_path = raw_dir / filename
     
     if not file_path.exists():
         return {"error": "File not found", "values": []}
     
     try:
-        df = pd.read_csv(file_path)
-        if name not in df.columns:
+        col = read_column(file_path, name)
+        if col is None:
             return {"error": "Column not found", "values": []}
         
         # Return values based on column dtype: numeric columns -> floats; others -> raw strings
-        col = df[name].dropna()
+        col = col.dropna()
         if pd.api.types.is_numeric_dtype(col):
-            numeric_values = [float(v) for v in col.tolist()]
-            return {"values": numeric_values}
+            return encoded_response(request, {"values": col.to_numpy(dtype=float)})
         else:
             raw_values = [str(v) for v in col.tolist()]
             return {"values": raw_values}
@@ -215,41 +381,51 @@ def get_column_values(filename: str, name: str):
 
 
 # ------------- FILE UPLOAD (DB INGESTION) ---
-@router.post("/upload")
-async def upload_file(file: UploadFile = File(...), session=Depends(get_session), user: dict = Depends(get_current_user)):
-    content = await file.read()
-
-    raw_dir = Path(__file__).resolve().parents[3] / "data" / "raw"
-    raw_dir.mkdir(parents=True, exist_ok=True)
-
-    save_path = raw_dir / file.filename
+def _save_upload(save_path, content: bytes):
+    save_path.parent.mkdir(parents=True, exist_ok=True)
     with open(save_path, "wb") as f:
         f.write(content)
+    invalidate(save_path)
 
-    df = pd.read_csv(StringIO(content.decode()))
 
-    # Detect column types
-    detected_fields = detect_column_types(df)
+def _parse_upload(content: bytes):
+    with span("upload_parse"):
+        return pd.read_csv(StringIO(content.decode()))
+
+
+@router.post("/upload")
+async def upload_file(file: UploadFile = File(...), session=Depends(get_session), user: dict = Depends(get_current_user)):
+    # parsing + ingestion hold roughly upload_bytes_factor x the file size
+    async with admission.admit_async("upload", upload_cost(file.size or 0)):
+        content = await file.read()
+
+        # disk writes, parsing and the (sync) ingestion run off the event loop
+        save_path = RAW_DATA_DIR / file.filename
+        await run_in_threadpool(_save_upload, save_path, content)
+        df = await run_in_threadpool(_parse_upload, content)
+
+        # Detect column types
+        detected_fields = detect_column_types(df)
     
-    # Check if this is a portfolio returns file (date + multiple numeric columns, no amount)
-    columns_lower = [c.lower() for c in df.columns]
-    has_date = any('date' in c for c in columns_lower)
-    has_amount = any(c in ['amount', 'value', 'debit', 'credit', 'transaction amount'] for c in columns_lower)
+        # Check if this is a portfolio returns file (date + multiple numeric columns, no amount)
+        columns_lower = [c.lower() for c in df.columns]
+        has_date = any('date' in c for c in columns_lower)
+        has_amount = any(c in ['amount', 'value', 'debit', 'credit', 'transaction amount'] for c in columns_lower)
     
-    # If has date but no amount column, treat as portfolio returns file
-    is_portfolio_file = has_date and not has_amount and len(df.columns) >= 3
+        # If has date but no amount column, treat as portfolio returns file
+        is_portfolio_file = has_date and not has_amount and len(df.columns) >= 3
     
-    imported = 0
-    file_type = "portfolio" if is_portfolio_file else "transactions"
+        imported = 0
+        file_type = "portfolio" if is_portfolio_file else "transactions"
     
-    if not is_portfolio_file:
-        # Only import to database if it's transaction data
-        try:
-            imported = normalize_and_save(df, session)
-        except ValueError as e:
-            # If it fails, might be portfolio data after all
-            file_type = "portfolio"
-            logger.warning(f"File doesn't match transaction format: {e}")
+        if not is_portfolio_file:
+            # Only import to database if it's transaction data
+            try:
+                imported = await run_in_threadpool(normalize_and_save, df, session, source=file.filename)
+            except ValueError as e:
+                # If it fails, might be portfolio data after all
+                file_type = "portfolio"
+                logger.warning("File doesn't match transaction format: %s", e)
 
     # Return sample data for frontend processing
     sample = df.head(10).to_dict('records') if len(df) > 0 else []
@@ -268,7 +444,7 @@ async def upload_file(file: UploadFile = File(...), session=Depends(get_session)
 
 # ------------- TRANSACTIONS ------------------
 class TransactionIn(BaseModel):
-    date: str
+    date: dt.date   # ISO string on the wire
     amount: float
     category: str | None = None
     merchant: str | None = None
@@ -279,17 +455,74 @@ class TransactionIn(BaseModel):
 
 
 @router.post("/transactions")
-def add_transaction(req: TransactionIn, session=Depends(get_session), user: dict = Depends(get_current_user)):
-    tx = Transaction(
-        **req.model_dump(exclude={"raw_json"}),
-        raw_json=(None if req.raw_json is None else str(req.raw_json)),
-    )
+async def add_transaction(req: TransactionIn, session=Depends(get_async_session), user: dict = Depends(get_current_user)):
+    tx = Transaction(**req.model_dump(exclude={"raw_json"}))
     session.add(tx)
-    session.commit()
-    session.refresh(tx)
+    await session.flush()
+
+    def after_insert(sync_session):
+        if req.raw_json is not None:
+            schema_id = schema_id_for(sync_session, list(req.raw_json), source="manual")
+            save_raw_rows(sync_session, schema_id, [tx.id], [list(req.raw_json.values())])
+        record_anomalies(sync_session, [tx])
+        update_recurring(sync_session, [tx])
+
+    await session.run_sync(after_insert)
+    await session.commit()
+    await session.refresh(tx)
     return tx
 
 
+@router.get("/transactions/search")
+async def api_search_transactions(
+    q: str,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+    category: str | None = None,
+    match: Literal["all", "any"] = "all",
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    session=Depends(get_async_session),
+    user: dict = Depends(get_current_user),
+):
+    results = await session.run_sync(
+        search_transactions, q, start=start, end=end, category=category,
+        match_all=(match == "all"), limit=limit, offset=offset,
+    )
+    return {"query": q, "count": len(results), "results": results}
+
+
+@router.get("/anomalies")
+async def get_anomalies(
+    limit: int = Query(100, ge=1, le=1000),
+    category: str | None = None,
+    min_score: float = Query(0.0, ge=0),
+    session=Depends(get_async_session),
+    user: dict = Depends(get_current_user),
+):
+    anomalies = await session.run_sync(list_anomalies, limit=limit, category=category, min_score=min_score)
+    return {"count": len(anomalies), "anomalies": anomalies}
+
+
+@router.get("/recurring")
+async def get_recurring(
+    include_all: bool = False,
+    limit: int = Query(200, ge=1, le=2000),
+    session=Depends(get_async_session),
+    user: dict = Depends(get_current_user),
+):
+    series = await session.run_sync(list_recurring, include_all=include_all, limit=limit)
+    return {"count": len(series), "series": series}
+
+
+@router.get("/transactions/{transaction_id}/raw")
+async def get_transaction_raw(transaction_id: int, session=Depends(get_async_session), user: dict = Depends(get_current_user)):
+    record = await session.run_sync(raw_record, transaction_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="No source record for this transaction")
+    return record
+
+
 # ------------- ANALYTICS ---------------------
 @router.get("/analytics/categories")
 def api_totals_by_category(session=Depends(get_session), user: dict = Depends(get_current_user)):
@@ -311,7 +544,94 @@ def api_networth(initial: float = 100000.0, session=Depends(get_session), user:
     return net_worth_timeseries(session, initial)
 
 
+# ------------- RISK --------------------------
+@router.get("/risk")
+def api_risk(
+    request: Request,
+    windows: str = "21,63,252",
+    levels: str = "0.95,0.99",
+    user: dict = Depends(get_current_user),
+):
+    try:
+        window_list = tuple(int(w) for w in windows.split(","))
+        level_list = tuple(float(x) for x in levels.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="windows and levels must be comma-separated numbers")
+    if not all(w >= 2 for w in window_list):
+        raise HTTPException(status_code=422, detail="windows must be at least 2 days")
+    if not all(0 < x < 1 for x in level_list):
+        raise HTTPException(status_code=422, detail="levels must be between 0 and 1 (exclusive)")
+    return encoded_response(request, portfolio_risk(window_list, level_list))
+
+
+# ------------- BACKTEST ----------------------
+class BacktestRequest(BaseModel):
+    rules: list[Literal["none", "monthly", "quarterly", "threshold"]] = list(REBALANCE_RULES)
+    threshold: float = Field(0.05, gt=0, lt=1)
+    optimize_rules: list[Literal["monthly", "quarterly"]] = ["quarterly"]
+    lookback: int = Field(252, ge=21)
+    cost_bps: float = Field(0.0, ge=0)
+    portfolio_ids: list[int] | None = None
+
+
+@router.post("/backtest")
+def api_backtest(req: BacktestRequest, request: Request, user: dict = Depends(get_current_user)):
+    result = run_backtest(
+        rules=req.rules,
+        threshold=req.threshold,
+        optimize_rules=req.optimize_rules,
+        lookback=req.lookback,
+        cost_bps=req.cost_bps,
+        portfolio_ids=req.portfolio_ids,
+    )
+    return encoded_response(request, result, columns=result.get("equity"))
+
+
+# ------------- STRESS TEST -------------------
+class StressRequest(BaseModel):
+    historical: dict[str, tuple[str, str]] | None = None       # name -> (start, end), ISO dates
+    hypothetical: dict[str, dict[str, float]] | None = None    # name -> {asset: total return}
+    include_presets: bool = True
+    portfolio_ids: list[int] | None = None
+    value: float | None = None                                # also report impacts in currency
+
+
+@router.post("/stress")
+def api_stress(req: StressRequest, request: Request, user: dict = Depends(get_current_user)):
+    try:
+        result = run_stress_test(
+            historical=req.historical,
+            hypothetical=req.hypothetical,
+            include_presets=req.include_presets,
+            portfolio_ids=req.portfolio_ids,
+            value=req.value,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid scenario: {e}")
+
+    def columns():
+        ids = np.array([p["id"] for p in result["portfolios"]])
+        return {"portfolio_id": ids, **{s["name"]: result["impact"][:, k] for k, s in enumerate(result["scenarios"])}}
+
+    return encoded_response(request, result, columns=columns)
+
+
 # ------------- SCORE ------------------------
 @router.get("/score")
 def api_score(session=Depends(get_session), user: dict = Depends(get_current_user)):
     return financial_confidence_score(session)
+
+
+@router.get("/score/history")
+def api_score_history(
+    request: Request,
+    window: int | None = Query(None, ge=1, le=600),
+    session=Depends(get_session),
+    user: dict = Depends(get_current_user),
+):
+    """Monthly score timeline; expanding over all history unless `window` (months) is set."""
+    history = score_history(session, window=window)
+    return encoded_response(
+        request, history,
+        columns=lambda: {k: v for k, v in history.items() if k != "reasons"},
+    )
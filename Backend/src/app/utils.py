@@ -0,0 +1,96 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access, then
+    copies its namespace so later lookups are plain attribute hits. The
+    import itself goes through import_module, whose per-module import lock
+    makes concurrent first use (request threads racing the warm-up thread)
+    wait for a fully initialized module; importlib's LazyLoader only gained
+    such a lock in Python 3.12.
+    """
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str):
+    """
+    Return a module that is only executed on first attribute access.
+    Keeps heavy dependencies (pandas, scipy, groq) out of API cold start.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return _LazyModule(name)
+
+
+def preload(*names: str):
+    """Import lazily imported modules ahead of first use (used by the startup warm-up)."""
+    for name in names:
+        importlib.import_module(name)
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU keyed on hashable tuples, bounded by entry count
+    and, optionally, by total size via `sizeof(value)` (e.g. array nbytes).
+    """
+
+    def __init__(self, max_items: int = 128, max_bytes: int | None = None, sizeof=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.total_bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.total_bytes += size
+            while len(self._data) > self.max_items or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.total_bytes -= evicted
+        return value
+
+    def discard(self, predicate):
+        """Drop every entry whose key satisfies `predicate`."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                self.total_bytes -= self._data.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,37 @@
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from typing import Optional
+from datetime import datetime, timezone
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class AmountStats(SQLModel, table=True):
+    """Running amount statistics for one (category, merchant) group."""
+    __tablename__ = "amount_stats"
+    __table_args__ = (UniqueConstraint("category", "merchant"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    category: str = ""
+    merchant: str = ""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0          # Welford sum of squared deviations
+    median: float = 0.0      # streaming estimates, see services/anomalies.py
+    mad: float = 0.0
+    updated_at: datetime = Field(default_factory=_utcnow)
+
+
+class TransactionAnomaly(SQLModel, table=True):
+    __tablename__ = "transaction_anomaly"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    transaction_id: int = Field(foreign_key="transaction.id", index=True)
+    category: str = ""
+    merchant: str = ""
+    amount: float
+    expected: float          # group median at the time the row arrived
+    z_score: float
+    robust_z: float
+    created_at: datetime = Field(default_factory=_utcnow, index=True)
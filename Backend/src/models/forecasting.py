@@ -1,18 +1,187 @@
-from sklearn.linear_model import LinearRegression
+from statistics import NormalDist
 import numpy as np
 
 
-def linear_forecast(values: list[float], steps: int):
-    if len(values) < 2:
-        return values[-1:] * steps if values else []
+# Coarse smoothing grid evaluated for every series in one batched pass.
+HW_ALPHAS = (0.1, 0.3, 0.5, 0.8)
+HW_BETAS = (0.01, 0.1, 0.3)
+HW_GAMMAS = (0.05, 0.2)
+
+
+def _z_score(interval: float) -> float:
+    return NormalDist().inv_cdf(0.5 + interval / 2)
+
+
+def batch_linear_forecast(Y: np.ndarray, steps: int, interval: float = 0.95):
+    """
+    Closed-form least-squares trend fit for every row of Y at once.
+    Y is (k series, n points); returns (forecast, lower, upper), each (k, steps).
+    """
+    Y = np.asarray(Y, dtype=float)
+    k, n = Y.shape
+
+    t = np.arange(n, dtype=float)
+    t_mean = t.mean()
+    t_dev = t - t_mean
+    sxx = float(t_dev @ t_dev)
+
+    y_mean = Y.mean(axis=1)
+    slope = (Y - y_mean[:, None]) @ t_dev / sxx
+    intercept = y_mean - slope * t_mean
+
+    future_t = np.arange(n, n + steps, dtype=float)
+    preds = intercept[:, None] + slope[:, None] * future_t
+
+    if n > 2:
+        fitted = intercept[:, None] + slope[:, None] * t
+        sigma = np.sqrt(((Y - fitted) ** 2).sum(axis=1) / (n - 2))
+    else:
+        sigma = np.zeros(k)
+
+    spread = np.sqrt(1.0 + 1.0 / n + (future_t - t_mean) ** 2 / sxx)
+    half = _z_score(interval) * sigma[:, None] * spread
+    return preds, preds - half, preds + half
+
+
+def _holt_winters_pass(Y, season_length, alpha, beta, gamma, phi):
+    """
+    One additive damped-trend Holt-Winters pass over every row of Y.
+    alpha/beta/gamma/phi are per-row arrays so a parameter grid can be
+    stacked into the batch. Returns final states and in-sample SSE.
+    """
+    k, n = Y.shape
+    m = season_length
+
+    if m:
+        first = Y[:, :m].mean(axis=1)
+        trend = (Y[:, m:2 * m].mean(axis=1) - first) / m
+        # de-trend the first season around its midpoint, then roll the
+        # level forward to the last point of that season
+        offsets = np.arange(m) - (m - 1) / 2
+        season = Y[:, :m] - (first[:, None] + trend[:, None] * offsets)
+        level = first + trend * (m - 1) / 2
+        start = m
+    else:
+        level = Y[:, 0].copy()
+        trend = Y[:, 1] - Y[:, 0]
+        season = np.zeros((k, 1))
+        start = 1
+
+    sse = np.zeros(k)
+    for t in range(start, n):
+        y = Y[:, t]
+        s = season[:, t % m] if m else 0.0
+        damped = phi * trend
+        err = y - (level + damped + s)
+        sse += err * err
+
+        new_level = alpha * (y - s) + (1 - alpha) * (level + damped)
+        trend = beta * (new_level - level) + (1 - beta) * damped
+        if m:
+            season[:, t % m] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+
+    return level, trend, season, sse, n - start
 
-    X = np.arange(len(values)).reshape(-1, 1)
-    y = np.array(values)
 
-    model = LinearRegression()
-    model.fit(X, y)
+def batch_holt_winters_forecast(
+    Y: np.ndarray,
+    steps: int,
+    season_length: int = 12,
+    phi: float = 0.98,
+    interval: float = 0.95,
+):
+    """
+    Additive Holt-Winters with a damped trend, fitted for every row of Y in
+    one vectorized recursion. Smoothing parameters are picked per series from
+    a small grid by stacking all grid points into the same batch.
+    Seasonality is dropped when there are fewer than two full seasons.
+    """
+    Y = np.asarray(Y, dtype=float)
+    k, n = Y.shape
+    m = season_length if season_length and n >= 2 * season_length else 0
 
-    future_X = np.arange(len(values), len(values) + steps).reshape(-1, 1)
-    preds = model.predict(future_X)
+    grid = np.array(
+        [(a, b, g) for a in HW_ALPHAS for b in HW_BETAS for g in (HW_GAMMAS if m else (0.0,))]
+    )
+    g = len(grid)
+
+    # rows are ordered [grid point 0 for every series, grid point 1 ..., ...]
+    stacked = np.tile(Y, (g, 1))
+    alpha = np.repeat(grid[:, 0], k)
+    beta = np.repeat(grid[:, 1], k)
+    gamma = np.repeat(grid[:, 2], k)
+    phis = np.full(g * k, phi)
+
+    level, trend, season, sse, fitted_n = _holt_winters_pass(stacked, m, alpha, beta, gamma, phis)
+
+    best = sse.reshape(g, k).argmin(axis=0)
+    rows = best * k + np.arange(k)
+    level, trend, season, sse = level[rows], trend[rows], season[rows], sse[rows]
+    alpha, beta = alpha[rows], beta[rows]
+
+    h = np.arange(1, steps + 1)
+    phi_sums = np.cumsum(phi ** h)
+    preds = level[:, None] + trend[:, None] * phi_sums
+    if m:
+        preds += season[:, (n + h - 1) % m]
+
+    # ETS(A,Ad,N) forecast variance; the seasonal term is ignored.
+    sigma = np.sqrt(sse / max(fitted_n, 1))
+    c = alpha[:, None] * (1 + beta[:, None] * phi_sums[None, :-1]) if steps > 1 else np.zeros((k, 0))
+    var_factor = 1 + np.concatenate([np.zeros((k, 1)), np.cumsum(c ** 2, axis=1)], axis=1)
+    half = _z_score(interval) * sigma[:, None] * np.sqrt(var_factor)
+    return preds, preds - half, preds + half
+
+
+FORECAST_MODELS = {
+    "linear": batch_linear_forecast,
+    "holt_winters": batch_holt_winters_forecast,
+}
+
+
+def forecast_many(
+    series: dict[str, list[float]],
+    steps: int,
+    model: str = "linear",
+    interval: float = 0.95,
+    **model_kwargs,
+):
+    """
+    Forecast many named series. Series of equal length are fitted together
+    as one matrix; short series fall back to repeating the last value.
+    """
+    if model not in FORECAST_MODELS:
+        raise ValueError(f"Unknown forecast model: {model}")
+    fit = FORECAST_MODELS[model]
+
+    by_length: dict[int, list[str]] = {}
+    for name, values in series.items():
+        by_length.setdefault(len(values), []).append(name)
+
+    results = {}
+    for n, names in by_length.items():
+        if n < 2 or (model == "holt_winters" and n < 3):
+            for name in names:
+                flat = series[name][-1:] * steps
+                results[name] = {"forecast": flat, "lower": flat, "upper": flat}
+            continue
+
+        Y = np.array([series[name] for name in names], dtype=float)
+        preds, lower, upper = fit(Y, steps, interval=interval, **model_kwargs)
+        for i, name in enumerate(names):
+            results[name] = {
+                "forecast": preds[i].tolist(),
+                "lower": lower[i].tolist(),
+                "upper": upper[i].tolist(),
+            }
+
+    return results
+
+
+def linear_forecast(values: list[float], steps: int):
+    if len(values) < 2:
+        return values[-1:] * steps if values else []
 
-    return preds.tolist()
+    preds, _, _ = batch_linear_forecast(np.array([values], dtype=float), steps)
+    return preds[0].tolist()
@@ -1,8 +1,23 @@
 from sqlmodel import SQLModel, Field
 from typing import Optional
+from datetime import datetime, timezone
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class Portfolio(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
-    assets: str
-    weights: str
+    created_at: datetime = Field(default_factory=_utcnow, index=True)
+
+
+class PortfolioHolding(SQLModel, table=True):
+    __tablename__ = "portfolio_holding"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    portfolio_id: int = Field(foreign_key="portfolio.id", index=True)
+    position: int          # keeps the asset order the portfolio was saved with
+    asset: str
+    weight: float
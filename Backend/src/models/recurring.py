@@ -0,0 +1,34 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import date, datetime, timezone
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class RecurringSeries(SQLModel, table=True):
+    """Payment history of one normalized payee, kept mergeable across uploads."""
+    __tablename__ = "recurring_series"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    payee: str = Field(unique=True)      # normalized merchant / description
+    label: Optional[str] = None          # latest raw merchant or description
+    count: int = 0
+    first_date: date
+    last_date: date
+    interval_mean: float = 0.0           # days between payments (Welford mean / M2)
+    interval_m2: float = 0.0
+    amount_mean: float = 0.0
+    amount_m2: float = 0.0
+    period: Optional[str] = Field(default=None, index=True)   # None: not recurring
+    next_date: Optional[date] = None
+    updated_at: datetime = Field(default_factory=_utcnow)
+
+
+class SeedMarker(SQLModel, table=True):
+    """A one-off seeding job that has finished; its absence means it still has to run."""
+    __tablename__ = "seed_marker"
+
+    name: str = Field(primary_key=True)
+    finished_at: datetime = Field(default_factory=_utcnow)
@@ -0,0 +1,181 @@
+from statistics import NormalDist
+import numpy as np
+
+
+TRADING_DAYS = 252
+
+
+class RollingSums:
+    """
+    Prefix sums of several (days, series) arrays, computed once so every
+    window size is a single subtraction: sum(t-w+1..t) = cs[t+1] - cs[t+1-w].
+    """
+
+    def __init__(self, **arrays):
+        self._cs = {}
+        for name, x in arrays.items():
+            cs = np.empty((x.shape[0] + 1,) + x.shape[1:])
+            cs[0] = 0.0
+            np.cumsum(x, axis=0, out=cs[1:])
+            self._cs[name] = cs
+
+    def window(self, name: str, window: int):
+        cs = self._cs[name]
+        return cs[window:] - cs[:-window]
+
+
+def value_at_risk(returns: np.ndarray, levels=(0.95, 0.99)):
+    """
+    Historical and Gaussian VaR / CVaR (as positive losses) for every column
+    of a (days, series) return matrix, at each confidence level.
+    """
+    returns = np.asarray(returns, dtype=float)
+    n = returns.shape[0]
+    mu = returns.mean(axis=0)
+    sigma = returns.std(axis=0, ddof=1)
+    sorted_r = np.sort(returns, axis=0)
+
+    out = {}
+    for level in levels:
+        if not 0 < level < 1:
+            raise ValueError(f"Confidence level must be in (0, 1), got {level}")
+        alpha = 1 - level
+        k = max(int(np.floor(alpha * n)), 1)
+        z = NormalDist().inv_cdf(alpha)
+        out[str(level)] = {
+            "historical_var": -sorted_r[k - 1],
+            "historical_cvar": -sorted_r[:k].mean(axis=0),
+            "parametric_var": -(mu + z * sigma),
+            "parametric_cvar": -(mu - sigma * NormalDist().pdf(z) / alpha),
+        }
+    return out
+
+
+def drawdowns(returns: np.ndarray):
+    """
+    Max drawdown and longest drawdown duration (in periods) per column,
+    plus the drawdown series, from compounded returns.
+    """
+    wealth = np.cumprod(1 + np.asarray(returns, dtype=float), axis=0)
+    peaks = np.maximum.accumulate(wealth, axis=0)
+    dd = wealth / peaks - 1
+
+    # periods since the last new high: index minus running index of highs
+    idx = np.arange(len(dd))[:, None]
+    last_peak = np.maximum.accumulate(np.where(dd >= 0, idx, 0), axis=0)
+    underwater = idx - last_peak
+
+    return {
+        "max_drawdown": -dd.min(axis=0),
+        "max_drawdown_duration": underwater.max(axis=0),
+        "drawdown": dd,
+    }
+
+
+def stats_sums(returns: np.ndarray, risk_free: float = 0.0):
+    r = np.asarray(returns, dtype=float) - risk_free / TRADING_DAYS
+    return RollingSums(r=r, r2=r * r, down=np.minimum(r, 0.0) ** 2)
+
+
+def rolling_stats(returns: np.ndarray, window: int, risk_free: float = 0.0, sums: RollingSums | None = None):
+    """
+    Rolling annualized volatility, Sharpe and Sortino for every column with
+    prefix sums instead of a loop per window. Pass `sums` (from
+    stats_sums) to reuse them across window sizes.
+    """
+    sums = sums or stats_sums(returns, risk_free)
+    s1 = sums.window("r", window)
+    s2 = sums.window("r2", window)
+    down = sums.window("down", window)
+
+    mean = s1 / window
+    var = np.maximum(s2 - window * mean ** 2, 0.0) / (window - 1)
+    std = np.sqrt(var)
+    downside = np.sqrt(down / window)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std, 0.0) * np.sqrt(TRADING_DAYS)
+        sortino = np.where(downside > 0, mean / downside, 0.0) * np.sqrt(TRADING_DAYS)
+
+    return {
+        "volatility": std * np.sqrt(TRADING_DAYS),
+        "sharpe": sharpe,
+        "sortino": sortino,
+    }
+
+
+def correlation_sums(x: np.ndarray, y: np.ndarray):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)[:, None]
+    return RollingSums(x=x, y=y, xx=x * x, yy=y * y, xy=x * y)
+
+
+def rolling_correlation(x: np.ndarray, y: np.ndarray, window: int, sums: RollingSums | None = None):
+    """Rolling correlation of every column of x with the series y."""
+    sums = sums or correlation_sums(x, y)
+    sx, sy = sums.window("x", window), sums.window("y", window)
+    sxx, syy = sums.window("xx", window), sums.window("yy", window)
+    sxy = sums.window("xy", window)
+
+    cov = sxy - sx * sy / window
+    vx = np.maximum(sxx - sx * sx / window, 0.0)
+    vy = np.maximum(syy - sy * sy / window, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((vx > 0) & (vy > 0), cov / np.sqrt(vx * vy), 0.0)
+
+
+def risk_report(
+    returns: np.ndarray,
+    assets: list[str],
+    weights: np.ndarray,
+    windows=(21, 63, 252),
+    levels=(0.95, 0.99),
+    max_points: int = 500,
+):
+    """
+    Full risk summary for a (days, assets) return matrix and portfolio
+    weights. Per-asset figures are reported as the latest window values;
+    the portfolio's rolling series are downsampled to max_points.
+    """
+    returns = np.asarray(returns, dtype=float)
+    portfolio = returns @ weights
+    matrix = np.column_stack([returns, portfolio])
+    names = list(assets) + ["portfolio"]
+    n = len(returns)
+    stride = max(1, -(-n // max_points))
+
+    var = value_at_risk(matrix, levels)
+    dd = drawdowns(matrix)
+
+    report = {
+        "assets": names,
+        "weights": dict(zip(assets, np.round(weights, 6).tolist())),
+        "days": n,
+        "var": {
+            level: {metric: dict(zip(names, v.tolist())) for metric, v in metrics.items()}
+            for level, metrics in var.items()
+        },
+        "max_drawdown": dict(zip(names, dd["max_drawdown"].tolist())),
+        "max_drawdown_duration": dict(zip(names, dd["max_drawdown_duration"].tolist())),
+        "portfolio_drawdown": dd["drawdown"][::stride, -1],
+        "rolling": {},
+    }
+
+    s_sums = stats_sums(matrix)
+    c_sums = correlation_sums(returns, portfolio)
+    for window in windows:
+        if window < 2 or window > n:
+            continue
+        stats = rolling_stats(matrix, window, sums=s_sums)
+        corr = rolling_correlation(returns, portfolio, window, sums=c_sums)
+        tail = returns[-window:]
+        report["rolling"][str(window)] = {
+            "latest": {
+                metric: dict(zip(names, series[-1].tolist())) for metric, series in stats.items()
+            },
+            "portfolio": {metric: series[::stride, -1] for metric, series in stats.items()},
+            "correlation_to_portfolio": dict(zip(assets, corr[-1].tolist())),
+            "correlation_matrix": np.corrcoef(tail, rowvar=False).round(4).tolist() if len(assets) > 1 else [[1.0]],
+        }
+
+    return report
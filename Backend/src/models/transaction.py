@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel, Field
 from typing import Optional
-from datetime import date
+from datetime import date, datetime, timezone
 
 
 class Transaction(SQLModel, table=True):
@@ -14,4 +14,24 @@ class Transaction(SQLModel, table=True):
     account: Optional[str] = None
     description: Optional[str] = None
 
-    raw_json: Optional[str] = None   # encrypted later
+    raw_json: Optional[str] = None   # legacy; new rows keep their source record in transaction_raw
+
+
+class UploadSchema(SQLModel, table=True):
+    """Column names of one upload (or manual entry shape), stored once."""
+    __tablename__ = "upload_schema"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source: Optional[str] = None            # uploaded filename, "manual", "legacy"
+    columns: str                            # JSON list of column names
+    date_format: Optional[str] = None       # inferred format of the date column
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+
+class TransactionRaw(SQLModel, table=True):
+    """Original source values of a transaction, packed; only read on demand."""
+    __tablename__ = "transaction_raw"
+
+    transaction_id: int = Field(foreign_key="transaction.id", primary_key=True)
+    schema_id: int = Field(foreign_key="upload_schema.id", index=True)
+    data: bytes
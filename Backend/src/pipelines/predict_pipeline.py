@@ -1,16 +1,91 @@
-from ..models.forecasting import linear_forecast
+from ..models.forecasting import linear_forecast, forecast_many
 from ..models.monte_carlo import run_monte_carlo_pipeline as monte_carlo_model
 
 from ..app.logger import logger
+from ..app.profiling import span
+from ..app.config import config_yaml
+from ..app.utils import LRUCache
 
 def run_forecast_pipeline(values: list[float], steps: int):
     logger.info("Running forecast pipeline")
     return linear_forecast(values, steps)
 
 
+def run_batch_forecast_pipeline(
+    series: dict[str, list[float]],
+    steps: int,
+    model: str = "linear",
+    interval: float = 0.95,
+    season_length: int = 12,
+):
+    logger.info("Running batch forecast pipeline: %d series, model=%s", len(series), model)
+    kwargs = {"season_length": season_length} if model == "holt_winters" else {}
+    return forecast_many(series, steps, model=model, interval=interval, **kwargs)
+
+
 import numpy as np
 
 
+# Common random numbers: cumulative standard-normal shocks per
+# (paths, steps, seed), so slider changes only redo the affine transform.
+_mc_config = config_yaml.get("monte_carlo", {})
+_shock_cache = LRUCache(
+    max_items=32,
+    max_bytes=int(_mc_config.get("shock_cache_mb", 256)) * 1024 * 1024,
+    sizeof=lambda a: a.nbytes,
+)
+_result_cache = LRUCache(max_items=int(_mc_config.get("result_cache_size", 256)))
+
+
+def cumulative_shocks(paths: int, steps: int, seed: int | None = None):
+    """
+    Running sums of standard-normal monthly shocks, shaped (steps, paths).
+    Seeded draws are cached and shared read-only between requests.
+    """
+    if seed is None:
+        # legacy global RNG, same stream order as drawing `paths` per month
+        return np.random.standard_normal((steps, paths)).cumsum(axis=0)
+
+    key = (paths, steps, seed)
+    cz = _shock_cache.get(key)
+    if cz is None:
+        cz = np.random.default_rng(seed).standard_normal((steps, paths)).cumsum(axis=0)
+        cz.setflags(write=False)
+        _shock_cache.put(key, cz)
+    return cz
+
+
+def log_growth(mean, std, steps, cz, early_setback=False):
+    """Cumulative log growth of each path after month t = 1..steps."""
+    t = np.arange(1, steps + 1, dtype=float)[:, None]
+    log_p = cz * (std / np.sqrt(12))
+    log_p += (mean / 12) * t
+    if early_setback:
+        # ~15% drop per month during year 1, as in the original recursion
+        log_p -= 0.15 * np.minimum(t, 12)
+    return log_p
+
+
+def simulate_wealth(initial, monthly, log_p):
+    """
+    Closed form of W_t = W_{t-1} * g_t + monthly over all paths at once:
+    W_t = P_t * (initial + monthly * sum_{s<=t} 1 / P_s), with P_t = prod g.
+    Returns (steps + 1, paths) including the starting row.
+    """
+    steps, paths = log_p.shape
+    out = np.empty((steps + 1, paths))
+    out[0] = initial
+
+    inv_p = np.negative(log_p)
+    np.exp(inv_p, out=inv_p)
+    wealth = out[1:]
+    np.cumsum(inv_p, axis=0, out=wealth)
+    wealth *= monthly
+    wealth += initial
+    wealth /= inv_p
+    return out
+
+
 def run_monte_carlo_pipeline(
     initial,
     monthly,
@@ -20,44 +95,131 @@ def run_monte_carlo_pipeline(
     paths=100,
     goal_target=None,
     early_setback=False,
+    seed=None,
 ):
-    steps = years * 12
-
-    mean_month = mean / 12
-    std_month = std / np.sqrt(12)
+    """
+    Vectorized Monte-Carlo simulation. With a seed, shocks come from a cached
+    common-random-number draw and identical requests hit a result cache.
+    """
+    key = None
+    if seed is not None:
+        key = (initial, monthly, mean, std, years, paths, goal_target, early_setback, seed)
+        cached = _result_cache.get(key)
+        if cached is not None:
+            return cached
 
-    simulations = np.empty((paths, steps + 1), dtype=float)
-    simulations[:, 0] = initial
-
-    for t in range(1, steps + 1):
-        shocks = np.random.normal(loc=mean_month, scale=std_month, size=paths)
+    steps = years * 12
 
-        if early_setback and t <= 12:
-            shocks -= 0.15
+    with span("mc_rng"):
+        cz = cumulative_shocks(paths, steps, seed)
 
-        simulations[:, t] = simulations[:, t - 1] * np.exp(shocks) + monthly
+    with span("mc_paths"):
+        simulations = simulate_wealth(initial, monthly, log_growth(mean, std, steps, cz, early_setback))
 
-    worst = np.percentile(simulations, 5, axis=0)
-    median = np.percentile(simulations, 50, axis=0)
-    best = np.percentile(simulations, 95, axis=0)
+    with span("mc_percentiles"):
+        worst, median, best = np.percentile(simulations, [5, 50, 95], axis=1)
 
     # Calculate success probability (how many paths had positive growth)
-    final_values = simulations[:, -1]
+    final_values = simulations[-1]
     success_rate = float((final_values > initial).mean())
-    
+
     prob_reaching_goal = None
     if goal_target is not None:
-        prob_reaching_goal = float((simulations[:, -1] >= goal_target).mean())
-
-    return {
-        "worst": worst.tolist(),
-        "median": median.tolist(),
-        "best": best.tolist(),
+        prob_reaching_goal = float((final_values >= goal_target).mean())
+
+    # percentile bands stay NumPy arrays; the response encoder serializes
+    # them without building Python lists
+    result = {
+        "worst": worst,
+        "median": median,
+        "best": best,
         "worst_final": float(worst[-1]),
         "median_final": float(median[-1]),
         "best_final": float(best[-1]),
         "success_probability": success_rate,
         "goal_probability": prob_reaching_goal,
+        "seed": seed,
     }
 
+    if key is not None:
+        for band in (worst, median, best):
+            band.setflags(write=False)
+        _result_cache.put(key, result)
+    return result
+
 
+def _required_quantile(required, probability):
+    """Smallest value v with mean(required <= v) >= probability."""
+    k = int(np.ceil(probability * required.size)) - 1
+    return float(np.partition(required, k)[k])
+
+
+def run_goal_seek_pipeline(
+    solve_for,
+    goal_target,
+    probability,
+    initial,
+    monthly,
+    mean,
+    std,
+    years,
+    paths=1000,
+    early_setback=False,
+    seed=None,
+    max_years=60,
+):
+    """
+    Minimum `monthly`, `initial` or `years` that reaches goal_target with the
+    requested probability, from a single simulation. Terminal wealth per
+    path is linear in the inputs, W_T = P_T * initial + monthly * A_T with
+    A_T = P_T * sum(1 / P_s), so each path's required input is solved in
+    closed form and the answer is a quantile across paths. For `years` the
+    success rate is read off every month of one long run.
+    """
+    horizon = max_years if solve_for == "years" else years
+    steps = horizon * 12
+
+    with span("mc_rng"):
+        cz = cumulative_shocks(paths, steps, seed)
+
+    with span("goal_solve"):
+        log_p = log_growth(mean, std, steps, cz, early_setback)
+
+        if solve_for == "years":
+            wealth = simulate_wealth(initial, monthly, log_p)
+            success = (wealth[1:] >= goal_target).mean(axis=1)
+            hits = np.flatnonzero(success >= probability)
+            if hits.size == 0:
+                return {
+                    "solve_for": solve_for,
+                    "value": None,
+                    "achieved_probability": float(success.max()),
+                    "reason": f"goal not reached within {max_years} years",
+                }
+            month = int(hits[0]) + 1
+            return {
+                "solve_for": solve_for,
+                "value": int(np.ceil(month / 12)),
+                "months": month,
+                "achieved_probability": float(success[month - 1]),
+            }
+
+        p_t = np.exp(log_p[-1])
+        a_t = p_t * np.exp(-log_p).sum(axis=0)
+
+        if solve_for == "monthly":
+            required = (goal_target - p_t * initial) / a_t
+        else:
+            required = (goal_target - monthly * a_t) / p_t
+
+        value = max(0.0, _required_quantile(required, probability))
+        if solve_for == "monthly":
+            terminal = p_t * initial + value * a_t
+        else:
+            terminal = p_t * value + monthly * a_t
+
+    return {
+        "solve_for": solve_for,
+        "value": value,
+        "achieved_probability": float((terminal >= goal_target * (1 - 1e-12)).mean()),
+    }
@@ -1,19 +1,29 @@
 from sqlmodel import select, Session
 from ..models.transaction import Transaction
-from ..services.portfolio_service import get_portfolios
+from ..services.portfolio_service import latest_portfolio
 from ..services.ingestion import detect_column_types  # reuse detection logic
-import pandas as pd
+from ..services.dates import parse_dates
+from ..services.datasets import read_columns, read_frame
 from pathlib import Path
-import json
+from ..app.utils import lazy_import, LRUCache
+from ..app.profiling import span
+from ..app.config import RAW_DATA_DIR
+from ..models.risk_quant import risk_report
+import numpy as np
+
+pd = lazy_import("pandas")
+
+
+# raw source records live in transaction_raw and are never needed for analytics
+ANALYTICS_FIELDS = ("id", "date", "amount", "category", "merchant", "type", "account", "description")
 
 
 def fetch_df(session: Session):
-    rows = session.exec(select(Transaction)).all()
+    rows = session.exec(select(*(getattr(Transaction, f) for f in ANALYTICS_FIELDS))).all()
     if not rows:
         return pd.DataFrame()
 
-    data = [r.model_dump() for r in rows]
-    return pd.DataFrame(data)
+    return pd.DataFrame.from_records(rows, columns=ANALYTICS_FIELDS)
 
 
 def totals_by_category(session: Session):
@@ -60,32 +70,63 @@ def volatility(session: Session):
     return float(df["amount"].std())
 
 
-def net_worth_timeseries(session: Session, initial_portfolio_value: float = 100000.0):
+def latest_returns_file(raw_dir: Path | None = None) -> Path | None:
+    """
+    Most recently modified CSV in raw_dir that looks like a returns file
+    (a date column, no amount-like column, 3+ columns), judged on headers.
+    """
+    raw_dir = raw_dir or RAW_DATA_DIR
+    if not raw_dir.exists():
+        return None
+
+    candidates = sorted(list(raw_dir.glob("*.csv")), key=lambda p: p.stat().st_mtime, reverse=True)
+    for f in candidates:
+        try:
+            # decide on the header alone; only the chosen file is materialized
+            columns = read_columns(f)
+            detected = detect_column_types(pd.DataFrame(columns=columns))
+            cols_lower = [c.lower() for c in columns]
+            has_date = any("date" in c for c in cols_lower)
+            has_amount = ("amount" in detected) or any(c in ["amount", "value", "debit", "credit", "transaction amount"] for c in cols_lower)
+            if has_date and not has_amount and len(columns) >= 3:
+                return f
+        except Exception:
+            continue
+    return None
+
+
+def latest_portfolio_returns(raw_dir: Path | None = None):
+    """The latest returns file and its contents: (path, DataFrame) or (None, None)."""
+    path = latest_returns_file(raw_dir)
+    if path is None:
+        return None, None
+    return path, read_frame(path)
+
+
+def latest_weights_map():
+    """{asset: weight} of the most recently saved portfolio, or {}."""
+    try:
+        latest = latest_portfolio()
+        if latest:
+            return {a: float(w) for a, w in zip(latest["assets"], latest["weights"])}
+    except Exception:
+        pass
+    return {}
+
+
+def net_worth_timeseries(session: Session, initial_portfolio_value: float = 100000.0, raw_dir: Path | None = None):
     """
     Combine portfolio returns (from latest uploaded portfolio CSV)
     with monthly net cashflow from transactions to produce a net-worth series.
     """
     # 1) Load transactions cashflow (income/expenses by month)
-    cash = income_expense_over_time(session)
-    cash_by_month = {row["month"]: float(row.get("income", 0) - row.get("expenses", 0)) for row in cash}
+    with span("networth_cashflow"):
+        cash = income_expense_over_time(session)
+        cash_by_month = {row["month"]: float(row.get("income", 0) - row.get("expenses", 0)) for row in cash}
 
     # 2) Locate latest portfolio returns CSV in data/raw
-    raw_dir = Path(__file__).resolve().parents[3] / "data" / "raw"
-    portfolio_df = None
-    if raw_dir.exists():
-        candidates = sorted(list(raw_dir.glob("*.csv")), key=lambda p: p.stat().st_mtime, reverse=True)
-        for f in candidates:
-            try:
-                df = pd.read_csv(f)
-                detected = detect_column_types(df)
-                cols_lower = [c.lower() for c in df.columns]
-                has_date = any("date" in c for c in cols_lower)
-                has_amount = ("amount" in detected) or any(c in ["amount", "value", "debit", "credit", "transaction amount"] for c in cols_lower)
-                if has_date and not has_amount and len(df.columns) >= 3:
-                    portfolio_df = df.copy()
-                    break
-            except Exception:
-                continue
+    with span("networth_load_file"):
+        _, portfolio_df = latest_portfolio_returns(raw_dir)
 
     # If no portfolio file, build dates just from cashflow
     if portfolio_df is None:
@@ -105,51 +146,44 @@ def net_worth_timeseries(session: Session, initial_portfolio_value: float = 1000
         return {"months": months_sorted, "portfolio_value": pv, "net_savings": savings, "net_worth": networth}
 
     # 3) Prepare portfolio monthly returns
-    dfp = portfolio_df.copy()
-    # normalize date column name
-    date_col = None
-    for c in dfp.columns:
-        if str(c).strip().lower().startswith("date"):
-            date_col = c
-            break
-    dfp["date"] = pd.to_datetime(dfp[date_col])
-    dfp["month"] = dfp["date"].dt.to_period("M").astype(str)
-    # numeric return columns
-    ret_cols = [c for c in dfp.columns if c not in [date_col, "date", "month"]]
+    with span("networth_returns"):
+        dfp = portfolio_df.copy()
+        # normalize date column name
+        date_col = None
+        for c in dfp.columns:
+            if str(c).strip().lower().startswith("date"):
+                date_col = c
+                break
+        dfp["date"] = parse_dates(dfp[date_col])[0]
+        dfp["month"] = dfp["date"].dt.to_period("M").astype(str)
+        # numeric return columns
+        ret_cols = [c for c in dfp.columns if c not in [date_col, "date", "month"]]
 
     # 4) Determine weights: latest saved portfolio or equal-weight
-    weights_map = {}
-    try:
-        portfolios = get_portfolios()
-        if portfolios:
-            last = portfolios[-1]
-            assets = json.loads(last.assets)
-            weights = json.loads(last.weights)
-            weights_map = {a: float(w) for a, w in zip(assets, weights)}
-    except Exception:
-        weights_map = {}
-
-    if not weights_map:
-        # equal weights across available columns
-        w = 1.0 / max(1, len(ret_cols))
-        weights_map = {c: w for c in ret_cols}
-
-    # align weights to columns present
-    weights_series = []
-    for c in ret_cols:
-        weights_series.append(weights_map.get(c, 0.0))
-    total_w = sum(weights_series)
-    if total_w <= 0:
-        w = 1.0 / max(1, len(ret_cols))
-        weights_series = [w for _ in ret_cols]
-        total_w = 1.0
-    # normalize
-    weights_series = [w / total_w for w in weights_series]
-
-    # compute weighted monthly return
-    dfp["portfolio_return"] = (dfp[ret_cols] * weights_series).sum(axis=1)
-    # keep month and return
-    returns_by_month = {row["month"]: float(row["portfolio_return"]) for _, row in dfp[["month", "portfolio_return"]].iterrows()}
+    with span("networth_weights"):
+        weights_map = latest_weights_map()
+
+        if not weights_map:
+            # equal weights across available columns
+            w = 1.0 / max(1, len(ret_cols))
+            weights_map = {c: w for c in ret_cols}
+
+        # align weights to columns present
+        weights_series = []
+        for c in ret_cols:
+            weights_series.append(weights_map.get(c, 0.0))
+        total_w = sum(weights_series)
+        if total_w <= 0:
+            w = 1.0 / max(1, len(ret_cols))
+            weights_series = [w for _ in ret_cols]
+            total_w = 1.0
+        # normalize
+        weights_series = [w / total_w for w in weights_series]
+
+        # compute weighted monthly return
+        dfp["portfolio_return"] = (dfp[ret_cols] * weights_series).sum(axis=1)
+        # keep month and return
+        returns_by_month = {row["month"]: float(row["portfolio_return"]) for _, row in dfp[["month", "portfolio_return"]].iterrows()}
 
     # 5) Merge months and compute series
     months_sorted = sorted(set(list(returns_by_month.keys()) + list(cash_by_month.keys())))
@@ -168,3 +202,51 @@ def net_worth_timeseries(session: Session, initial_portfolio_value: float = 1000
         networth.append(round(pv_val + sav, 2))
 
     return {"months": months_sorted, "portfolio_value": pv, "net_savings": savings, "net_worth": networth}
+
+
+def returns_matrix(df):
+    """Split a returns frame into (dates, asset names, float matrix), rows with gaps dropped."""
+    date_col = next(c for c in df.columns if str(c).strip().lower().startswith("date"))
+    ret_cols = [c for c in df.columns if c != date_col and pd.api.types.is_numeric_dtype(df[c])]
+    clean = df[[date_col] + ret_cols].dropna()
+    dates = parse_dates(clean[date_col])[0]
+    return dates, ret_cols, clean[ret_cols].to_numpy(dtype=float)
+
+
+def aligned_weights(assets: list[str], weights_map: dict):
+    """Weights ordered like `assets`, normalized; equal weights if none apply."""
+    w = np.array([weights_map.get(a, 0.0) for a in assets], dtype=float)
+    if w.sum() <= 0:
+        return np.full(len(assets), 1.0 / max(1, len(assets)))
+    return w / w.sum()
+
+
+# (file, size, mtime, weights, windows, levels) -> report
+_risk_cache = LRUCache(max_items=16)
+
+
+def portfolio_risk(windows=(21, 63, 252), levels=(0.95, 0.99), raw_dir: Path | None = None):
+    """
+    Risk report over the latest uploaded returns file and the latest saved
+    portfolio weights. Cached per dataset fingerprint + weights.
+    """
+    path = latest_returns_file(raw_dir)
+    if path is None:
+        return {"error": "No portfolio returns file uploaded"}
+
+    weights_map = latest_weights_map()
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns, tuple(sorted(weights_map.items())),
+           tuple(windows), tuple(levels))
+    cached = _risk_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with span("risk_compute"):
+        dates, assets, matrix = returns_matrix(read_frame(path))
+        report = risk_report(matrix, assets, aligned_weights(assets, weights_map), windows, levels)
+        stride = max(1, -(-len(dates) // 500))
+        report["dates"] = dates.dt.strftime("%Y-%m-%d").to_numpy()[::stride].tolist()
+        report["file"] = path.name
+
+    return _risk_cache.put(key, report)
@@ -0,0 +1,192 @@
+import math
+
+from sqlalchemy import insert, tuple_
+from sqlmodel import Session, select
+
+from ..models.anomaly import AmountStats, TransactionAnomaly, _utcnow
+from ..models.transaction import Transaction
+from ..app.config import config_yaml
+from ..app.profiling import span
+
+ANOMALY_CONFIG = config_yaml.get("anomalies", {})
+ENABLED = ANOMALY_CONFIG.get("enabled", True)
+MIN_HISTORY = ANOMALY_CONFIG.get("min_history", 8)
+Z_THRESHOLD = ANOMALY_CONFIG.get("z_threshold", 4.0)
+ROBUST_THRESHOLD = ANOMALY_CONFIG.get("robust_threshold", 3.5)
+# floor of the median/MAD step size; keeps the estimates tracking drift
+MIN_RATE = ANOMALY_CONFIG.get("min_rate", 0.005)
+
+MAD_TO_STD = 1.4826
+STAT_FIELDS = ("count", "mean", "m2", "median", "mad")
+
+
+def group_key(category, merchant):
+    return (category or "", merchant or "")
+
+
+def observe(state: dict, x: float):
+    """
+    Score x against the group seen so far, then fold it into the running
+    state in O(1): Welford for mean/variance, and sign-step stochastic
+    approximation for the median and MAD (step ~ std * max(1/n, MIN_RATE)).
+    Returns (z, robust_z, expected) computed before the update.
+    """
+    x = float(x)
+    n, mean, m2, median, mad = (state[f] for f in STAT_FIELDS)
+    z = robust = 0.0
+    if n >= 2:
+        std = math.sqrt(m2 / (n - 1))
+        z = (x - mean) / std if std > 0 else 0.0
+        scale = MAD_TO_STD * mad or std
+        robust = (x - median) / scale if scale > 0 else 0.0
+    expected = median
+
+    n += 1
+    delta = x - mean
+    mean += delta / n
+    m2 += delta * (x - mean)
+    if n == 1:
+        median, mad = x, 0.0
+    else:
+        step = math.sqrt(m2 / (n - 1)) * max(1.0 / n, MIN_RATE)
+        median += step * ((x > median) - (x < median))
+        deviation = abs(x - median)
+        mad = max(0.0, mad + step * ((deviation > mad) - (deviation < mad)))
+
+    state.update(count=n, mean=mean, m2=m2, median=median, mad=mad)
+    return z, robust, expected
+
+
+def is_anomalous(count_before: int, z: float, robust: float) -> bool:
+    return count_before >= MIN_HISTORY and (abs(robust) > ROBUST_THRESHOLD or abs(z) > Z_THRESHOLD)
+
+
+def _insert_missing(session: Session, rows: list[dict]):
+    """INSERT ... ON CONFLICT DO NOTHING on (category, merchant)."""
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(AmountStats).on_conflict_do_nothing(index_elements=["category", "merchant"])
+    session.execute(statement, rows)
+
+
+def load_states(session: Session, keys) -> dict:
+    """
+    Current stats for the given (category, merchant) keys, locked until the
+    caller commits. Missing groups are created first (an upsert, so two
+    uploads opening the same new group don't collide) and rows are locked in
+    key order, so concurrent uploads serialize per group instead of losing
+    each other's updates. SQLite ignores FOR UPDATE, but there the upload's
+    own inserts already hold the database write lock.
+    """
+    keys = sorted(set(keys))
+    states = {}
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        _insert_missing(session, [{"category": c, "merchant": m} for c, m in chunk])
+        rows = session.exec(
+            select(AmountStats)
+            .where(tuple_(AmountStats.category, AmountStats.merchant).in_(chunk))
+            .order_by(AmountStats.category, AmountStats.merchant)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).all()
+        for row in rows:
+            states[(row.category, row.merchant)] = {f: getattr(row, f) for f in STAT_FIELDS} | {"id": row.id}
+    return states
+
+
+def save_states(session: Session, states: dict):
+    """Write states back; rows loaded by load_states are still in the identity map."""
+    for state in states.values():
+        if "id" not in state:
+            continue
+        row = session.get(AmountStats, state["id"])
+        for f in STAT_FIELDS:
+            setattr(row, f, state[f])
+        row.updated_at = _utcnow()
+    new = [
+        {"category": k[0], "merchant": k[1], **{f: s[f] for f in STAT_FIELDS}}
+        for k, s in states.items() if "id" not in s and s["count"]
+    ]
+    if new:
+        _insert_missing(session, new)
+
+
+def record_anomalies(session: Session, transactions: list[Transaction]) -> int:
+    """
+    Flag new (already flushed) transactions against their group's running
+    stats and update those stats; touches one state row per group, never
+    the transaction history. Returns the number of anomalies recorded.
+    """
+    if not ENABLED or not transactions:
+        return 0
+
+    with span("anomaly_detect"):
+        states = load_states(session, (group_key(tx.category, tx.merchant) for tx in transactions))
+        flagged = []
+        for tx in transactions:
+            key = group_key(tx.category, tx.merchant)
+            state = states[key]
+            count_before = state["count"]
+            z, robust, expected = observe(state, float(tx.amount))
+            if is_anomalous(count_before, z, robust):
+                flagged.append({
+                    "transaction_id": tx.id, "category": key[0], "merchant": key[1],
+                    "amount": float(tx.amount), "expected": expected,
+                    "z_score": z, "robust_z": robust,
+                })
+        save_states(session, states)
+        if flagged:
+            session.execute(insert(TransactionAnomaly), flagged)
+    return len(flagged)
+
+
+def rebuild_stats(session: Session, batch: int = 10000) -> int:
+    """
+    One-off: seed the stats table from existing transactions when it is
+    empty (databases from before anomaly detection). History is not flagged.
+    Runs at startup before requests are served; groups another worker has
+    already seeded are left alone.
+    """
+    if session.exec(select(AmountStats.id).limit(1)).first() is not None:
+        return 0
+
+    states, last_id, seen = {}, 0, 0
+    while True:
+        rows = session.exec(
+            select(Transaction.id, Transaction.category, Transaction.merchant, Transaction.amount)
+            .where(Transaction.id > last_id).order_by(Transaction.id).limit(batch)
+        ).all()
+        if not rows:
+            break
+        for tid, category, merchant, amount in rows:
+            state = states.setdefault(group_key(category, merchant), dict.fromkeys(STAT_FIELDS, 0))
+            observe(state, float(amount))
+        last_id = rows[-1][0]
+        seen += len(rows)
+
+    save_states(session, states)
+    session.commit()
+    return seen
+
+
+def list_anomalies(session: Session, limit: int = 100, category: str | None = None, min_score: float = 0.0):
+    """Most recent anomalies with the transaction they flag."""
+    statement = (
+        select(TransactionAnomaly, Transaction.date, Transaction.description)
+        .join(Transaction, Transaction.id == TransactionAnomaly.transaction_id)
+        .order_by(TransactionAnomaly.id.desc())
+        .limit(limit)
+    )
+    if category:
+        statement = statement.where(TransactionAnomaly.category == category)
+    if min_score:
+        statement = statement.where(
+            (TransactionAnomaly.robust_z >= min_score) | (TransactionAnomaly.robust_z <= -min_score)
+        )
+    return [
+        {**anomaly.model_dump(), "date": tx_date, "description": description}
+        for anomaly, tx_date, description in session.exec(statement).all()
+    ]
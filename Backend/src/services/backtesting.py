@@ -0,0 +1,287 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from ..app.config import config_yaml
+from ..app.logger import logger
+from ..app.profiling import span
+from ..app.utils import LRUCache
+from .portfolio_optimizer import optimize_portfolio
+from .portfolio_service import weight_matrix
+from .analytics import latest_portfolio_returns, returns_matrix
+
+BACKTEST_CONFIG = config_yaml.get("backtest", {})
+WORKERS = int(BACKTEST_CONFIG.get("workers") or min(4, os.cpu_count() or 1))
+# below this many optimizations the pool's IPC costs more than it saves
+PARALLEL_MIN_JOBS = int(BACKTEST_CONFIG.get("parallel_min_jobs", 16))
+
+TRADING_DAYS = 252
+REBALANCE_RULES = ("none", "monthly", "quarterly", "threshold")
+
+
+# ---------------- schedules ----------------
+
+def calendar_starts(dates, rule: str):
+    """Row indices where a new holding period starts (always includes 0)."""
+    if rule == "none":
+        return np.array([0])
+    year = dates.dt.year.to_numpy()
+    month = dates.dt.month.to_numpy()
+    if rule == "monthly":
+        key = year * 12 + month
+    elif rule == "quarterly":
+        key = year * 4 + (month - 1) // 3
+    else:
+        raise ValueError(f"Unknown calendar rule: {rule}")
+    return np.concatenate([[0], np.flatnonzero(np.diff(key)) + 1])
+
+
+def threshold_starts(log_cum: np.ndarray, target: np.ndarray, threshold: float, block: int = 63):
+    """
+    Rebalance the day after any weight drifts more than `threshold` from
+    target. Drift is evaluated a block of days at a time from the last
+    rebalance, doubling the block until a breach (or the end) is found.
+    """
+    n = len(log_cum) - 1
+    starts = [0]
+    s, look = 0, block
+    while s < n:
+        end = min(s + look, n)
+        drifted = np.exp(log_cum[s + 1:end + 1] - log_cum[s]) * target
+        drifted /= drifted.sum(axis=1, keepdims=True)
+        breach = np.flatnonzero(np.abs(drifted - target).max(axis=1) > threshold)
+        if breach.size:
+            s += breach[0] + 1
+            look = block
+            if s < n:
+                starts.append(s)
+        elif end == n:
+            break
+        else:
+            look *= 2
+    return np.array(starts)
+
+
+# ---------------- simulation ----------------
+
+def simulate(log_cum: np.ndarray, starts: np.ndarray, targets: np.ndarray, cost_bps: float = 0.0):
+    """
+    Equity curves for S strategies that share one rebalance schedule.
+
+    log_cum: (days + 1, assets) cumulative log growth with a leading zero row.
+    targets: (S, assets) fixed weights or (S, periods, assets) weights per period.
+    Inside a period holdings drift, so the strategy's growth since the period
+    start is rel @ w with rel = exp(log_cum[t] - log_cum[start]) — one matmul
+    per period for all strategies instead of a day-by-day loop.
+    Returns (equity (days, S), one-way turnover at each rebalance (periods - 1, S)).
+    """
+    n = len(log_cum) - 1
+    ends = np.append(starts[1:], n)
+    if targets.ndim == 2:
+        targets = np.broadcast_to(targets[:, None, :], (len(targets), len(starts), targets.shape[1]))
+
+    growth = np.empty((n, len(targets)))
+    drifted = np.empty(targets.shape)
+    for k, (s, e) in enumerate(zip(starts, ends)):
+        rel = np.exp(log_cum[s + 1:e + 1] - log_cum[s])
+        growth[s:e] = rel @ targets[:, k].T
+        drifted[:, k] = targets[:, k] * rel[-1]
+
+    drifted /= drifted.sum(axis=2, keepdims=True)
+    turnover = 0.5 * np.abs(targets[:, 1:] - drifted[:, :-1]).sum(axis=2).T
+    cost = 1 - (cost_bps / 1e4) * 2 * turnover
+
+    period_growth = growth[ends - 1] * np.vstack([cost, np.ones((1, len(targets)))])
+    period_start = np.vstack([np.ones((1, len(targets))), np.cumprod(period_growth[:-1], axis=0)])
+    seg = np.repeat(np.arange(len(starts)), ends - starts)
+    return period_start[seg] * growth, turnover
+
+
+def summarize(equity: np.ndarray, turnover: np.ndarray, rebalances: np.ndarray, years: float):
+    """
+    CAGR, volatility, max drawdown and annualized turnover for each column of
+    an equity matrix; turnover/rebalances are per-strategy totals.
+    """
+    n = len(equity)
+    prev = np.vstack([np.ones((1, equity.shape[1])), equity[:-1]])
+    daily = equity / prev - 1
+    peaks = np.maximum.accumulate(equity, axis=0)
+    return {
+        "final_value": equity[-1],
+        "cagr": equity[-1] ** (1 / years) - 1,
+        "volatility": daily.std(axis=0, ddof=1) * np.sqrt(n / years),
+        "max_drawdown": -(equity / peaks - 1).min(axis=0),
+        "turnover": turnover / years,
+        "rebalances": rebalances,
+    }
+
+
+# ---------------- rolling re-optimization ----------------
+
+def _optimize_job(job):
+    assets, expected = job
+    try:
+        return optimize_portfolio(list(assets), list(expected))
+    except (RuntimeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1)
+def _pool():
+    # spawn: the API process runs threads, which fork does not copy safely
+    return ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def shutdown_pool():
+    """Stop the worker processes, if the pool was ever started (app shutdown)."""
+    if _pool.cache_info().currsize:
+        _pool().shutdown(wait=False, cancel_futures=True)
+        _pool.cache_clear()
+
+
+def run_optimizations(jobs: list):
+    """optimize_portfolio over many (assets, returns) jobs, across processes when worth it."""
+    if WORKERS > 1 and len(jobs) >= PARALLEL_MIN_JOBS:
+        try:
+            chunksize = max(1, len(jobs) // (WORKERS * 4))
+            return list(_pool().map(_optimize_job, jobs, chunksize=chunksize))
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning("[BACKTEST] process pool unavailable, optimizing inline: %s", e)
+            _pool.cache_clear()
+    return [_optimize_job(job) for job in jobs]
+
+
+def rolling_optimized_weights(returns: np.ndarray, assets: list[str], starts: np.ndarray, lookback: int):
+    """
+    Weights from optimize_portfolio on the trailing `lookback` days before
+    every period start. Identical windows are solved once; periods whose
+    solve fails (or lack history) keep the previous weights.
+    """
+    n_assets = len(assets)
+    csum = np.vstack([np.zeros((1, n_assets)), np.cumsum(returns, axis=0)])
+    min_history = min(lookback, 21)
+
+    jobs, job_of_period = {}, []
+    for s in starts:
+        lo = max(0, s - lookback)
+        if s - lo < min_history:
+            job_of_period.append(None)
+            continue
+        expected = tuple(np.round((csum[s] - csum[lo]) / (s - lo) * TRADING_DAYS, 6).tolist())
+        job_of_period.append(jobs.setdefault((tuple(assets), expected), len(jobs)))
+
+    solved = run_optimizations(list(jobs))
+    weights = np.empty((len(starts), n_assets))
+    current = np.full(n_assets, 1.0 / n_assets)
+    for k, j in enumerate(job_of_period):
+        if j is not None and solved[j] is not None:
+            current = np.clip(np.asarray(solved[j], dtype=float), 0.0, None)
+            current /= current.sum()
+        weights[k] = current
+    return weights
+
+
+# ---------------- service ----------------
+
+# (file, size, mtime, portfolios, params) -> result
+_backtest_cache = LRUCache(max_items=8)
+
+
+def run_backtest(
+    rules=REBALANCE_RULES,
+    threshold: float = 0.05,
+    optimize_rules=("quarterly",),
+    lookback: int = TRADING_DAYS,
+    cost_bps: float = 0.0,
+    portfolio_ids: list[int] | None = None,
+    raw_dir: Path | None = None,
+    max_points: int = 500,
+):
+    """
+    Backtest every saved portfolio under each rebalancing rule, plus
+    portfolios re-optimized on rolling windows, over the latest uploaded
+    daily returns file.
+    """
+    path, df = latest_portfolio_returns(raw_dir)
+    if path is None:
+        return {"error": "No portfolio returns file uploaded"}
+
+    dates, assets, matrix = returns_matrix(df)
+    if len(matrix) < 2:
+        return {"error": "Not enough return rows to backtest"}
+
+    # weights of assets missing from the returns file are dropped and the rest renormalized
+    ids, names, _, W = weight_matrix(assets)
+    W = W[:, :len(assets)]
+    # portfolio id -> (label, weights); names are not unique, ids are
+    fixed = {
+        pid: (name or f"portfolio_{pid}", w / w.sum())
+        for pid, name, w in zip(ids, names, W)
+        if (portfolio_ids is None or pid in portfolio_ids) and w.sum() > 0
+    } or {None: ("equal_weight", np.full(len(assets), 1.0 / len(assets)))}
+
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns,
+           tuple((pid, label, tuple(w.round(8))) for pid, (label, w) in fixed.items()),
+           tuple(rules), threshold, tuple(optimize_rules or ()), lookback, cost_bps, max_points)
+    cached = _backtest_cache.get(key)
+    if cached is not None:
+        return cached
+
+    pids = list(fixed)
+    taken = [label for label, _ in fixed.values()]
+    # a shared name gets the id appended so strategies and curves stay distinct
+    names = [label if taken.count(label) == 1 else f"{label}#{pid}" for pid, (label, _) in fixed.items()]
+    targets = np.array([w for _, w in fixed.values()])
+    log_cum = np.vstack([np.zeros((1, len(assets))), np.cumsum(np.log1p(matrix), axis=0)])
+    years = (dates.iloc[-1] - dates.iloc[0]).days / 365.25 or len(matrix) / TRADING_DAYS
+
+    curves, turnovers, rebalances, labels, owners = [], [], [], [], []
+
+    def add(equity, turnover, strategy_names, portfolio_ids):
+        curves.append(equity)
+        turnovers.append(turnover.sum(axis=0))
+        rebalances.append((turnover > 0).sum(axis=0))
+        labels.extend(strategy_names)
+        owners.extend(portfolio_ids)
+
+    with span("backtest_simulate"):
+        for rule in rules:
+            if rule == "threshold":
+                for i, name in enumerate(names):
+                    starts = threshold_starts(log_cum, targets[i], threshold)
+                    equity, turnover = simulate(log_cum, starts, targets[i:i + 1], cost_bps)
+                    add(equity, turnover, [f"{name}:threshold"], [pids[i]])
+            else:
+                equity, turnover = simulate(log_cum, calendar_starts(dates, rule), targets, cost_bps)
+                add(equity, turnover, [f"{name}:{rule}" for name in names], pids)
+
+    with span("backtest_optimize"):
+        for rule in optimize_rules or ():
+            starts = calendar_starts(dates, rule)
+            weights = rolling_optimized_weights(matrix, assets, starts, lookback)
+            equity, turnover = simulate(log_cum, starts, weights[None], cost_bps)
+            add(equity, turnover, [f"optimized:{rule}:{lookback}d"], [None])
+
+    equity = np.hstack(curves)
+    stats = summarize(equity, np.concatenate(turnovers), np.concatenate(rebalances), years)
+    strategies = [
+        {"name": label, "portfolio_id": owners[i], **{metric: values[i].item() for metric, values in stats.items()}}
+        for i, label in enumerate(labels)
+    ]
+
+    stride = max(1, -(-len(matrix) // max_points))
+    result = {
+        "file": path.name,
+        "assets": assets,
+        "days": len(matrix),
+        "dates": dates.dt.strftime("%Y-%m-%d").to_numpy()[::stride].tolist(),
+        "strategies": strategies,
+        "equity": {label: equity[::stride, i] for i, label in enumerate(labels)},
+    }
+    return _backtest_cache.put(key, result)
@@ -0,0 +1,102 @@
+from sqlmodel import Session, select, func
+import numpy as np
+
+from ..models.transaction import Transaction
+from ..pipelines.predict_pipeline import run_batch_forecast_pipeline
+from ..app.utils import LRUCache, lazy_import
+
+pd = lazy_import("pandas")
+
+
+GROUP_COLUMNS = {
+    "category": Transaction.category,
+    "account": Transaction.account,
+}
+
+# (data version, group_by, steps, model, interval) -> result
+_forecast_cache = LRUCache(max_items=64)
+
+
+def data_version(session: Session):
+    """Cheap fingerprint of the transactions table: row count + highest id."""
+    count, max_id = session.exec(
+        select(func.count(Transaction.id), func.max(Transaction.id))
+    ).one()
+    return (int(count or 0), int(max_id or 0))
+
+
+def _month_expr(session: Session):
+    if session.get_bind().dialect.name == "postgresql":
+        return func.to_char(Transaction.date, "YYYY-MM")
+    return func.strftime("%Y-%m", Transaction.date)
+
+
+def monthly_series(session: Session, group_by: str = "category"):
+    """
+    Aggregate transaction amounts per (group, month) in SQL and pivot into
+    a dense matrix over a shared month axis (missing months are zero).
+    Returns (groups, months, matrix) with matrix shaped (groups, months).
+    """
+    group_col = GROUP_COLUMNS[group_by]
+    month = _month_expr(session).label("month")
+
+    rows = session.exec(
+        select(group_col, month, func.sum(Transaction.amount))
+        .group_by(group_col, month)
+    ).all()
+    if not rows:
+        return [], [], np.zeros((0, 0))
+
+    groups = sorted({r[0] or "uncategorized" for r in rows})
+    # every calendar month in range, so a month without transactions is a zero, not skipped
+    seen = {r[1] for r in rows}
+    months = pd.period_range(min(seen), max(seen), freq="M").strftime("%Y-%m").tolist()
+    g_index = {g: i for i, g in enumerate(groups)}
+    m_index = {m: i for i, m in enumerate(months)}
+
+    matrix = np.zeros((len(groups), len(months)))
+    for group, m, total in rows:
+        matrix[g_index[group or "uncategorized"], m_index[m]] += float(total or 0.0)
+
+    return groups, months, matrix
+
+
+def _next_months(last: str, steps: int):
+    year, month = (int(x) for x in last.split("-"))
+    out = []
+    for _ in range(steps):
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        out.append(f"{year:04d}-{month:02d}")
+    return out
+
+
+def forecast_by_group(
+    session: Session,
+    steps: int,
+    group_by: str = "category",
+    model: str = "linear",
+    interval: float = 0.95,
+):
+    """
+    Forecast monthly totals for every category (or account) in one batched
+    pass. Results are cached until the transactions table changes.
+    """
+    key = (data_version(session), group_by, steps, model, interval)
+    cached = _forecast_cache.get(key)
+    if cached is not None:
+        return cached
+
+    groups, months, matrix = monthly_series(session, group_by)
+    series = {g: matrix[i].tolist() for i, g in enumerate(groups)}
+    forecasts = run_batch_forecast_pipeline(series, steps, model=model, interval=interval)
+
+    result = {
+        "group_by": group_by,
+        "model": model,
+        "months": months,
+        "forecast_months": _next_months(months[-1], steps) if months else [],
+        "history": series,
+        "forecasts": forecasts,
+    }
+
+    return _forecast_cache.put(key, result)
@@ -0,0 +1,212 @@
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from ..app.config import config_yaml
+from ..app.profiling import span
+from ..app.utils import LRUCache, lazy_import
+
+pd = lazy_import("pandas")
+
+# Uploaded CSVs converted once to a columnar on-disk form that every worker
+# memory-maps: numeric columns are .npy files, text columns a UTF-8 blob plus
+# offsets. The OS page cache holds one copy for all processes, and repeat
+# reads skip CSV parsing entirely.
+#
+# Each source version (size, mtime) gets its own directory, published with an
+# atomic rename, so concurrent workers converting the same file never see a
+# half-written cache. A Dataset maps all of its column files when it is
+# opened, so a re-upload can unlink stale versions at once: workers that
+# still hold one keep valid pages until they drop it (the kernel
+# reference-counts unlinked mapped files), and the disk space is freed then.
+
+DATASET_CONFIG = config_yaml.get("datasets", {})
+ENABLED = DATASET_CONFIG.get("enabled", True)
+CACHE_DIR = DATASET_CONFIG.get("cache_dir")     # default: <upload dir>/.columnar
+FORMAT_VERSION = 1
+
+# (path, size, mtime_ns) -> Dataset; holds the open maps of recently used files
+_open = LRUCache(max_items=DATASET_CONFIG.get("max_open", 32))
+
+
+def _cache_root(path: Path) -> Path:
+    return Path(CACHE_DIR) if CACHE_DIR else path.parent / ".columnar"
+
+
+def _version_dir(path: Path, stat) -> Path:
+    return _cache_root(path) / f"{path.name}.{stat.st_size}-{stat.st_mtime_ns}.v{FORMAT_VERSION}"
+
+
+def _write_text_column(directory: Path, index: int, values):
+    present = pd.notna(values)
+    encoded = [str(v).encode() if ok else b"" for v, ok in zip(values, present)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    (directory / f"c{index}.utf8").write_bytes(b"".join(encoded))
+    np.save(directory / f"c{index}.offsets.npy", offsets)
+    np.save(directory / f"c{index}.nulls.npy", ~np.asarray(present, dtype=bool))
+
+
+def convert(path: Path, target: Path):
+    """Parse the CSV once and write its columnar cache to `target` (atomically)."""
+    with span("dataset_convert"):
+        df = pd.read_csv(path)
+        staging = target.parent / f".tmp-{os.getpid()}-{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+        try:
+            kinds = []
+            for i, name in enumerate(df.columns):
+                col = df[name]
+                if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+                    np.save(staging / f"c{i}.npy", col.to_numpy())
+                    kinds.append("numeric")
+                else:
+                    _write_text_column(staging, i, col.to_numpy(dtype=object))
+                    kinds.append("text")
+            meta = {"columns": [str(c) for c in df.columns], "kinds": kinds, "rows": len(df)}
+            (staging / "meta.json").write_text(json.dumps(meta))
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # another worker published the same version first
+                if not (target / "meta.json").exists():
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+class Dataset:
+    """
+    Read-only view of one cached upload. Every column file is mapped when the
+    Dataset is opened, so the data stays readable after invalidate() unlinks
+    the directory; text columns are decoded once, on first use.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        meta = json.loads((directory / "meta.json").read_text())
+        self.columns: list[str] = meta["columns"]
+        self.kinds: list[str] = meta["kinds"]
+        self.rows: int = meta["rows"]
+        self._maps = [self._map(i, kind) for i, kind in enumerate(self.kinds)]
+        self._decoded = {}
+
+    def _map(self, i: int, kind: str):
+        if kind == "numeric":
+            return np.load(self.directory / f"c{i}.npy", mmap_mode="r")
+        blob = self.directory / f"c{i}.utf8"
+        return (
+            np.memmap(blob, dtype=np.uint8, mode="r") if blob.stat().st_size else np.zeros(0, dtype=np.uint8),
+            np.load(self.directory / f"c{i}.offsets.npy", mmap_mode="r"),
+            np.load(self.directory / f"c{i}.nulls.npy", mmap_mode="r"),
+        )
+
+    def _index(self, name: str) -> int:
+        return self.columns.index(name)
+
+    def is_numeric(self, name: str) -> bool:
+        return self.kinds[self._index(name)] == "numeric"
+
+    def column(self, name: str) -> np.ndarray:
+        """Numeric columns as a read-only memory map; text columns decoded (NaN for missing)."""
+        i = self._index(name)
+        if self.kinds[i] == "numeric":
+            return self._maps[i]
+
+        values = self._decoded.get(i)
+        if values is None:
+            blob, offsets, nulls = self._maps[i]
+            data = blob.tobytes()
+            bounds = offsets.tolist()
+            values = np.empty(self.rows, dtype=object)
+            values[:] = [data[a:b].decode() for a, b in zip(bounds, bounds[1:])]
+            values[np.asarray(nulls)] = np.nan
+            values.flags.writeable = False      # shared by every caller
+            values = self._decoded.setdefault(i, values)
+        return values
+
+    def frame(self, columns: list[str] | None = None):
+        """DataFrame over the mapped columns (numeric data is not copied)."""
+        names = columns or self.columns
+        return pd.DataFrame({name: self.column(name) for name in names}, columns=names, copy=False)
+
+
+def _key(path: Path, stat) -> tuple:
+    return str(path), stat.st_size, stat.st_mtime_ns
+
+
+def open_dataset(path: Path) -> Dataset:
+    """Columnar view of an uploaded CSV, converting it on first use of this version."""
+    path = Path(path)
+    for attempt in range(3):
+        stat = path.stat()
+        dataset = _open.get(_key(path, stat))
+        if dataset is not None:
+            return dataset
+
+        target = _version_dir(path, stat)
+        try:
+            if not (target / "meta.json").exists():
+                convert(path, target)
+            return _open.put(_key(path, stat), Dataset(target))
+        except FileNotFoundError:
+            # the file was re-uploaded and this version invalidated while
+            # opening it; start over from the new version
+            if attempt == 2:
+                raise
+
+
+def read_columns(path: Path) -> list[str]:
+    """Column names of an uploaded CSV, from the cache's metadata or the CSV header."""
+    path = Path(path)
+    if ENABLED:
+        stat = path.stat()
+        dataset = _open.get(_key(path, stat))
+        if dataset is not None:
+            return list(dataset.columns)
+        try:
+            return json.loads((_version_dir(path, stat) / "meta.json").read_text())["columns"]
+        except (OSError, ValueError, KeyError):
+            pass
+    return [str(c) for c in pd.read_csv(path, nrows=0).columns]
+
+
+def read_frame(path: Path):
+    """pd.read_csv(path) through the dataset cache (plain read_csv when disabled)."""
+    if not ENABLED:
+        return pd.read_csv(path)
+    return open_dataset(path).frame()
+
+
+def describe(path: Path) -> tuple[list[str], int]:
+    """(column names, row count) of an uploaded CSV."""
+    if not ENABLED:
+        df = pd.read_csv(path)
+        return [str(c) for c in df.columns], len(df)
+    dataset = open_dataset(path)
+    return list(dataset.columns), dataset.rows
+
+
+def read_column(path: Path, name: str):
+    """One column as a Series, or None if the file has no such column."""
+    if not ENABLED:
+        df = pd.read_csv(path)
+        return df[name] if name in df.columns else None
+    dataset = open_dataset(path)
+    if name not in dataset.columns:
+        return None
+    return pd.Series(dataset.column(name), name=name, copy=False)
+
+
+def invalidate(path: Path):
+    """Drop cached versions of `path` (call after it is overwritten)."""
+    path = Path(path)
+    root = _cache_root(path)
+    if root.exists():
+        for stale in root.glob(f"{path.name}.*-*.v*"):
+            shutil.rmtree(stale, ignore_errors=True)
+    _open.discard(lambda key: key[0] == str(path))
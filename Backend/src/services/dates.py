@@ -0,0 +1,77 @@
+import warnings
+
+from ..app.utils import lazy_import
+
+pd = lazy_import("pandas")
+
+# Tried in order after pandas' own guesses; the first format that parses the
+# whole sample wins, so month-first beats day-first for ambiguous columns
+# ("1/1/2005" style return files) unless a day > 12 rules it out.
+DATE_FORMATS = (
+    "ISO8601",
+    "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%y", "%d/%m/%y",
+    "%m-%d-%Y", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d", "%Y%m%d",
+    "%d %b %Y", "%d-%b-%Y", "%b %d, %Y", "%d %B %Y", "%B %d, %Y",
+)
+SAMPLE_SIZE = 200
+# a known format is re-inferred when more of the column than this fails it
+MAX_FAILURE_RATE = 0.05
+
+
+def _as_text(values):
+    series = pd.Series(values)
+    text = series.astype(str).str.strip()
+    return text.where(series.notna() & (text != ""))
+
+
+def infer_date_format(values) -> str | None:
+    """Format string that parses the most of a sample of `values` (None if nothing fits)."""
+    sample = pd.Series(_as_text(values).dropna().unique()[:SAMPLE_SIZE])
+    if sample.empty:
+        return None
+
+    from pandas.tseries.api import guess_datetime_format
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")   # day-first guesses warn about dayfirst=False
+        guesses = [guess_datetime_format(v) for v in sample[:5]]
+    best, best_parsed = None, 0
+    for fmt in dict.fromkeys(g for g in guesses + list(DATE_FORMATS) if g):
+        parsed = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if parsed > best_parsed:
+            best, best_parsed = fmt, parsed
+        if parsed == len(sample):
+            break
+    return best
+
+
+def parse_dates(values, date_format: str | None = None):
+    """
+    Parse a whole date column in one vectorized call with one explicit
+    format: `date_format` if it still fits the column, else one inferred
+    from a sample. Only the rows that format misses go through pandas'
+    per-element parser; unparseable rows come back as NaT.
+    Returns (datetime Series aligned with values, format used).
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.Series(values), date_format
+
+    text = _as_text(values)
+    present = text.notna()
+    parsed = failed = None
+    if date_format:
+        parsed = pd.to_datetime(text, format=date_format, errors="coerce")
+        failed = parsed.isna() & present
+        if failed.sum() > MAX_FAILURE_RATE * max(1, present.sum()):
+            date_format = None
+    if not date_format:
+        date_format = infer_date_format(text)
+        if date_format:
+            parsed = pd.to_datetime(text, format=date_format, errors="coerce")
+        else:
+            parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+        failed = parsed.isna() & present
+
+    if failed.any():
+        parsed[failed] = pd.to_datetime(text[failed], format="mixed", errors="coerce")
+    return parsed, date_format
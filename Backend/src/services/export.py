@@ -0,0 +1,157 @@
+import csv
+import io
+import zlib
+from datetime import date
+
+from sqlmodel import Session, select
+
+from ..models.transaction import Transaction
+from ..app.config import config_yaml
+from ..app.database import engine
+from ..app.encoding import GZIP_LEVEL
+from ..app.logger import logger
+
+EXPORT_CONFIG = config_yaml.get("export", {})
+# rows fetched per cursor round trip; also the Parquet row-group size
+BATCH_SIZE = EXPORT_CONFIG.get("batch_size", 50000)
+
+TRANSACTION_FIELDS = ("id", "date", "amount", "description", "category", "type", "merchant", "account")
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+
+def transactions_query(
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+    tx_type: str | None = None,
+    account: str | None = None,
+):
+    """Transaction columns in id order, narrowed by the list/export filters."""
+    statement = select(*(getattr(Transaction, f) for f in TRANSACTION_FIELDS))
+    if start is not None:
+        statement = statement.where(Transaction.date >= start)
+    if end is not None:
+        statement = statement.where(Transaction.date <= end)
+    if category:
+        statement = statement.where(Transaction.category == category)
+    if tx_type:
+        statement = statement.where(Transaction.type == tx_type)
+    if account:
+        statement = statement.where(Transaction.account == account)
+    return statement.order_by(Transaction.id)
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _batches(statement, batch_size: int, bind=None):
+    """Row batches from a server-side cursor; only one batch is held at a time."""
+    with Session(bind or engine) as session:
+        # Core execution: plain column tuples, no ORM row processing
+        result = session.connection().execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+        for rows in result.partitions(batch_size):
+            yield rows
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(TRANSACTION_FIELDS)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _Drain:
+    """Write-only file for ParquetWriter: hands written bytes back, keeps tell() counting."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(batches, compression: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("date", pa.date32()), ("amount", pa.float64()),
+        ("description", pa.string()), ("category", pa.string()), ("type", pa.string()),
+        ("merchant", pa.string()), ("account", pa.string()),
+    ])
+    sink = _Drain()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression=compression)
+    try:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def export_transactions(statement, fmt: str = "csv", gzip: bool = False, batch_size: int = BATCH_SIZE, bind=None):
+    """
+    Encoded export of `statement` as a generator of byte chunks, one per
+    cursor batch, so memory stays at one batch however large the table is.
+    CSV can be gzipped on the fly; Parquet uses gzip as its column codec
+    instead (snappy otherwise).
+    """
+    batches = _batches(statement, batch_size, bind)
+    if fmt == "parquet":
+        chunks = _parquet_chunks(batches, "gzip" if gzip else "snappy")
+    else:
+        chunks = _csv_chunks(batches)
+        if gzip:
+            chunks = _gzipped(chunks)
+
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        logger.info("[EXPORT] %s%s sent %d bytes", fmt, "+gzip" if gzip else "", sent)
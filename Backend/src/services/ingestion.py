@@ -1,8 +1,19 @@
-﻿import pandas as pd
+﻿from __future__ import annotations
+
+import json
 from datetime import datetime
 from sqlmodel import Session
 from ..models.transaction import Transaction
 from .categorizer import categorize
+from .raw_records import schema_id_for, save_raw_rows, known_date_format
+from .dates import parse_dates
+from .anomalies import record_anomalies
+from .recurring import update_recurring
+from ..app.profiling import span
+from ..app.logger import logger
+from ..app.utils import lazy_import
+
+pd = lazy_import("pandas")
 
 
 POSSIBLE_DATE_COLUMNS = ["date", "transaction_date", "posted", "time", "transaction date"]
@@ -42,10 +53,11 @@ def find_first(df, candidates):
     return None
 
 
-def normalize_and_save(df: pd.DataFrame, session: Session, column_mapping: dict = None):
+def normalize_and_save(df: pd.DataFrame, session: Session, column_mapping: dict = None, source: str = None):
     '''
     Normalize CSV and save to database
     column_mapping: Optional dict to specify which columns map to which fields
+    source: upload name recorded with the column schema of the raw rows
     '''
     df = df.copy()
 
@@ -74,44 +86,70 @@ def normalize_and_save(df: pd.DataFrame, session: Session, column_mapping: dict
         raise ValueError("CSV must contain date and amount-like columns")
 
     saved = 0
-
-    for _, row in df.iterrows():
-        try:
-            description = row[desc_col] if desc_col and desc_col in row else None
-            merchant = row[merchant_col] if merchant_col and merchant_col in row else None
-            category = row[category_col] if category_col and category_col in row else None
-            tx_type = row[type_col] if type_col and type_col in row else None
-            account = row[account_col] if account_col and account_col in row else None
+    saved_txs, saved_raw = [], []
+    skipped, skip_examples = 0, []
+    # original values per row; column names are stored once in the upload's schema
+    raw_rows = json.loads(df.to_json(orient="values", date_format="iso"))
+
+    # one vectorized parse per column; format reused from earlier uploads with these columns
+    with span("ingest_dates"):
+        dates, date_format = parse_dates(df[date_col], known_date_format(session, list(df.columns)))
+
+    with span("ingest_rows"):
+        for (_, row), raw, when in zip(df.iterrows(), raw_rows, dates):
+            try:
+                if pd.isna(when):
+                    raise ValueError(f"unparseable date {row[date_col]!r}")
+                description = row[desc_col] if desc_col and desc_col in row else None
+                merchant = row[merchant_col] if merchant_col and merchant_col in row else None
+                category = row[category_col] if category_col and category_col in row else None
+                tx_type = row[type_col] if type_col and type_col in row else None
+                account = row[account_col] if account_col and account_col in row else None
             
-            # If no category provided, use categorizer
-            if not category:
-                category = categorize(description, merchant)
+                # If no category provided, use categorizer
+                if not category:
+                    category = categorize(description, merchant)
             
-            # Determine amount sign based on type
-            amount = float(row[amount_col])
-            if tx_type and str(tx_type).lower() == "expense" and amount > 0:
-                amount = -amount
-            elif tx_type and str(tx_type).lower() == "income" and amount < 0:
-                amount = abs(amount)
-
-            tx = Transaction(
-                date=pd.to_datetime(row[date_col]).date(),
-                amount=amount,
-                description=description,
-                merchant=merchant,
-                category=category,
-                type=tx_type,
-                account=account,
-                raw_json=row.to_json(),
-            )
-
-            session.add(tx)
-            saved += 1
-
-        except Exception as e:
-            # Skip bad rows instead of crashing ingestion (MVP-friendly)
-            print(f"Skipping row: {e}")
-            continue
-
-    session.commit()
+                # Determine amount sign based on type
+                amount = float(row[amount_col])
+                if tx_type and str(tx_type).lower() == "expense" and amount > 0:
+                    amount = -amount
+                elif tx_type and str(tx_type).lower() == "income" and amount < 0:
+                    amount = abs(amount)
+
+                tx = Transaction(
+                    date=when.date(),
+                    amount=amount,
+                    description=description,
+                    merchant=merchant,
+                    category=category,
+                    type=tx_type,
+                    account=account,
+                )
+
+                session.add(tx)
+                saved_txs.append(tx)
+                saved_raw.append(raw)
+                saved += 1
+
+            except Exception as e:
+                # Skip bad rows instead of crashing ingestion (MVP-friendly);
+                # reported once below, not per row
+                skipped += 1
+                if len(skip_examples) < 3:
+                    skip_examples.append(f"row {row.name}: {e}")
+                continue
+
+    if skipped:
+        logger.warning("Skipped %d of %d rows from %s, e.g. %s", skipped, len(df), source or "upload",
+                       "; ".join(skip_examples))
+
+    with span("ingest_commit"):
+        if saved_txs:
+            session.flush()
+            schema_id = schema_id_for(session, list(df.columns), source=source, date_format=date_format)
+            save_raw_rows(session, schema_id, [tx.id for tx in saved_txs], saved_raw)
+            record_anomalies(session, saved_txs)
+            update_recurring(session, saved_txs)
+        session.commit()
     return saved
@@ -1,5 +1,8 @@
 import numpy as np
-from scipy.optimize import minimize
+from ..app.utils import lazy_import
+from ..app.profiling import span
+
+optimize = lazy_import("scipy.optimize")
 
 
 def optimize_portfolio(
@@ -57,13 +60,14 @@ def optimize_portfolio(
 
     w0 = np.ones(n) / n
 
-    result = minimize(
-        objective,
-        w0,
-        method="SLSQP",
-        bounds=bounds,
-        constraints=constraints
-    )
+    with span("optimize_solve"):
+        result = optimize.minimize(
+            objective,
+            w0,
+            method="SLSQP",
+            bounds=bounds,
+            constraints=constraints
+        )
 
     if not result.success:
         raise RuntimeError("Optimization failed")
@@ -1,24 +1,168 @@
 import json
-from sqlmodel import Session, select
-from ..models.portfolio_model import Portfolio
-from ..app.database import engine
+import numpy as np
+from sqlalchemy import inspect, insert, text
+from sqlmodel import Session, select, func
+from ..models.portfolio_model import Portfolio, PortfolioHolding
+from ..app.database import engine, migration_lock
+from ..app.utils import LRUCache
+from ..app.logger import logger
 # actually this one is okay — but ensure no "app." anywhere else.
 
 def save_portfolio(name: str, assets: list[str], weights: list[float]):
-    portfolio = Portfolio(
-        name=name,
-        assets=json.dumps(assets),
-        weights=json.dumps(weights)
-    )
+    portfolio = Portfolio(name=name)
     with Session(engine) as session:
         session.add(portfolio)
+        session.flush()
+        if assets:
+            session.execute(insert(PortfolioHolding), [
+                {"portfolio_id": portfolio.id, "position": i, "asset": a, "weight": float(w)}
+                for i, (a, w) in enumerate(zip(assets, weights))
+            ])
         session.commit()
         session.refresh(portfolio)
         return portfolio
 
 
-def get_portfolios():
+def _with_holdings(session: Session, portfolios: list[Portfolio]):
+    """Portfolio rows as dicts with their assets/weights, one holdings query for the lot."""
+    if not portfolios:
+        return []
+    rows = session.exec(
+        select(PortfolioHolding.portfolio_id, PortfolioHolding.asset, PortfolioHolding.weight)
+        .where(PortfolioHolding.portfolio_id.in_([p.id for p in portfolios]))
+        .order_by(PortfolioHolding.portfolio_id, PortfolioHolding.position)
+    ).all()
+    holdings = {p.id: ([], []) for p in portfolios}
+    for pid, asset, weight in rows:
+        holdings[pid][0].append(asset)
+        holdings[pid][1].append(weight)
+    return [
+        {"id": p.id, "name": p.name, "created_at": p.created_at,
+         "assets": holdings[p.id][0], "weights": holdings[p.id][1]}
+        for p in portfolios
+    ]
+
+
+def get_portfolios(limit: int | None = None, before_id: int | None = None):
+    """
+    Saved portfolios, newest first. Keyset pagination: pass the last id of
+    a page as `before_id` to get the next one.
+    """
+    statement = select(Portfolio).order_by(Portfolio.id.desc())
+    if before_id is not None:
+        statement = statement.where(Portfolio.id < before_id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    with Session(engine) as session:
+        return _with_holdings(session, session.exec(statement).all())
+
+
+def latest_portfolio():
+    """The most recently created portfolio (index lookup on created_at), or None."""
+    with Session(engine) as session:
+        portfolio = session.exec(
+            select(Portfolio).order_by(Portfolio.created_at.desc(), Portfolio.id.desc()).limit(1)
+        ).first()
+        return _with_holdings(session, [portfolio])[0] if portfolio else None
+
+
+def portfolios_version(session: Session):
+    """Cheap fingerprint of the portfolio table: row count + highest id."""
+    count, max_id = session.exec(select(func.count(Portfolio.id), func.max(Portfolio.id))).one()
+    return (int(count or 0), int(max_id or 0))
+
+
+# (table version, asset columns) -> (ids, names, assets, weights)
+_weight_matrix_cache = LRUCache(max_items=8)
+
+
+def weight_matrix(assets: list[str] | None = None):
+    """
+    Every saved portfolio's weights decoded once into a dense (portfolios,
+    assets) matrix aligned to `assets` (default: union of held assets in
+    first-seen order). Assets outside `assets` are appended rather than
+    dropped so no weight goes missing. Returns (ids, names, assets, W).
+    """
     with Session(engine) as session:
-        statement = select(Portfolio)
-        results = session.exec(statement).all()
-        return results
+        key = (portfolios_version(session), tuple(assets or ()))
+        cached = _weight_matrix_cache.get(key)
+        if cached is not None:
+            return cached
+        portfolios = session.exec(select(Portfolio.id, Portfolio.name).order_by(Portfolio.id)).all()
+        holdings = session.exec(
+            select(PortfolioHolding.portfolio_id, PortfolioHolding.asset, PortfolioHolding.weight)
+            .order_by(PortfolioHolding.portfolio_id, PortfolioHolding.position)
+        ).all()
+
+    rows = {pid: i for i, (pid, _) in enumerate(portfolios)}
+    columns = {a: i for i, a in enumerate(assets or ())}
+    for _, asset, _ in holdings:
+        columns.setdefault(asset, len(columns))
+
+    W = np.zeros((len(portfolios), len(columns)))
+    if holdings:
+        pids, held, weights = zip(*holdings)
+        np.add.at(W, ([rows[p] for p in pids], [columns[a] for a in held]), np.asarray(weights, dtype=float))
+    W.setflags(write=False)
+
+    result = ([pid for pid, _ in portfolios], [name for _, name in portfolios], list(columns), W)
+    return _weight_matrix_cache.put(key, result)
+
+
+def _drops_columns(conn) -> bool:
+    """ALTER TABLE ... DROP COLUMN needs SQLite 3.35+."""
+    if conn.dialect.name != "sqlite":
+        return True
+    version = conn.exec_driver_sql("SELECT sqlite_version()").scalar()
+    return tuple(int(part) for part in version.split(".")) >= (3, 35)
+
+
+def _rebuild_portfolio_table(conn):
+    """Pre-3.35 SQLite: recreate portfolio with the current columns, keeping ids."""
+    # keep portfolio_holding's foreign key text pointing at "portfolio"
+    conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+    conn.exec_driver_sql("ALTER TABLE portfolio RENAME TO _portfolio_legacy")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_portfolio_created_at")
+    Portfolio.__table__.create(conn)
+    conn.exec_driver_sql(
+        "INSERT INTO portfolio (id, name, created_at) SELECT id, name, created_at FROM _portfolio_legacy"
+    )
+    conn.exec_driver_sql("DROP TABLE _portfolio_legacy")
+    conn.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+
+
+def upgrade_portfolio_storage(bind=None):
+    """
+    Bring a portfolio table created by older versions (assets/weights as
+    JSON strings, no created_at) up to the current schema: adds and indexes
+    created_at, moves the JSON into portfolio_holding rows and drops the old
+    columns. Does nothing on an up-to-date schema; safe to run from several
+    workers at once (the schema is re-checked under the migration lock).
+    """
+    bind = bind or engine
+    columns = {c["name"] for c in inspect(bind).get_columns("portfolio")}
+    if "created_at" in columns and "assets" not in columns:
+        return
+
+    with migration_lock(bind) as conn:
+        columns = {c["name"] for c in inspect(conn).get_columns("portfolio")}
+        if "created_at" not in columns:
+            conn.execute(text("ALTER TABLE portfolio ADD COLUMN created_at TIMESTAMP"))
+            conn.execute(text("UPDATE portfolio SET created_at = CURRENT_TIMESTAMP"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_portfolio_created_at ON portfolio (created_at)"))
+
+        if "assets" in columns:
+            legacy = conn.execute(text("SELECT id, assets, weights FROM portfolio")).all()
+            holdings = [
+                {"portfolio_id": pid, "position": i, "asset": a, "weight": float(w)}
+                for pid, assets, weights in legacy
+                for i, (a, w) in enumerate(zip(json.loads(assets or "[]"), json.loads(weights or "[]")))
+            ]
+            if holdings:
+                conn.execute(insert(PortfolioHolding), holdings)
+            if _drops_columns(conn):
+                conn.execute(text("ALTER TABLE portfolio DROP COLUMN assets"))
+                conn.execute(text("ALTER TABLE portfolio DROP COLUMN weights"))
+            else:
+                _rebuild_portfolio_table(conn)
+            logger.info("[PORTFOLIO] migrated %d portfolios to holdings rows", len(legacy))
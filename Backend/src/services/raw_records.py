@@ -0,0 +1,165 @@
+import ast
+import json
+import zlib
+
+from sqlalchemy import insert, inspect, text, update
+from sqlmodel import Session, select
+
+from ..models.transaction import Transaction, TransactionRaw, UploadSchema
+from ..app.database import engine, migration_lock
+from ..app.utils import LRUCache
+
+# packed rows: 1 flag byte + JSON array of the row's values (no keys);
+# rows long enough to gain from it are zlib-compressed
+PLAIN, DEFLATED = b"\x00", b"\x01"
+COMPRESS_MIN_BYTES = 192
+
+# schema id -> column names
+_schema_cache = LRUCache(max_items=256)
+# encoded column list -> date format last inferred for it
+_format_cache = LRUCache(max_items=256)
+
+
+def pack_values(values: list) -> bytes:
+    data = json.dumps(values, separators=(",", ":"), default=str).encode()
+    if len(data) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return DEFLATED + packed
+    return PLAIN + data
+
+
+def unpack_values(blob: bytes) -> list:
+    body = blob[1:]
+    if blob[:1] == DEFLATED:
+        body = zlib.decompress(body)
+    return json.loads(body)
+
+
+def _encode_columns(columns) -> str:
+    return json.dumps(list(columns), separators=(",", ":"))
+
+
+def schema_id_for(session: Session, columns: list[str], source: str | None = None,
+                  date_format: str | None = None) -> int:
+    """Id of the schema row for (source, columns), created on first use."""
+    encoded = _encode_columns(columns)
+    schema = session.exec(
+        select(UploadSchema).where(UploadSchema.source == source, UploadSchema.columns == encoded)
+    ).first()
+    if schema is None:
+        schema = UploadSchema(source=source, columns=encoded)
+        session.add(schema)
+    if date_format and schema.date_format != date_format:
+        schema.date_format = date_format
+        _format_cache.put(encoded, date_format)
+    session.flush()
+    return schema.id
+
+
+def known_date_format(session: Session, columns: list[str]) -> str | None:
+    """Date format inferred for an earlier upload with the same columns, from any source."""
+    encoded = _encode_columns(columns)
+    date_format = _format_cache.get(encoded)
+    if date_format is None:
+        date_format = session.exec(
+            select(UploadSchema.date_format)
+            .where(UploadSchema.columns == encoded, UploadSchema.date_format.is_not(None))
+            .order_by(UploadSchema.id.desc())
+            .limit(1)
+        ).first()
+        if date_format is not None:
+            _format_cache.put(encoded, date_format)
+    return date_format
+
+
+def upgrade_upload_schema(bind=None):
+    """Add upload_schema.date_format to tables created before it existed (re-checked under the migration lock)."""
+    bind = bind or engine
+    if "date_format" in {c["name"] for c in inspect(bind).get_columns("upload_schema")}:
+        return
+    with migration_lock(bind) as conn:
+        if "date_format" not in {c["name"] for c in inspect(conn).get_columns("upload_schema")}:
+            conn.execute(text("ALTER TABLE upload_schema ADD COLUMN date_format VARCHAR"))
+
+
+def save_raw_rows(session: Session, schema_id: int, transaction_ids: list[int], rows: list[list]):
+    """Bulk-insert packed source rows for already-flushed transactions."""
+    if not transaction_ids:
+        return
+    session.execute(insert(TransactionRaw), [
+        {"transaction_id": tid, "schema_id": schema_id, "data": pack_values(values)}
+        for tid, values in zip(transaction_ids, rows)
+    ])
+
+
+def schema_columns(session: Session, schema_id: int) -> list[str]:
+    columns = _schema_cache.get(schema_id)
+    if columns is None:
+        columns = _schema_cache.put(schema_id, json.loads(session.get(UploadSchema, schema_id).columns))
+    return columns
+
+
+def _parse_legacy(raw: str):
+    try:
+        return json.loads(raw)
+    except ValueError:
+        # manual entries used to be stored as str(dict)
+        return ast.literal_eval(raw)
+
+
+def raw_record(session: Session, transaction_id: int) -> dict | None:
+    """Original source record of a transaction, rebuilt from its packed row."""
+    stored = session.get(TransactionRaw, transaction_id)
+    if stored is not None:
+        return dict(zip(schema_columns(session, stored.schema_id), unpack_values(stored.data)))
+
+    legacy = session.exec(select(Transaction.raw_json).where(Transaction.id == transaction_id)).first()
+    return _parse_legacy(legacy) if legacy else None
+
+
+def compact_legacy_raw_json(bind=None, batch: int = 5000) -> int:
+    """
+    Move raw_json documents written by older versions into transaction_raw,
+    one schema per distinct key set. Each batch runs under the migration
+    lock, so workers starting together never move the same rows. Returns
+    the number of rows this call moved.
+    """
+    moved = 0
+    while True:
+        with migration_lock(bind) as conn, Session(bind=conn) as session:
+            count = _compact_batch(session, batch)
+        if not count:
+            return moved
+        moved += count
+
+
+def _compact_batch(session: Session, batch: int) -> int:
+    rows = session.exec(
+        select(Transaction.id, Transaction.raw_json)
+        .where(Transaction.raw_json.is_not(None))
+        .limit(batch)
+    ).all()
+    if not rows:
+        return 0
+
+    grouped = {}
+    for tid, raw in rows:
+        try:
+            record = _parse_legacy(raw)
+        except (ValueError, SyntaxError):
+            record = {"raw_json": raw}
+        if not isinstance(record, dict):
+            record = {"value": record}
+        grouped.setdefault(tuple(record), []).append((tid, list(record.values())))
+
+    for columns, items in grouped.items():
+        schema_id = schema_id_for(session, list(columns), source="legacy")
+        ids, values = zip(*items)
+        save_raw_rows(session, schema_id, list(ids), list(values))
+
+    session.execute(
+        update(Transaction).where(Transaction.id.in_([tid for tid, _ in rows])).values(raw_json=None)
+    )
+    session.commit()
+    return len(rows)
@@ -0,0 +1,286 @@
+import math
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import and_, func, insert, or_
+from sqlmodel import Session, select
+
+from ..models.recurring import RecurringSeries, SeedMarker, _utcnow
+from ..models.transaction import Transaction
+from ..app.config import config_yaml
+from ..app.profiling import span
+from ..app.utils import lazy_import
+
+pd = lazy_import("pandas")
+
+RECURRING_CONFIG = config_yaml.get("recurring", {})
+ENABLED = RECURRING_CONFIG.get("enabled", True)
+MIN_OCCURRENCES = RECURRING_CONFIG.get("min_occurrences", 3)
+# amount std / |mean| above this is not a fixed charge
+MAX_AMOUNT_CV = RECURRING_CONFIG.get("max_amount_cv", 0.25)
+
+# name, typical gap in days, tolerance on both the mean gap and its std
+PERIODS = [
+    ("weekly", 7.0, 1.5),
+    ("biweekly", 14.0, 2.5),
+    ("monthly", 30.44, 3.5),
+    ("quarterly", 91.31, 10.0),
+    ("yearly", 365.25, 20.0),
+]
+
+EPOCH = date(1970, 1, 1)
+SEED_MARKER = "recurring_series"
+STATE_FIELDS = ("count", "first_day", "last_day", "interval_mean", "interval_m2", "amount_mean", "amount_m2", "label")
+
+
+def payee_keys(merchant, description):
+    """Merchant (or description when there is none), lower-cased with digits/punctuation dropped."""
+    merchant = pd.Series(merchant, dtype="object").fillna("").astype(str)
+    description = pd.Series(description, dtype="object").fillna("").astype(str)
+    text = merchant.where(merchant.str.strip() != "", description)
+    # payee strings repeat a lot; clean each distinct one once
+    codes, uniques = pd.factorize(text)
+    cleaned = pd.Series(uniques).str.lower().str.replace(r"[\W\d_]+", " ", regex=True).str.strip()
+    return pd.Series(cleaned.to_numpy()[codes], index=text.index)
+
+
+def series_stats(df):
+    """
+    Per-payee interval and amount statistics of df (date, amount, merchant,
+    description). One sort by (payee, date), then gaps are plain diffs
+    masked at group boundaries and everything else is a grouped aggregate.
+    """
+    frame = pd.DataFrame({
+        "payee": payee_keys(df["merchant"].to_numpy(), df["description"].to_numpy()),
+        "day": (pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]") - np.datetime64(EPOCH)).astype(np.int64),
+        "amount": df["amount"].to_numpy(dtype=float),
+        "label": np.where(df["merchant"].fillna("").astype(str).str.strip() != "", df["merchant"], df["description"]),
+    })
+    frame = frame[frame["payee"] != ""].sort_values(["payee", "day"], kind="stable")
+    if frame.empty:
+        return pd.DataFrame(columns=STATE_FIELDS)
+
+    payee = frame["payee"].to_numpy()
+    day = frame["day"].to_numpy()
+    gap = np.diff(day, prepend=day[0]).astype(float)
+    gap[np.r_[True, payee[1:] != payee[:-1]]] = np.nan
+    frame["gap"] = gap
+
+    stats = frame.groupby("payee", sort=False).agg(
+        count=("amount", "size"),
+        first_day=("day", "first"),
+        last_day=("day", "last"),
+        interval_mean=("gap", "mean"),
+        interval_var=("gap", "var"),
+        amount_mean=("amount", "mean"),
+        amount_var=("amount", "var"),
+        label=("label", "last"),
+    )
+    stats["interval_m2"] = (stats.pop("interval_var") * (stats["count"] - 2).clip(lower=0)).fillna(0.0)
+    stats["amount_m2"] = (stats.pop("amount_var") * (stats["count"] - 1)).fillna(0.0)
+    stats["interval_mean"] = stats["interval_mean"].fillna(0.0)
+    return stats[list(STATE_FIELDS)]
+
+
+def _combine(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """Chan et al. merge of two (count, mean, M2) summaries."""
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n
+
+
+def merge_state(old: dict, new: dict) -> dict:
+    """Append a later batch of payments (new) to a stored series (old)."""
+    bridge = new["first_day"] - old["last_day"]
+    n, mean, m2 = _combine(old["count"] - 1, old["interval_mean"], old["interval_m2"], 1, bridge, 0.0)
+    _, interval_mean, interval_m2 = _combine(n, mean, m2, new["count"] - 1, new["interval_mean"], new["interval_m2"])
+    count, amount_mean, amount_m2 = _combine(
+        old["count"], old["amount_mean"], old["amount_m2"], new["count"], new["amount_mean"], new["amount_m2"]
+    )
+    return {
+        "count": count, "first_day": old["first_day"], "last_day": new["last_day"],
+        "interval_mean": interval_mean, "interval_m2": interval_m2,
+        "amount_mean": amount_mean, "amount_m2": amount_m2, "label": new["label"],
+    }
+
+
+def classify(state: dict):
+    """(period, next expected date) of a series, or (None, None) when it is not recurring."""
+    if state["count"] < MIN_OCCURRENCES:
+        return None, None
+    intervals = state["count"] - 1
+    interval_std = math.sqrt(state["interval_m2"] / (intervals - 1)) if intervals > 1 else 0.0
+    amount_std = math.sqrt(state["amount_m2"] / (state["count"] - 1))
+    if amount_std > MAX_AMOUNT_CV * abs(state["amount_mean"]):
+        return None, None
+
+    for name, days, tolerance in PERIODS:
+        if abs(state["interval_mean"] - days) <= tolerance and interval_std <= tolerance:
+            next_day = state["last_day"] + round(state["interval_mean"])
+            return name, EPOCH + timedelta(days=int(next_day))
+    return None, None
+
+
+def _row_values(state: dict) -> dict:
+    period, next_date = classify(state)
+    return {
+        "count": int(state["count"]),
+        "first_date": EPOCH + timedelta(days=int(state["first_day"])),
+        "last_date": EPOCH + timedelta(days=int(state["last_day"])),
+        "interval_mean": float(state["interval_mean"]),
+        "interval_m2": float(state["interval_m2"]),
+        "amount_mean": float(state["amount_mean"]),
+        "amount_m2": float(state["amount_m2"]),
+        "label": None if state["label"] is None else str(state["label"]),
+        "period": period,
+        "next_date": next_date,
+    }
+
+
+def _stored_state(row: RecurringSeries) -> dict:
+    return {
+        "count": row.count,
+        "first_day": (row.first_date - EPOCH).days,
+        "last_day": (row.last_date - EPOCH).days,
+        "interval_mean": row.interval_mean, "interval_m2": row.interval_m2,
+        "amount_mean": row.amount_mean, "amount_m2": row.amount_m2, "label": row.label,
+    }
+
+
+def _payee_filter(payees):
+    """
+    SQL superset of the rows whose payee key is one of `payees`: every word
+    of a key appears in the lower-cased raw merchant or description, since
+    cleaning only lower-cases and drops the characters between words. None
+    when a key has no ASCII word to match on (SQLite's lower() is ASCII-only).
+    """
+    clauses = []
+    for payee in payees:
+        words = [w for w in payee.split() if w.isascii()]
+        if not words:
+            return None
+        for column in (Transaction.merchant, Transaction.description):
+            clauses.append(and_(*(func.lower(column).like(f"%{w}%") for w in words)))
+    return or_(*clauses)
+
+
+def _history_frame(session: Session, payees=None, chunk: int = 100):
+    """Stored transactions as a frame; with `payees`, only rows that can map to them."""
+    columns = (Transaction.id, Transaction.date, Transaction.amount, Transaction.merchant, Transaction.description)
+    payees = None if payees is None else list(payees)
+    statements = [select(*columns)]
+    if payees is not None:
+        # chunked: SQLite caps expression depth; a row can match several chunks
+        filters = [_payee_filter(payees[i:i + chunk]) for i in range(0, len(payees), chunk)]
+        if all(f is not None for f in filters):
+            statements = [select(*columns).where(f) for f in filters]
+    rows = [row for statement in statements for row in session.exec(statement).all()]
+    df = pd.DataFrame.from_records(rows, columns=["id", "date", "amount", "merchant", "description"])
+    return df.drop_duplicates("id").drop(columns="id")
+
+
+def _history_stats(session: Session, payees=None):
+    """Stats over the stored transactions (only the given payees, if set)."""
+    stats = series_stats(_history_frame(session, payees))
+    return stats if payees is None else stats[stats.index.isin(payees)]
+
+
+def _save(session: Session, stats, existing: dict):
+    new = []
+    for payee, state in zip(stats.index, stats.to_dict(orient="records")):
+        values = _row_values(state)
+        row = existing.get(payee)
+        if row is None:
+            new.append({"payee": payee, **values})
+            continue
+        for field, value in values.items():
+            setattr(row, field, value)
+        row.updated_at = _utcnow()
+    if new:
+        session.execute(insert(RecurringSeries), new)
+
+
+def update_recurring(session: Session, transactions: list[Transaction]) -> int:
+    """
+    Fold newly saved transactions into their payees' series. Cost is a sort
+    of the new rows plus one lookup per touched payee; only uploads that
+    reach back before a series' last payment trigger a history rescan
+    for those payees. Returns the number of series touched.
+    """
+    if not ENABLED or not transactions:
+        return 0
+
+    with span("recurring_update"):
+        batch = series_stats(pd.DataFrame.from_records(
+            [(tx.date, tx.amount, tx.merchant, tx.description) for tx in transactions],
+            columns=["date", "amount", "merchant", "description"],
+        ))
+        if batch.empty:
+            return 0
+
+        payees = list(batch.index)
+        existing = {}
+        for i in range(0, len(payees), 500):
+            rows = session.exec(
+                select(RecurringSeries).where(RecurringSeries.payee.in_(payees[i:i + 500]))
+            ).all()
+            existing.update((row.payee, row) for row in rows)
+
+        merged, backdated = {}, []
+        for payee, state in zip(batch.index, batch.to_dict(orient="records")):
+            row = existing.get(payee)
+            if row is None:
+                merged[payee] = state
+            elif state["first_day"] >= (row.last_date - EPOCH).days:
+                merged[payee] = merge_state(_stored_state(row), state)
+            else:
+                backdated.append(payee)
+
+        stats = pd.DataFrame.from_dict(merged, orient="index", columns=list(STATE_FIELDS))
+        _save(session, stats, existing)
+        if backdated:
+            _save(session, _history_stats(session, backdated), existing)
+    return len(batch)
+
+
+def rebuild_recurring(session: Session) -> int:
+    """
+    One-off: build every series from the full history, then record that in
+    seed_marker. Series uploads wrote before the seed are overwritten with
+    their full-history state rather than taken as a sign seeding is done.
+    """
+    if session.get(SeedMarker, SEED_MARKER) is not None:
+        return 0
+    existing = {row.payee: row for row in session.exec(select(RecurringSeries)).all()}
+    stats = _history_stats(session)
+    _save(session, stats, existing)
+    session.add(SeedMarker(name=SEED_MARKER))
+    session.commit()
+    return len(stats)
+
+
+def list_recurring(session: Session, include_all: bool = False, limit: int = 200):
+    """Detected recurring series, soonest expected payment first."""
+    statement = select(RecurringSeries)
+    if not include_all:
+        statement = statement.where(RecurringSeries.period.is_not(None))
+    statement = statement.order_by(RecurringSeries.next_date, RecurringSeries.id).limit(limit)
+
+    results = []
+    for row in session.exec(statement).all():
+        amount_std = math.sqrt(row.amount_m2 / (row.count - 1)) if row.count > 1 else 0.0
+        results.append({
+            "payee": row.payee,
+            "label": row.label,
+            "period": row.period,
+            "count": row.count,
+            "interval_days": round(row.interval_mean, 2),
+            "amount": round(row.amount_mean, 2),
+            "amount_std": round(amount_std, 2),
+            "first_date": row.first_date,
+            "last_date": row.last_date,
+            "next_date": row.next_date,
+        })
+    return results
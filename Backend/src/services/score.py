@@ -1,7 +1,17 @@
 from sqlmodel import Session, select
 from ..models.transaction import Transaction
-import pandas as pd
 import math
+import numpy as np
+from ..app.utils import lazy_import
+from .search import matched_amount_total, matched_amounts
+
+pd = lazy_import("pandas")
+
+DEBT_KEYWORDS = ["loan", "emi", "credit"]
+
+SAVINGS_REASONS = ("Healthy savings rate", "Positive but modest savings", "Low or negative savings")
+BUFFER_REASONS = ("Strong emergency buffer", "Some emergency buffer", "Limited emergency buffer")
+DEBT_REASONS = ("High reliance on debt", "Moderate debt usage", None)
 
 
 # ---- helpers ----
@@ -23,6 +33,33 @@ def get_df(session: Session):
     return pd.DataFrame([r.model_dump() for r in rows])
 
 
+def score_rules(savings_rate, volatility, expenses, cash_buffer_months, debt_ratio):
+    """
+    The scoring rules over arrays of inputs, one element per point in time
+    (scalars work too). Returns (scores, labels, reasons per element).
+    """
+    savings_rate, volatility, expenses, cash_buffer_months, debt_ratio = (
+        np.atleast_1d(np.asarray(x, dtype=float))
+        for x in (savings_rate, volatility, expenses, cash_buffer_months, debt_ratio)
+    )
+    savings = np.select([savings_rate > 0.25, savings_rate > 0.1], [0, 1], 2)
+    volatile = volatility > expenses * 0.5
+    buffer = np.select([cash_buffer_months >= 6, cash_buffer_months >= 3], [0, 1], 2)
+    debt = np.select([debt_ratio > 0.4, debt_ratio > 0.2], [0, 1], 2)
+
+    scores = (50 + np.array([20, 10, -10])[savings] - 10 * volatile
+              + np.array([15, 5, -5])[buffer] + np.array([-15, -5, 0])[debt])
+    scores = np.clip(scores, 0, 100)
+    labels = np.select([scores >= 70, scores >= 40], ["safe", "tight"], "fragile")
+
+    reasons = [
+        [SAVINGS_REASONS[s]] + (["High spending volatility"] if v else []) + [BUFFER_REASONS[b]]
+        + ([DEBT_REASONS[d]] if DEBT_REASONS[d] else [])
+        for s, v, b, d in zip(savings.tolist(), volatile.tolist(), buffer.tolist(), debt.tolist())
+    ]
+    return scores, labels, reasons
+
+
 def financial_confidence_score(session: Session):
     df = get_df(session)
 
@@ -48,55 +85,12 @@ def financial_confidence_score(session: Session):
     avg_expense = safe_number(expenses / max(len(monthly), 1))
     cash_buffer_months = safe_number((income - expenses) / max(avg_expense, 1))
 
-    # debt proxy = negative transactions with debt keywords
-    debt_like = df[df["description"].fillna("").str.contains("loan|emi|credit", case=False)]
-    debt_ratio = safe_number(abs(debt_like["amount"].sum()) / max(income, 1))
-
-    score = 50
-    reasons = []
-
-    # savings
-    if savings_rate > 0.25:
-        score += 20
-        reasons.append("Healthy savings rate")
-    elif savings_rate > 0.1:
-        score += 10
-        reasons.append("Positive but modest savings")
-    else:
-        score -= 10
-        reasons.append("Low or negative savings")
+    # debt proxy = transactions with debt keywords, looked up in the text index
+    debt_total = matched_amount_total(session, DEBT_KEYWORDS)
+    debt_ratio = safe_number(abs(debt_total) / max(income, 1))
 
-    # volatility
-    if volatility > expenses * 0.5:
-        score -= 10
-        reasons.append("High spending volatility")
-
-    # buffer
-    if cash_buffer_months >= 6:
-        score += 15
-        reasons.append("Strong emergency buffer")
-    elif cash_buffer_months >= 3:
-        score += 5
-        reasons.append("Some emergency buffer")
-    else:
-        score -= 5
-        reasons.append("Limited emergency buffer")
-
-    # debt
-    if debt_ratio > 0.4:
-        score -= 15
-        reasons.append("High reliance on debt")
-    elif debt_ratio > 0.2:
-        score -= 5
-        reasons.append("Moderate debt usage")
-
-    score = max(0, min(100, score))
-
-    label = (
-        "safe" if score >= 70
-        else "tight" if score >= 40
-        else "fragile"
-    )
+    scores, labels, reasons = score_rules(savings_rate, volatility, expenses, cash_buffer_months, debt_ratio)
+    score, label, reasons = int(scores[0]), str(labels[0]), reasons[0]
 
     return {
         "score": score,
@@ -109,3 +103,66 @@ def financial_confidence_score(session: Session):
             "debt_ratio": round(safe_number(debt_ratio), 3)
         }
     }
+
+
+def _finite(x):
+    """Array version of safe_number."""
+    return np.nan_to_num(np.asarray(x, dtype=float), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def score_history(session: Session, window: int | None = None):
+    """
+    The score as of the end of every month with data, over all data up to
+    then (or the trailing `window` months). Monthly count / sum / sum of
+    squares / income / expenses / debt are aggregated once; cumulative sums
+    give every month's inputs and score_rules scores all months at once.
+    """
+    rows = session.exec(select(Transaction.date, Transaction.amount)).all()
+    if not rows:
+        return {"months": [], "score": [], "label": [], "reasons": [],
+                "savings_rate": [], "volatility": [], "cash_buffer_months": [], "debt_ratio": []}
+
+    df = pd.DataFrame.from_records(rows, columns=["date", "amount"])
+    month = pd.to_datetime(df["date"]).dt.to_period("M")
+    amount = df["amount"].astype(float)
+    centered = amount - amount.mean()       # keeps the sum-of-squares variance well conditioned
+    monthly = pd.DataFrame({
+        "n": 1.0,
+        "sum": centered,
+        "sumsq": centered * centered,
+        "income": amount.clip(lower=0),
+        "expenses": (-amount).clip(lower=0),
+    }).groupby(month).sum()
+
+    debt = pd.DataFrame.from_records(matched_amounts(session, DEBT_KEYWORDS), columns=["date", "amount"])
+    debt_by_month = debt["amount"].astype(float).groupby(pd.to_datetime(debt["date"]).dt.to_period("M")).sum()
+    monthly["debt"] = debt_by_month.reindex(monthly.index, fill_value=0.0)
+    monthly["months"] = 1.0
+
+    totals = monthly.cumsum()
+    if window:
+        totals = totals - totals.shift(window, fill_value=0.0)
+
+    n = totals["n"].to_numpy()
+    income = totals["income"].to_numpy()
+    expenses = totals["expenses"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (totals["sumsq"].to_numpy() - totals["sum"].to_numpy() ** 2 / n) / (n - 1)
+    volatility = _finite(np.sqrt(np.maximum(variance, 0.0)))
+
+    savings_rate = _finite((income - expenses) / np.maximum(income, 1))
+    avg_expense = _finite(expenses / np.maximum(totals["months"].to_numpy(), 1))
+    cash_buffer_months = _finite((income - expenses) / np.maximum(avg_expense, 1))
+    debt_ratio = _finite(np.abs(totals["debt"].to_numpy()) / np.maximum(income, 1))
+
+    scores, labels, reasons = score_rules(savings_rate, volatility, expenses, cash_buffer_months, debt_ratio)
+    return {
+        "months": monthly.index.astype(str).tolist(),
+        "score": scores.astype(int),
+        "label": labels.tolist(),
+        "reasons": reasons,
+        "savings_rate": savings_rate.round(3),
+        "volatility": volatility.round(2),
+        "cash_buffer_months": cash_buffer_months.round(2),
+        "debt_ratio": debt_ratio.round(3),
+    }
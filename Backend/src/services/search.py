@@ -0,0 +1,201 @@
+import re
+from datetime import date
+
+from sqlalchemy import Date, bindparam, inspect, text
+from sqlmodel import Session
+
+from ..app.database import engine
+from ..app.logger import logger
+
+# Full-text index over description / merchant / category.
+#   SQLite:   FTS5 external-content table kept in sync by triggers
+#   Postgres: generated weighted tsvector column with a GIN index
+# Anything else (or SQLite without FTS5) falls back to LIKE.
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transaction_fts USING fts5(
+        description, merchant, category,
+        content='transaction', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS transaction_fts_ai AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO transaction_fts(rowid, description, merchant, category)
+        VALUES (new.id, new.description, new.merchant, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transaction_fts_ad AFTER DELETE ON "transaction" BEGIN
+        INSERT INTO transaction_fts(transaction_fts, rowid, description, merchant, category)
+        VALUES ('delete', old.id, old.description, old.merchant, old.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transaction_fts_au AFTER UPDATE OF description, merchant, category
+    ON "transaction" BEGIN
+        INSERT INTO transaction_fts(transaction_fts, rowid, description, merchant, category)
+        VALUES ('delete', old.id, old.description, old.merchant, old.category);
+        INSERT INTO transaction_fts(rowid, description, merchant, category)
+        VALUES (new.id, new.description, new.merchant, new.category);
+    END""",
+]
+
+POSTGRES_DDL = [
+    """ALTER TABLE "transaction" ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(merchant, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(category, '')), 'C')
+    ) STORED""",
+    'CREATE INDEX IF NOT EXISTS ix_transaction_search ON "transaction" USING GIN (search_vector)',
+]
+
+RESULT_COLUMNS = ("id", "date", "amount", "description", "merchant", "category", "type", "account")
+
+# The LIKE fallback matches at word starts like the indexes do: a term
+# starts the field or follows one of these separators.
+WORD_SEPARATORS = " .,-/_'()&*#:;@+"
+
+
+# the three fields joined by spaces, so a field start is a word start too
+_LIKE_TEXT = ("lower(coalesce(t.description, '') || ' ' || coalesce(t.merchant, '')"
+              " || ' ' || coalesce(t.category, ''))")
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def ensure_search_index(bind=None):
+    """Create the text index (and backfill it) if it does not exist yet."""
+    bind = bind or engine
+    dialect = bind.dialect.name
+    try:
+        with bind.begin() as conn:
+            if dialect == "sqlite":
+                existed = inspect(conn).has_table("transaction_fts")
+                for statement in SQLITE_DDL:
+                    conn.execute(text(statement))
+                if not existed:
+                    conn.execute(text("INSERT INTO transaction_fts(transaction_fts) VALUES ('rebuild')"))
+            elif dialect == "postgresql":
+                for statement in POSTGRES_DDL:
+                    conn.execute(text(statement))
+    except Exception as e:
+        logger.warning("[SEARCH] text index unavailable, falling back to LIKE: %s", e)
+
+
+def _index_kind(session: Session):
+    bind = session.get_bind()
+    if bind.dialect.name == "sqlite":
+        has_fts = session.connection().execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'transaction_fts'")
+        ).first()
+        return "fts5" if has_fts else "like"
+    if bind.dialect.name == "postgresql":
+        return "tsvector"
+    return "like"
+
+
+def _terms(query: str):
+    return re.findall(r"\w+", query.lower())
+
+
+def _match_clause(kind: str, terms: list[str], match_all: bool):
+    """WHERE fragment + params for prefix matching of every (or any) term."""
+    if kind == "fts5":
+        joiner = " AND " if match_all else " OR "
+        return "transaction_fts MATCH :q", {"q": joiner.join(f'"{t}"*' for t in terms)}
+    if kind == "tsvector":
+        joiner = " & " if match_all else " | "
+        return "t.search_vector @@ to_tsquery('simple', :q)", {"q": joiner.join(f"{t}:*" for t in terms)}
+
+    joiner = " AND " if match_all else " OR "
+    clauses, params = [], {}
+    for i, term in enumerate(terms):
+        patterns = []
+        for j, prefix in enumerate([""] + [f"%{_like_escape(sep)}" for sep in WORD_SEPARATORS]):
+            params[f"t{i}_{j}"] = f"{prefix}{_like_escape(term)}%"
+            patterns.append(f"{_LIKE_TEXT} LIKE :t{i}_{j} ESCAPE '\\'")
+        clauses.append("(" + " OR ".join(patterns) + ")")
+    return "(" + joiner.join(clauses) + ")", params
+
+
+def _from_clause(kind: str):
+    if kind == "fts5":
+        return 'transaction_fts JOIN "transaction" t ON t.id = transaction_fts.rowid'
+    return '"transaction" t'
+
+
+def _filters(start: date | None, end: date | None, category: str | None):
+    clauses, params = [], {}
+    if start is not None:
+        clauses.append("t.date >= :start")
+        params["start"] = start
+    if end is not None:
+        clauses.append("t.date <= :end")
+        params["end"] = end
+    if category:
+        clauses.append("t.category = :category")
+        params["category"] = category
+    return clauses, params
+
+
+def search_transactions(
+    session: Session,
+    query: str,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+    match_all: bool = True,
+    limit: int = 50,
+    offset: int = 0,
+):
+    """
+    Ranked prefix search over description, merchant and category.
+    Every word of `query` matches as a prefix ("groc" finds "Groceries").
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    kind = _index_kind(session)
+    match, params = _match_clause(kind, terms, match_all)
+    filters, filter_params = _filters(start, end, category)
+    params.update(filter_params, limit=limit, offset=offset)
+
+    if kind == "fts5":
+        # bm25: lower is better; merchant hits weigh most, category least
+        rank = "-bm25(transaction_fts, 1.0, 2.0, 0.5)"
+    elif kind == "tsvector":
+        rank = "ts_rank(t.search_vector, to_tsquery('simple', :q))"
+    else:
+        rank = "0.0"
+
+    columns = ", ".join(f"t.{c}" for c in RESULT_COLUMNS)
+    sql = (
+        f"SELECT {columns}, {rank} AS rank FROM {_from_clause(kind)} "
+        f"WHERE {' AND '.join([match] + filters)} "
+        f"ORDER BY rank DESC, t.date DESC LIMIT :limit OFFSET :offset"
+    )
+    statement = text(sql).bindparams(*(bindparam(k, type_=Date) for k in ("start", "end") if k in params))
+    rows = session.connection().execute(statement, params).all()
+    return [dict(zip(RESULT_COLUMNS + ("rank",), row)) for row in rows]
+
+
+def _any_keyword(session: Session, keywords: list[str], columns: str):
+    """Result of SELECT `columns` over transactions matching any of `keywords`, or None."""
+    terms = [t for k in keywords for t in _terms(k)]
+    if not terms:
+        return None
+    kind = _index_kind(session)
+    match, params = _match_clause(kind, terms, match_all=False)
+    sql = f"SELECT {columns} FROM {_from_clause(kind)} WHERE {match}"
+    return session.connection().execute(text(sql), params)
+
+
+def matched_amount_total(session: Session, keywords: list[str]) -> float:
+    """Sum of amounts of transactions matching any of `keywords` (prefix match, via the index)."""
+    result = _any_keyword(session, keywords, "coalesce(sum(t.amount), 0)")
+    return float(result.scalar() or 0.0) if result is not None else 0.0
+
+
+def matched_amounts(session: Session, keywords: list[str]) -> list[tuple]:
+    """(date, amount) of every transaction matching any of `keywords`."""
+    result = _any_keyword(session, keywords, "t.date, t.amount")
+    return result.all() if result is not None else []
@@ -0,0 +1,133 @@
+from pathlib import Path
+
+import numpy as np
+
+from ..app.profiling import span
+from ..app.utils import LRUCache
+from .analytics import latest_returns_file, returns_matrix
+from .datasets import read_frame
+from .portfolio_service import weight_matrix
+
+# historical episodes, used when they fall inside the uploaded data
+HISTORICAL_PRESETS = {
+    "2008_financial_crisis": ("2008-09-01", "2009-03-09"),
+    "2020_covid_crash": ("2020-02-19", "2020-03-23"),
+    "2022_rate_shock": ("2022-01-03", "2022-10-12"),
+}
+
+# hypothetical per-asset shocks (total return over the scenario)
+HYPOTHETICAL_PRESETS = {
+    "crypto_crash": {"Crypto": -0.65},
+    "equity_bear_market": {"US_Stocks": -0.35, "Intl_Stocks": -0.40, "Real_Estate": -0.20, "Crypto": -0.50},
+    "rate_spike": {"Bonds": -0.15, "Real_Estate": -0.15, "US_Stocks": -0.10, "Gold": -0.05},
+    "inflation_shock": {"Bonds": -0.10, "Cash": -0.05, "Gold": 0.15, "US_Stocks": -0.08},
+}
+
+
+# (file, size, mtime) -> (dates as datetime64[D], assets, cumulative log growth)
+_returns_cache = LRUCache(max_items=4)
+
+
+def cumulative_log_returns(raw_dir: Path | None = None):
+    """Prefix sums of log(1 + r) for the latest returns file, once per file version."""
+    path = latest_returns_file(raw_dir)
+    if path is None:
+        return None, [], None
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    cached = _returns_cache.get(key)
+    if cached is not None:
+        return cached
+
+    dates, assets, matrix = returns_matrix(read_frame(path))
+    log_cum = np.vstack([np.zeros((1, len(assets))), np.cumsum(np.log1p(matrix), axis=0)])
+    return _returns_cache.put(key, (dates.to_numpy().astype("datetime64[D]"), assets, log_cum))
+
+
+def historical_shocks(dates, log_cum, windows: dict):
+    """
+    Compounded per-asset return over each (start, end) window, for all
+    windows at once from the prefix sums. Windows outside the data are
+    left out. Returns (names, shocks (windows, assets)).
+    """
+    names = list(windows)
+    if dates is None or not names:
+        return [], np.zeros((0, 0 if log_cum is None else log_cum.shape[1]))
+
+    starts = np.array([windows[n][0] for n in names], dtype="datetime64[D]")
+    ends = np.array([windows[n][1] for n in names], dtype="datetime64[D]")
+    lo = np.searchsorted(dates, starts, side="left")
+    hi = np.searchsorted(dates, ends, side="right")
+    covered = hi > lo
+    shocks = np.expm1(log_cum[hi[covered]] - log_cum[lo[covered]])
+    return [n for n, ok in zip(names, covered) if ok], shocks
+
+
+def hypothetical_shocks(scenarios: dict, assets: list[str]):
+    """Dense (scenarios, assets) matrix from {name: {asset: shock}}; unlisted assets are 0."""
+    index = {a: i for i, a in enumerate(assets)}
+    shocks = np.zeros((len(scenarios), len(assets)))
+    for row, moves in enumerate(scenarios.values()):
+        for asset, move in moves.items():
+            if asset in index:
+                shocks[row, index[asset]] = move
+    return list(scenarios), shocks
+
+
+def run_stress_test(
+    historical: dict | None = None,
+    hypothetical: dict | None = None,
+    include_presets: bool = True,
+    portfolio_ids: list[int] | None = None,
+    value: float | None = None,
+    raw_dir: Path | None = None,
+):
+    """
+    Apply every scenario to every saved portfolio: impacts = W @ S.T, with W
+    the cached (portfolios, assets) weight matrix and S the (scenarios,
+    assets) shock matrix. Historical windows are evaluated buy-and-hold
+    (no rebalancing inside the window).
+    """
+    dates, file_assets, log_cum = cumulative_log_returns(raw_dir)
+    ids, names, assets, W = weight_matrix(file_assets)
+    if portfolio_ids is not None:
+        keep = np.isin(ids, portfolio_ids)
+        ids = [i for i, k in zip(ids, keep) if k]
+        names = [n for n, k in zip(names, keep) if k]
+        W = W[keep]
+
+    windows = {**(HISTORICAL_PRESETS if include_presets else {}), **(historical or {})}
+    moves = {**(HYPOTHETICAL_PRESETS if include_presets else {}), **(hypothetical or {})}
+
+    with span("stress_scenarios"):
+        hist_names, hist = historical_shocks(dates, log_cum, windows)
+        # assets held in portfolios but absent from the returns file get no historical move
+        hist = np.pad(hist, ((0, 0), (0, len(assets) - hist.shape[1])))
+        hypo_names, hypo = hypothetical_shocks(moves, assets)
+        scenario_names = hist_names + hypo_names
+        S = np.vstack([hist, hypo])
+
+    with span("stress_evaluate"):
+        impacts = W @ S.T  # (portfolios, scenarios)
+
+    worst = impacts.argmin(axis=1) if impacts.size else np.zeros(len(ids), dtype=int)
+    result = {
+        "portfolios": [{"id": i, "name": n} for i, n in zip(ids, names)],
+        "scenarios": [
+            {"name": n, "type": "historical" if k < len(hist_names) else "hypothetical",
+             **({"window": windows[n]} if k < len(hist_names) else {})}
+            for k, n in enumerate(scenario_names)
+        ],
+        "skipped": [n for n in windows if n not in hist_names],
+        "uncovered_assets": [a for a in assets if a not in file_assets],
+        "assets": assets,
+        "shocks": S,
+        "impact": impacts,
+        "worst": [
+            {"portfolio": n, "scenario": scenario_names[w], "impact": impacts[i, w].item()}
+            for i, (n, w) in enumerate(zip(names, worst))
+        ] if scenario_names else [],
+    }
+    if value is not None:
+        result["value_change"] = impacts * value
+    return result
@@ -26,3 +26,71 @@ def test_optimize_endpoint():
 
     assert res.status_code == 200
     assert "weights" in res.json()
+
+
+def test_batch_forecast_endpoint():
+    payload = {
+        "series": {"food": [10, 12, 14], "rent": [5, 5, 5, 5]},
+        "steps": 3,
+    }
+    res = client.post("/api/forecast/batch", json=payload)
+
+    assert res.status_code == 200
+    body = res.json()["forecasts"]
+    assert set(body) == {"food", "rent"}
+    assert len(body["food"]["forecast"]) == 3
+    assert "lower" in body["rent"] and "upper" in body["rent"]
+
+    for override in ({"season_length": -3}, {"steps": 0}, {"steps": -1}, {"steps": 10_000}):
+        res = client.post("/api/forecast/batch", json={**payload, "model": "holt_winters", **override})
+        assert res.status_code == 422, override
+
+
+def test_metrics_endpoint_reports_route_latency():
+    client.get("/health")
+    res = client.get("/metrics")
+
+    assert res.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in res.text
+    assert "http_requests_in_flight" in res.text
+
+
+def test_monte_carlo_reports_server_timing_spans():
+    payload = {"initial": 1000, "monthly": 100, "mean": 0.07, "std": 0.15, "years": 2}
+    res = client.post("/api/monte-carlo", json=payload)
+
+    assert res.status_code == 200
+    timing = res.headers["server-timing"]
+    assert "mc_rng;dur=" in timing and "total;dur=" in timing
+
+
+def test_risk_rejects_out_of_range_levels_and_windows():
+    from src.services.auth import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "test"}
+    try:
+        for query in ("levels=1", "levels=1.5", "levels=0", "windows=0", "windows=-5,21"):
+            assert client.get(f"/api/risk?{query}").status_code == 422, query
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_category_forecast_rejects_out_of_range_interval():
+    from src.services.auth import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "test"}
+    try:
+        for interval in (0, 1, 1.5):
+            assert client.get(f"/api/forecast/categories?interval={interval}").status_code == 422, interval
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_monte_carlo_rejects_out_of_range_years_and_paths():
+    base = {"initial": 1000, "monthly": 100, "mean": 0.07, "std": 0.15, "years": 2}
+    for override in ({"years": 0}, {"years": -3}, {"years": 101}, {"paths": 0}, {"paths": 10**6}):
+        assert client.post("/api/monte-carlo", json={**base, **override}).status_code == 422, override
+
+    goal = {"goal_target": 50000, "mean": 0.07, "std": 0.15}
+    for override in ({"years": 0}, {"years": -1}, {"max_years": 0}, {"paths": -5}):
+        assert client.post("/api/monte-carlo/goal", json={**goal, **override}).status_code == 422, override
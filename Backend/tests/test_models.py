@@ -8,3 +8,85 @@ def test_linear_forecast_basic():
     assert len(result) == 2
     # Increasing trend → forecast should be greater than last value
     assert result[0] >= values[-1]
+
+
+def test_batch_forecast_matches_single_series():
+    import numpy as np
+    from src.models.forecasting import batch_linear_forecast
+
+    Y = np.array([[1, 2, 3, 4], [10, 8, 6, 4]], dtype=float)
+    preds, lower, upper = batch_linear_forecast(Y, steps=2)
+
+    assert preds.shape == (2, 2)
+    assert np.allclose(preds[1], [2, 0])
+    assert np.allclose(preds[0], linear_forecast([1, 2, 3, 4], 2))
+    assert (lower <= preds).all() and (preds <= upper).all()
+
+
+def test_holt_winters_batch_tracks_seasonal_series():
+    import numpy as np
+    from src.models.forecasting import batch_holt_winters_forecast
+
+    t = np.arange(36)
+    Y = np.vstack([100 + 2 * t + 10 * np.sin(2 * np.pi * t / 12), np.full(36, 50.0)])
+    preds, lower, upper = batch_holt_winters_forecast(Y, steps=12, season_length=12)
+
+    expected = 100 + 2 * np.arange(36, 48) + 10 * np.sin(2 * np.pi * np.arange(36, 48) / 12)
+    assert np.abs(preds[0] - expected).max() < 10
+    assert np.allclose(preds[1], 50.0)
+    assert (lower <= upper).all()
+
+
+def test_seeded_monte_carlo_reuses_shocks_and_results():
+    from src.pipelines.predict_pipeline import cumulative_shocks, run_monte_carlo_pipeline
+
+    args = (10_000, 500, 0.07, 0.15, 5)
+    first = run_monte_carlo_pipeline(*args, paths=200, seed=7)
+    assert run_monte_carlo_pipeline(*args, paths=200, seed=7) is first
+
+    # same shocks, higher contribution: every band moves up, no jitter
+    richer = run_monte_carlo_pipeline(10_000, 600, 0.07, 0.15, 5, paths=200, seed=7)
+    assert (richer["median"][1:] > first["median"][1:]).all()
+    assert cumulative_shocks(200, 60, seed=7) is cumulative_shocks(200, 60, seed=7)
+
+
+def test_goal_seek_monthly_matches_simulated_probability():
+    from src.pipelines.predict_pipeline import run_goal_seek_pipeline, run_monte_carlo_pipeline
+
+    solved = run_goal_seek_pipeline("monthly", 500_000, 0.75, 50_000, 0, 0.07, 0.15, 15, paths=2000, seed=11)
+    check = run_monte_carlo_pipeline(
+        50_000, solved["value"], 0.07, 0.15, 15, paths=2000, goal_target=500_000, seed=11
+    )
+
+    assert solved["value"] > 0
+    assert check["goal_probability"] >= 0.75
+
+
+def test_risk_metrics_match_naive_loops():
+    import numpy as np
+    from src.models.risk_quant import drawdowns, rolling_correlation, rolling_stats, value_at_risk
+
+    rng = np.random.default_rng(3)
+    r = rng.normal(0.0005, 0.01, (300, 3))
+    window = 21
+
+    stats = rolling_stats(r, window)
+    naive_vol = np.array([r[t - window:t].std(axis=0, ddof=1) for t in range(window, 301)]) * np.sqrt(252)
+    assert np.allclose(stats["volatility"], naive_vol)
+
+    corr = rolling_correlation(r[:, :2], r[:, 2], window)
+    naive_corr = [np.corrcoef(r[t - window:t, 0], r[t - window:t, 2])[0, 1] for t in range(window, 301)]
+    assert np.allclose(corr[:, 0], naive_corr)
+
+    dd = drawdowns(np.array([[0.1], [-0.5], [0.2], [0.0]]))
+    assert np.isclose(dd["max_drawdown"][0], 0.5)
+    assert dd["max_drawdown_duration"][0] == 3
+
+    var = value_at_risk(r, levels=(0.95,))["0.95"]
+    assert (var["historical_cvar"] >= var["historical_var"]).all()
+    for bad in (1.0, 1.5, 0.0):
+        try:
+            value_at_risk(r, levels=(bad,))
+        except ValueError:
+            continue
+        raise AssertionError(f"level {bad} accepted")
@@ -0,0 +1,616 @@
+from datetime import date
+
+from sqlmodel import SQLModel, Session, create_engine
+
+from src.models.transaction import Transaction
+from src.services.category_forecast import forecast_by_group, monthly_series
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    return Session(engine)
+
+
+def test_category_forecast_from_transactions():
+    session = make_session()
+    for month in range(1, 7):
+        session.add(Transaction(date=date(2024, month, 5), amount=-100.0 * month, category="food"))
+        session.add(Transaction(date=date(2024, month, 9), amount=-50.0, category="rent"))
+    session.commit()
+
+    groups, months, matrix = monthly_series(session)
+    assert groups == ["food", "rent"]
+    assert months[0] == "2024-01" and len(months) == 6
+
+    result = forecast_by_group(session, steps=2)
+    assert result["forecast_months"] == ["2024-07", "2024-08"]
+    assert round(result["forecasts"]["food"]["forecast"][0]) == -700
+    assert forecast_by_group(session, steps=2) is result
+
+    session.add(Transaction(date=date(2024, 7, 1), amount=-10.0, category="food"))
+    session.commit()
+    assert forecast_by_group(session, steps=2) is not result
+
+
+def test_backtest_rebalancing_matches_daily_loop():
+    import numpy as np
+    import pandas as pd
+    from src.services.backtesting import calendar_starts, simulate, threshold_starts
+
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0004, 0.01, (200, 3))
+    dates = pd.Series(pd.date_range("2024-01-01", periods=200, freq="D"))
+    log_cum = np.vstack([np.zeros((1, 3)), np.cumsum(np.log1p(returns), axis=0)])
+    target = np.array([0.5, 0.3, 0.2])
+
+    starts = calendar_starts(dates, "monthly")
+    equity, turnover = simulate(log_cum, starts, target[None])
+
+    value, holdings, expected = 1.0, None, []
+    for t in range(200):
+        if t in starts:
+            holdings = value * target
+        holdings = holdings * (1 + returns[t])
+        value = holdings.sum()
+        expected.append(value)
+    assert np.allclose(equity[:, 0], expected)
+    assert turnover.shape == (len(starts) - 1, 1) and (turnover > 0).all()
+
+    loose = threshold_starts(log_cum, target, threshold=0.5)
+    tight = threshold_starts(log_cum, target, threshold=0.005)
+    assert list(loose) == [0] and len(tight) > 1
+
+
+def test_backtest_keeps_portfolios_that_share_a_name(tmp_path, monkeypatch):
+    import numpy as np
+    import pandas as pd
+    from src.services import backtesting
+
+    path = tmp_path / "returns.csv"
+    path.write_text("date,A,B\n")
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=60).strftime("%Y-%m-%d"),
+                       "A": rng.normal(0, 0.01, 60), "B": rng.normal(0, 0.01, 60)})
+    W = np.array([[0.5, 0.5], [0.9, 0.1]])
+    monkeypatch.setattr(backtesting, "latest_portfolio_returns", lambda raw_dir=None: (path, df))
+    monkeypatch.setattr(backtesting, "weight_matrix", lambda assets: ([1, 2], ["core", "core"], assets, W))
+
+    result = backtesting.run_backtest(rules=("none",), optimize_rules=())
+    strategies = {s["name"]: s for s in result["strategies"]}
+    assert set(strategies) == {"core#1:none", "core#2:none"}
+    assert strategies["core#2:none"]["portfolio_id"] == 2
+    assert len(result["equity"]) == 2
+
+
+def test_stress_shocks_compound_windows_and_fill_hypotheticals():
+    import numpy as np
+    from src.services.stress import historical_shocks, hypothetical_shocks
+
+    dates = np.arange("2024-01-01", "2024-01-11", dtype="datetime64[D]")
+    returns = np.full((10, 2), 0.01)
+    returns[:, 1] = -0.02
+    log_cum = np.vstack([np.zeros((1, 2)), np.cumsum(np.log1p(returns), axis=0)])
+
+    names, shocks = historical_shocks(dates, log_cum, {
+        "first_week": ("2024-01-01", "2024-01-07"),
+        "before_data": ("2020-01-01", "2020-02-01"),
+    })
+    assert names == ["first_week"]
+    assert np.allclose(shocks[0], [1.01 ** 7 - 1, 0.98 ** 7 - 1])
+
+    names, shocks = hypothetical_shocks({"crash": {"B": -0.5, "Z": -1.0}}, ["A", "B"])
+    assert names == ["crash"] and shocks.tolist() == [[0.0, -0.5]]
+
+
+def test_portfolio_holdings_pagination_and_latest(monkeypatch):
+    from sqlalchemy.pool import StaticPool
+    from src.services import portfolio_service
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(portfolio_service, "engine", engine)
+
+    for i in range(5):
+        portfolio_service.save_portfolio(f"p{i}", ["Bonds", "Gold"], [1 - i / 10, i / 10])
+
+    first = portfolio_service.get_portfolios(limit=2)
+    second = portfolio_service.get_portfolios(limit=2, before_id=first[-1]["id"])
+    assert [p["name"] for p in first + second] == ["p4", "p3", "p2", "p1"]
+
+    latest = portfolio_service.latest_portfolio()
+    assert latest["name"] == "p4" and latest["weights"] == [0.6, 0.4]
+
+    ids, names, assets, W = portfolio_service.weight_matrix(["Gold"])
+    assert assets == ["Gold", "Bonds"] and W.shape == (5, 2)
+    assert W[:, 0].tolist() == [0.0, 0.1, 0.2, 0.3, 0.4]
+
+
+def test_ingested_rows_keep_source_record_out_of_line():
+    import pandas as pd
+    from sqlmodel import select
+    from src.models.transaction import TransactionRaw, UploadSchema
+    from src.services.ingestion import normalize_and_save
+    from src.services.raw_records import compact_legacy_raw_json, raw_record
+
+    session = make_session()
+    df = pd.DataFrame({
+        "Date": ["2024-01-05", "2024-01-06"],
+        "Amount": [120.5, 40],
+        "Description": ["Rent", "Coffee"],
+        "Memo Note": ["x" * 300, None],
+    })
+    assert normalize_and_save(df, session, source="jan.csv") == 2
+
+    txs = session.exec(select(Transaction)).all()
+    assert all(tx.raw_json is None for tx in txs)
+    assert len(session.exec(select(UploadSchema)).all()) == 1
+    assert raw_record(session, txs[1].id) == {
+        "date": "2024-01-06", "amount": 40.0, "description": "Coffee", "memo note": None,
+    }
+    assert raw_record(session, txs[0].id)["memo note"] == "x" * 300
+
+    legacy = Transaction(date=date(2023, 1, 1), amount=1.0, raw_json='{"a": 1, "b": "two"}')
+    session.add(legacy)
+    session.commit()
+    assert compact_legacy_raw_json(session.get_bind()) == 1
+    assert session.get(Transaction, legacy.id).raw_json is None
+    assert session.get(TransactionRaw, legacy.id) is not None
+    assert raw_record(session, legacy.id) == {"a": 1, "b": "two"}
+
+
+def test_concurrent_raw_json_compaction_moves_each_row_once(tmp_path):
+    import threading
+    from sqlmodel import select
+    from src.models.transaction import TransactionRaw
+    from src.services import raw_records
+    from src.services.raw_records import compact_legacy_raw_json, raw_record
+
+    raw_records._schema_cache.clear()   # schema ids from other tests' databases
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite'}", connect_args={"timeout": 30})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(50):
+            session.add(Transaction(date=date(2023, 1, 1), amount=float(i), raw_json=f'{{"n": {i}}}'))
+        session.commit()
+
+    moved, errors = [], []
+
+    def worker():
+        try:
+            moved.append(compact_legacy_raw_json(engine, batch=7))
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert errors == [] and sum(moved) == 50
+    with Session(engine) as session:
+        assert len(session.exec(select(TransactionRaw)).all()) == 50
+        assert raw_record(session, 7) == {"n": 6}
+
+
+def test_transaction_search_prefix_ranking_and_filters():
+    from src.services.search import ensure_search_index, matched_amount_total, search_transactions
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    ensure_search_index(engine)
+    session = Session(engine)
+    session.add_all([
+        Transaction(date=date(2024, 1, 3), amount=-900.0, description="Home loan EMI", category="Loans"),
+        Transaction(date=date(2024, 2, 3), amount=-40.0, description="Supermarket", merchant="Groceria", category="Groceries"),
+        Transaction(date=date(2024, 3, 3), amount=-25.0, description="Groceries top-up", category="Groceries"),
+        Transaction(date=date(2024, 3, 9), amount=-12.0, description="Insurance Premium", category="Insurance"),
+    ])
+    session.commit()
+
+    hits = search_transactions(session, "groc")
+    assert len(hits) == 2
+    assert hits[0]["merchant"] == "Groceria"   # merchant matches rank first
+    assert [h["id"] for h in search_transactions(session, "groc", start=date(2024, 3, 1))] == [3]
+    assert search_transactions(session, "home loan", category="Groceries") == []
+
+    # token-prefix matching: "emi" no longer hits "Premium"
+    assert matched_amount_total(session, ["loan", "emi", "credit"]) == -900.0
+
+    session.get(Transaction, 1).description = "Car lease"
+    session.commit()
+    assert search_transactions(session, "home") == []
+
+
+def test_anomalies_flagged_from_running_group_stats():
+    import numpy as np
+    import pandas as pd
+    from sqlmodel import select
+    from src.models.anomaly import AmountStats
+    from src.services.anomalies import list_anomalies, observe, rebuild_stats
+    from src.services.ingestion import normalize_and_save
+
+    # streaming median / MAD land near the exact ones
+    rng = np.random.default_rng(3)
+    xs = rng.normal(100, 10, 3000)
+    state = dict.fromkeys(("count", "mean", "m2", "median", "mad"), 0)
+    for x in xs:
+        observe(state, x)
+    assert abs(state["mean"] - xs.mean()) < 1e-9
+    assert abs(state["m2"] / (len(xs) - 1) - xs.var(ddof=1)) < 1e-6
+    assert abs(state["median"] - np.median(xs)) < 1.5
+    assert abs(state["mad"] - np.median(np.abs(xs - np.median(xs)))) < 1.5
+
+    session = make_session()
+    amounts = [-50, -52, -48, -51, -49, -50, -53, -47, -50, -51]
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=12).strftime("%Y-%m-%d"),
+        "amount": amounts + [-49, -900],
+        "merchant": ["Cafe"] * 12,
+        "category": ["Dining"] * 12,
+    })
+    assert normalize_and_save(df, session) == 12
+
+    stats = session.exec(select(AmountStats)).one()
+    assert (stats.category, stats.merchant, stats.count) == ("Dining", "Cafe", 12)
+    flagged = list_anomalies(session)
+    assert [a["amount"] for a in flagged] == [-900.0]
+    assert flagged[0]["robust_z"] < -3.5
+
+    # seeding is a no-op once stats exist
+    assert rebuild_stats(session) == 0
+
+
+def test_category_forecast_fills_empty_months_with_zero():
+    session = make_session()
+    for month in (1, 2, 5, 6):
+        session.add(Transaction(date=date(2024, month, 5), amount=-100.0, category="food"))
+    session.commit()
+
+    groups, months, matrix = monthly_series(session)
+    assert months == ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05", "2024-06"]
+    assert matrix[0].tolist() == [-100.0, -100.0, 0.0, 0.0, -100.0, -100.0]
+
+
+def test_recurring_series_merge_incrementally_across_uploads():
+    import pandas as pd
+    from sqlmodel import select
+    from src.models.recurring import RecurringSeries
+    from src.services.ingestion import normalize_and_save
+    from src.services.recurring import list_recurring, rebuild_recurring, series_stats
+
+    def upload(session, dates, merchant, amounts):
+        df = pd.DataFrame({"date": dates, "amount": amounts, "merchant": merchant, "category": "bills"})
+        return normalize_and_save(df, session)
+
+    session = make_session()
+    months = pd.date_range("2024-01-03", periods=8, freq="MS") + pd.Timedelta(days=2)
+    upload(session, months[:4].strftime("%Y-%m-%d"), "NETFLIX.COM 4411", -15.49)
+    upload(session, months[4:].strftime("%Y-%m-%d"), "Netflix.com 9902", -15.49)
+    upload(session, ["2024-02-01", "2024-02-19", "2024-02-20"], "Corner Shop", [-3.0, -80.0, -12.0])
+
+    series = list_recurring(session)
+    assert [(s["payee"], s["period"], s["count"]) for s in series] == [("netflix com", "monthly", 8)]
+    assert series[0]["next_date"] > series[0]["last_date"]
+    assert series[0]["amount"] == -15.49
+
+    # merged state matches stats computed from scratch
+    stored = session.exec(select(RecurringSeries).where(RecurringSeries.payee == "netflix com")).one()
+    txs = pd.DataFrame([tx.model_dump() for tx in session.exec(select(Transaction)).all()])
+    full = series_stats(txs).loc["netflix com"]
+    assert abs(stored.interval_mean - full["interval_mean"]) < 1e-9
+    assert abs(stored.interval_m2 - full["interval_m2"]) < 1e-9
+
+    # a backdated payment rescans that payee's history
+    upload(session, ["2023-12-05"], "Netflix.com 1", -15.49)
+    assert session.exec(select(RecurringSeries).where(RecurringSeries.payee == "netflix com")).one().count == 9
+    # the one-off seed agrees with the incrementally merged series
+    assert rebuild_recurring(session) == 2
+    assert session.exec(select(RecurringSeries).where(RecurringSeries.payee == "netflix com")).one().count == 9
+
+    # ...reading only rows that can belong to it
+    from src.services.recurring import _history_frame
+    rows = _history_frame(session, ["netflix com"])
+    assert len(rows) == 9 and rows["merchant"].str.lower().str.startswith("netflix").all()
+    assert len(_history_frame(session)) == 12
+
+
+def test_recurring_seed_covers_uploads_that_land_before_it():
+    import pandas as pd
+    from sqlmodel import select
+    from src.models.recurring import RecurringSeries
+    from src.services.ingestion import normalize_and_save
+    from src.services.recurring import rebuild_recurring
+
+    session = make_session()
+    # history from before recurring detection: no series rows
+    for month in range(1, 5):
+        session.add(Transaction(date=date(2024, month, 5), amount=-15.49, merchant="NETFLIX.COM", category="bills"))
+    session.commit()
+    # an upload lands first and writes its payee's series from the new rows only
+    normalize_and_save(pd.DataFrame({
+        "date": ["2024-05-05", "2024-06-05"], "amount": -15.49, "merchant": "Netflix.com", "category": "bills",
+    }), session)
+    assert session.exec(select(RecurringSeries)).one().count == 2
+
+    assert rebuild_recurring(session) == 1
+    stored = session.exec(select(RecurringSeries)).one()
+    assert (stored.count, stored.period) == (6, "monthly")
+    # done once, recorded by the marker rather than a non-empty table
+    assert rebuild_recurring(session) == 0
+
+
+def test_transaction_export_streams_csv_gzip_and_parquet():
+    import csv
+    import gzip
+    import io
+    import pytest
+    from src.services.export import export_transactions, transactions_query
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Transaction(date=date(2024, 1, d), amount=-float(d), description=f"row {d}", category="food" if d % 2 else "rent")
+            for d in range(1, 11)
+        ])
+        session.commit()
+
+    chunks = list(export_transactions(transactions_query(category="food"), batch_size=2, bind=engine))
+    assert len(chunks) == 3    # one per cursor batch
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [r["date"] for r in rows] == ["2024-01-01", "2024-01-03", "2024-01-05", "2024-01-07", "2024-01-09"]
+
+    zipped = b"".join(export_transactions(transactions_query(start=date(2024, 1, 9)), gzip=True, bind=engine))
+    assert gzip.decompress(zipped).decode().splitlines()[1:] == [
+        "9,2024-01-09,-9.0,row 9,food,,,", "10,2024-01-10,-10.0,row 10,rent,,,",
+    ]
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    body = b"".join(export_transactions(transactions_query(), fmt="parquet", batch_size=4, bind=engine))
+    parquet = pq.ParquetFile(io.BytesIO(body))
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column("amount").to_pylist() == [-float(d) for d in range(1, 11)]
+
+
+def test_date_format_inferred_once_and_reused_per_schema(monkeypatch):
+    import pandas as pd
+    from sqlmodel import select
+    from src.services import dates
+    from src.services.dates import parse_dates
+    from src.services.ingestion import normalize_and_save
+    from src.services.raw_records import known_date_format
+
+    parsed, fmt = parse_dates(pd.Series(["1/1/2005", "2/1/2005", "12/31/2005", None, "Feb 3, 2005"]))
+    assert fmt == "%m/%d/%Y"
+    assert parsed.dt.strftime("%Y-%m-%d").tolist()[:3] == ["2005-01-01", "2005-02-01", "2005-12-31"]
+    assert pd.isna(parsed[3]) and parsed[4] == pd.Timestamp("2005-02-03")   # per-row fallback
+    assert parse_dates(["03/01/2024", "25/01/2024"])[1] == "%d/%m/%Y"
+    assert parse_dates(["2024-01-05", "2024-02-05T10:30:00"])[1] == "ISO8601"
+
+    session = make_session()
+    first = pd.DataFrame({"Txn Date": ["05/01/2024", "28/01/2024"], "Amount": [1.0, 2.0], "Memo": ["a", "b"]})
+    first.columns = ["date", "amount", "memo"]
+    assert normalize_and_save(first, session, source="bank-jan.csv") == 2
+    assert known_date_format(session, ["date", "amount", "memo"]) == "%d/%m/%Y"
+
+    # next month's export from the same bank: no inference, even for an ambiguous column
+    calls = []
+    monkeypatch.setattr(dates, "infer_date_format", lambda values: calls.append(1))
+    days = [f"{d:02d}/03/2024" for d in range(1, 31)]
+    second = pd.DataFrame({"date": days + ["bad"], "amount": 1.0, "memo": "c"})
+    assert normalize_and_save(second, session, source="bank-mar.csv") == 30
+    assert calls == []
+    latest = session.exec(select(Transaction).order_by(Transaction.date.desc())).first()
+    assert str(latest.date) == "2024-03-30"
+
+
+def test_score_history_matches_score_on_growing_subsets():
+    import numpy as np
+    from src.services.score import financial_confidence_score, score_history
+
+    rng = np.random.default_rng(5)
+    txs = []
+    for m in range(1, 13):
+        txs.append(Transaction(date=date(2023, m, 1), amount=3000.0, description="Salary"))
+        txs.append(Transaction(date=date(2023, m, 5), amount=-900.0, description="Home loan EMI"))
+        for d in rng.integers(2, 28, 6):
+            txs.append(Transaction(date=date(2023, m, int(d)), amount=-float(rng.gamma(2, 150 + 60 * m)),
+                                   description="Groceries"))
+
+    full = make_session()
+    full.add_all(txs)
+    full.commit()
+    history = score_history(full)
+    assert history["months"][0] == "2023-01" and len(history["months"]) == 12
+    assert history["score"][-1] == financial_confidence_score(full)["score"]
+
+    for k in (0, 4, 11):
+        subset = make_session()
+        subset.add_all([Transaction(**tx.model_dump(exclude={"id"})) for tx in txs if tx.date.month <= k + 1])
+        subset.commit()
+        single = financial_confidence_score(subset)
+        assert history["score"][k] == single["score"]
+        assert history["reasons"][k] == single["reasons"]
+        for name, value in single["inputs_used"].items():
+            assert abs(history[name][k] - value) < 1e-6, name
+
+    trailing = score_history(full, window=3)
+    assert trailing["months"] == history["months"] and trailing["score"][0] == history["score"][0]
+
+
+def test_dataset_cache_round_trips_and_invalidates(tmp_path):
+    import os
+    import numpy as np
+    import pandas as pd
+    from src.services import datasets
+
+    path = tmp_path / "returns.csv"
+    pd.DataFrame({
+        "Date": ["2024-01-02", "2024-01-03", None],
+        "AAPL": [0.01, np.nan, -0.02],
+        "Shares": [3, 4, 5],
+        "Note": ["a", None, "ü, quoted"],
+    }).to_csv(path, index=False)
+
+    dataset = datasets.open_dataset(path)
+    frame, expected = dataset.frame(), pd.read_csv(path)
+    assert frame.equals(expected) and (frame.dtypes == expected.dtypes).all()
+    assert isinstance(dataset.column("AAPL"), np.memmap)
+    assert datasets.open_dataset(path) is dataset
+    assert datasets.describe(path) == (["Date", "AAPL", "Shares", "Note"], 3)
+    assert datasets.read_column(path, "missing") is None
+
+    assert dataset.column("Note") is dataset.column("Note")
+
+    first = dataset.directory
+    held = datasets.Dataset(first)
+    pd.DataFrame({"Date": ["2024-02-01"], "MSFT": [0.5]}).to_csv(path, index=False)
+    os.utime(path, ns=(0, 10**9))
+    datasets.invalidate(path)
+    assert not first.exists()
+    # a holder opened before the re-upload still reads every column
+    assert list(held.column("Shares")) == [3, 4, 5] and held.column("Date")[0] == "2024-01-02"
+
+    # headers come from the CSV itself until the new version is converted
+    assert datasets.read_columns(path) == ["Date", "MSFT"]
+    assert not list(first.parent.glob("returns.csv.*"))
+    assert datasets.open_dataset(path).directory != first
+
+
+def test_portfolio_risk_cache_hit_skips_loading_the_file(tmp_path, monkeypatch):
+    import numpy as np
+    import pandas as pd
+    from src.services import analytics
+
+    rng = np.random.default_rng(2)
+    pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=80).strftime("%Y-%m-%d"),
+                  "A": rng.normal(0, 0.01, 80), "B": rng.normal(0, 0.01, 80)}).to_csv(tmp_path / "r.csv", index=False)
+    loads = []
+    read_frame = analytics.read_frame
+    monkeypatch.setattr(analytics, "read_frame", lambda path: loads.append(path) or read_frame(path))
+    monkeypatch.setattr(analytics, "latest_weights_map", lambda: {})
+
+    first = analytics.portfolio_risk(windows=(21,), raw_dir=tmp_path)
+    assert analytics.portfolio_risk(windows=(21,), raw_dir=tmp_path) is first
+    assert len(loads) == 1
+
+
+def test_stress_returns_cache_hit_skips_loading_the_file(tmp_path, monkeypatch):
+    import numpy as np
+    import pandas as pd
+    from src.services import stress
+
+    rng = np.random.default_rng(4)
+    pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=30).strftime("%Y-%m-%d"),
+                  "A": rng.normal(0, 0.01, 30), "B": rng.normal(0, 0.01, 30)}).to_csv(tmp_path / "r.csv", index=False)
+    loads = []
+    read_frame = stress.read_frame
+    monkeypatch.setattr(stress, "read_frame", lambda path: loads.append(path) or read_frame(path))
+
+    first = stress.cumulative_log_returns(tmp_path)
+    assert stress.cumulative_log_returns(tmp_path) is first
+    assert first[1] == ["A", "B"] and len(loads) == 1
+
+
+def test_anomaly_stats_upsert_when_another_upload_created_the_group(tmp_path):
+    from sqlmodel import select
+    from src.models.anomaly import AmountStats
+    from src.services.anomalies import load_states, record_anomalies
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    SQLModel.metadata.create_all(engine)
+    first, second = Session(engine), Session(engine)
+    assert load_states(second, [("food", "Cafe")])[("food", "Cafe")]["count"] == 0
+    second.commit()      # second has now seen the (empty) group row
+
+    for session in (first, second):
+        txs = [Transaction(date=date(2024, 1, d), amount=-10.0 * d, category="food", merchant="Cafe")
+               for d in range(1, 4)]
+        session.add_all(txs)
+        session.flush()
+        record_anomalies(session, txs)
+        session.commit()
+
+    with Session(engine) as check:
+        rows = check.exec(select(AmountStats)).all()
+        assert len(rows) == 1 and rows[0].count == 6
+
+
+def test_ingestion_summarizes_skipped_rows_in_one_warning(caplog):
+    import logging
+    import pandas as pd
+    from src.services.ingestion import normalize_and_save
+
+    df = pd.DataFrame({"date": ["2024-01-01"] * 3 + ["nope"] * 50, "amount": [1.0, 2.0, "x"] + [1.0] * 50})
+    with caplog.at_level(logging.WARNING, logger="backend"):
+        assert normalize_and_save(df, make_session(), source="bad.csv") == 2
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "Skipped 51 of 53 rows from bad.csv" in warnings[0].getMessage()
+
+
+def test_startup_migrations_are_safe_to_run_concurrently(tmp_path, monkeypatch):
+    import json
+    import threading
+    from sqlalchemy import inspect, text
+    from src.services import portfolio_service
+    from src.services.portfolio_service import get_portfolios, upgrade_portfolio_storage
+    from src.services.raw_records import upgrade_upload_schema
+
+    def legacy_db(name):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE portfolio (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, "
+                              "assets VARCHAR NOT NULL, weights VARCHAR NOT NULL)"))
+            conn.execute(text("INSERT INTO portfolio (name, assets, weights) VALUES (:n, :a, :w)"),
+                         {"n": "old", "a": json.dumps(["A", "B"]), "w": json.dumps([0.25, 0.75])})
+            conn.execute(text("CREATE TABLE upload_schema (id INTEGER PRIMARY KEY, columns VARCHAR)"))
+        SQLModel.metadata.create_all(engine)
+        return engine
+
+    for name, drops in (("new.sqlite", True), ("old.sqlite", False)):
+        engine = legacy_db(name)
+        monkeypatch.setattr(portfolio_service, "_drops_columns", lambda conn, drops=drops: drops)
+        workers = [threading.Thread(target=lambda: (upgrade_portfolio_storage(engine), upgrade_upload_schema(engine)))
+                   for _ in range(4)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        assert {c["name"] for c in inspect(engine).get_columns("portfolio")} == {"id", "name", "created_at"}
+        assert "date_format" in {c["name"] for c in inspect(engine).get_columns("upload_schema")}
+        monkeypatch.setattr(portfolio_service, "engine", engine)
+        [saved] = get_portfolios()
+        assert saved["assets"] == ["A", "B"] and saved["weights"] == [0.25, 0.75]
+        portfolio_service.save_portfolio("new", ["A"], [1.0])
+
+
+def test_like_fallback_matches_word_prefixes_like_the_index():
+    from src.services.search import ensure_search_index, matched_amount_total, search_transactions
+
+    rows = [
+        Transaction(date=date(2024, 1, 3), amount=-900.0, description="Home loan EMI", category="Loans"),
+        Transaction(date=date(2024, 2, 3), amount=-40.0, description="Supermarket", merchant="Groceria", category="Groceries"),
+        Transaction(date=date(2024, 3, 3), amount=-25.0, description="Groceries top-up", category="Groceries"),
+        Transaction(date=date(2024, 3, 9), amount=-12.0, description="Insurance Premium", category="Insurance"),
+        Transaction(date=date(2024, 3, 9), amount=-9.0, merchant="NETFLIX.COM", category="Subscriptions"),
+    ]
+    sessions = {}
+    for indexed in (True, False):
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        if indexed:
+            ensure_search_index(engine)
+        session = Session(engine)
+        session.add_all([Transaction(**tx.model_dump()) for tx in rows])
+        session.commit()
+        sessions[indexed] = session
+
+    for query in ("groc", "up", "top up", "com", "emi", "mium", "market", "loan emi"):
+        ids = [sorted(h["id"] for h in search_transactions(s, query)) for s in sessions.values()]
+        assert ids[0] == ids[1], query
+    assert search_transactions(sessions[False], "mium") == []
+    assert matched_amount_total(sessions[False], ["loan", "emi", "credit"]) == -900.0
@@ -0,0 +1,258 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from src.app.utils import lazy_import
+
+
+def test_lazy_import_defers_execution():
+    json_mod = lazy_import("json")
+    assert json_mod.dumps([1]) == "[1]"
+
+
+def test_lazy_import_is_safe_under_concurrent_first_use(tmp_path, monkeypatch):
+    import threading
+
+    (tmp_path / "slowmod.py").write_text("import time\ntime.sleep(0.2)\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slowmod", raising=False)
+
+    proxies = [lazy_import("slowmod") for _ in range(8)]
+    assert "slowmod" not in sys.modules
+    results, errors = [], []
+
+    def use(proxy):
+        try:
+            results.append(proxy.VALUE)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=use, args=(p,)) for p in proxies]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and results == [42] * 8
+
+
+def test_main_import_keeps_heavy_modules_lazy():
+    code = (
+        "import sys, types, src.app.main\n"
+        "loaded = [m for m in ('pandas', 'scipy.optimize', 'groq', 'sklearn')\n"
+        "          if type(sys.modules.get(m)) is types.ModuleType]\n"
+        "print(','.join(loaded))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_sql_hooks_count_statements_for_current_request():
+    from sqlalchemy import create_engine, text
+    from src.app.metrics import RequestStats, current_request, instrument_engine
+
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    stats = RequestStats()
+    token = current_request.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+            conn.execute(text("select 2"))
+    finally:
+        current_request.reset(token)
+
+    assert stats.sql_statements == 2
+    assert stats.db_seconds >= 0
+
+
+def test_packed_columns_round_trip():
+    import numpy as np
+    from src.app.encoding import decode_packed, encode_packed
+
+    values = np.linspace(0, 1, 11)
+    body = encode_packed({"median": values, "goal_probability": 0.5}, float32=True)
+    decoded = decode_packed(body)
+
+    assert decoded["median"].dtype == np.float32
+    assert np.allclose(decoded["median"], values)
+    assert decoded["goal_probability"] == 0.5
+
+
+def test_compression_middleware_streams_gzip():
+    import gzip
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+    from src.app.encoding import CompressionMiddleware
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"row,%d\n" % i for i in range(1000)), media_type="text/csv")
+
+    res = TestClient(app).get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.content.startswith(b"row,0\n")  # httpx decodes transparently
+    assert res.content.count(b"\n") == 1000
+
+
+def test_async_url_maps_drivers():
+    from src.app.database import async_url
+
+    assert async_url("sqlite:///./portfolio.db") == "sqlite+aiosqlite:///./portfolio.db"
+    assert async_url("postgresql://u:p@db:5432/app?sslmode=require") == (
+        "postgresql+asyncpg://u:p@db:5432/app?ssl=require"
+    )
+
+
+def test_admission_queues_then_rejects_with_retry_after():
+    import threading
+    import pytest
+    from fastapi import HTTPException
+    from src.app.admission import AdmissionController, monte_carlo_cost
+
+    controller = AdmissionController(memory_budget=1000, limits={"mc": 1}, default_limit=4,
+                                     max_queue=1, queue_timeout=0.2)
+
+    with pytest.raises(HTTPException) as too_big:
+        controller.acquire("mc", 5000)
+    assert too_big.value.status_code == 413
+
+    started = controller.acquire("mc", 600)
+    waiter = threading.Thread(target=lambda: controller.release("mc", 100, controller.acquire("mc", 100)))
+    waiter.start()
+    while controller.waiting["mc"] == 0:
+        pass
+    with pytest.raises(HTTPException) as full:   # queue of one is taken
+        controller.acquire("mc", 100)
+    assert full.value.status_code == 429 and int(full.value.headers["Retry-After"]) >= 1
+    controller.release("mc", 600, started)
+    waiter.join()
+    assert controller.reserved == 0 and controller.active["mc"] == 0
+
+    # other endpoints share the memory budget
+    held = controller.acquire("opt", 900)
+    with pytest.raises(HTTPException) as busy:
+        controller.acquire("mc", 200)
+    assert busy.value.status_code == 503
+    controller.release("opt", 900, held)
+
+    assert monte_carlo_cost(10_000_000, 50) > 2**30 * 100
+
+
+def test_async_admission_waits_on_the_event_loop():
+    import asyncio
+    import threading
+    import pytest
+    from fastapi import HTTPException
+    from src.app.admission import AdmissionController
+
+    controller = AdmissionController(memory_budget=1000, limits={"mc": 1}, default_limit=4,
+                                     max_queue=8, queue_timeout=0.3)
+
+    async def scenario():
+        held = await controller.acquire_async("mc", 100)
+        threads = threading.active_count()
+        waiters = [asyncio.create_task(controller.acquire_async("mc", 100)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        assert controller.waiting["mc"] == 5 and threading.active_count() == threads
+
+        controller.release("mc", 100, held)          # capacity goes to the oldest waiter
+        first = await waiters[0]
+        assert controller.active["mc"] == 1 and controller.waiting["mc"] == 4
+
+        waiters[1].cancel()                          # a client that disconnects leaves the queue
+        await asyncio.sleep(0.01)
+        assert controller.waiting["mc"] == 3
+
+        with pytest.raises(HTTPException) as busy:
+            await waiters[2]
+        assert busy.value.status_code == 503
+        await asyncio.gather(*waiters[3:], return_exceptions=True)
+        controller.release("mc", 100, first)
+
+    asyncio.run(scenario())
+    assert controller.reserved == 0 and controller.active["mc"] == 0 and controller.waiting["mc"] == 0
+
+
+def test_json_log_records_cap_fields_and_sample_by_route():
+    import json
+    import logging
+    from types import SimpleNamespace
+    from src.app.logger import JsonFormatter, SamplingFilter, current_scope
+
+    record = logging.LogRecord("backend", logging.INFO, __file__, 1, "[FORECAST] values=%s note=%s",
+                               (list(range(10_000)), "x" * 5000), None)
+    record.user_id = 7
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "INFO" and entry["user_id"] == 7
+    assert "+9980 more]" in entry["msg"] and len(entry["msg"]) < 1500
+    assert record.args[0] == list(range(10_000))     # the record itself is untouched
+
+    sampler = SamplingFilter({"/api/forecast": 0.0})
+    token = current_scope.set({"method": "POST", "path": "/api/forecast",
+                               "route": SimpleNamespace(path="/api/forecast")})
+    try:
+        assert not sampler.filter(logging.makeLogRecord({"levelno": logging.INFO}))
+        warning = logging.makeLogRecord({"levelno": logging.WARNING})
+        assert sampler.filter(warning) and warning.route == "/api/forecast"
+    finally:
+        current_scope.reset(token)
+    assert sampler.filter(logging.makeLogRecord({"levelno": logging.INFO}))
+
+
+def test_queued_log_records_are_rendered_before_enqueueing():
+    import json
+    import logging
+    import queue
+    import sys
+    from src.app.logger import DroppingQueueHandler, JsonFormatter
+
+    handler = DroppingQueueHandler(queue.Queue(1))
+    values = [1, 2]
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.LogRecord("backend", logging.ERROR, __file__, 1, "values=%s", (values,), sys.exc_info())
+    handler.enqueue(handler.prepare(record))
+    values.append(3)                                  # mutated after the call returned
+    handler.enqueue(handler.prepare(record))          # queue full: dropped, not blocking
+
+    queued = handler.queue.get_nowait()
+    assert queued.exc_info is None and "RuntimeError: boom" in queued.exc_text
+    entry = json.loads(JsonFormatter().format(queued))
+    assert entry["msg"] == "values=[1, 2]" and "RuntimeError: boom" in entry["exc"]
+    assert handler.dropped == 1
+
+
+def test_profiling_needs_token_and_keeps_files_bounded(tmp_path, monkeypatch):
+    import os
+    from src.app import profiling
+
+    scope = {"path": "/api/forecast", "headers": [(b"x-profile", b"1")]}
+    monkeypatch.setattr(profiling, "DEBUG", True)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert not profiling._wants_profile(scope)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    assert not profiling._wants_profile(scope)
+    assert profiling._wants_profile({**scope, "headers": [(b"x-profile", b"s3cret")]})
+
+    sampler = profiling.StackSampler()
+    sampler.samples.update({f"a;b{i}": i + 1 for i in range(100)})
+    sampler.write(tmp_path / "p.folded", max_bytes=50)
+    assert 0 < (tmp_path / "p.folded").stat().st_size <= 50
+
+    for i in range(5):
+        (tmp_path / f"{i}.folded").write_text("x 1\n")
+        os.utime(tmp_path / f"{i}.folded", (i, i))
+    profiling._prune(tmp_path, keep=2)
+    assert sorted(p.name for p in tmp_path.glob("*.folded")) == ["4.folded", "p.folded"]